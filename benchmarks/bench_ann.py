@@ -0,0 +1,62 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.ann import IVFFlatIndex
+from memory.vector_store import VectorStoreMemory
+
+SIZE = 100_000
+DIM = 128
+QUERIES = 200
+K = 10
+
+def make_data(rng):
+    # Embeddings cluster by topic; a mixture of gaussians is closer to real data than pure noise
+    topics = rng.normal(size=(500, DIM))
+    data = topics[rng.integers(0, len(topics), SIZE)] + 1.0 * rng.normal(size=(SIZE, DIM))
+    queries = topics[rng.integers(0, len(topics), QUERIES)] + 1.0 * rng.normal(size=(QUERIES, DIM))
+    return data.astype(np.float32), queries.astype(np.float32)
+
+async def measure(store, queries):
+    start = time.perf_counter()
+    results = [await store.retrieve(q, k=K) for q in queries]
+    elapsed = time.perf_counter() - start
+    return [[r["metadata"]["i"] for r in result] for result in results], len(queries) / elapsed
+
+async def main():
+    rng = np.random.default_rng(0)
+    data, queries = make_data(rng)
+
+    exact = VectorStoreMemory(dim=DIM)
+    index = IVFFlatIndex()
+    approximate = VectorStoreMemory(dim=DIM, index=index)
+    for i, vector in enumerate(data):
+        await exact.store(str(i), vector, {"i": i})
+        await approximate.store(str(i), vector, {"i": i})
+
+    truth, exact_qps = await measure(exact, queries)
+    print(f"{SIZE} vectors x {DIM} dims, recall@{K} over {QUERIES} queries")
+    print(f"  {'exact (brute force)':<22} recall 1.000  {exact_qps:>8.0f} QPS")
+
+    # Training runs in a worker thread; the query that starts it is answered exactly
+    start = time.perf_counter()
+    await approximate.retrieve(queries[0], k=K)
+    print(f"  first query (starts training): {(time.perf_counter() - start) * 1e3:.1f} ms")
+    start = time.perf_counter()
+    await approximate.build_index()
+    print(f"  index build: {time.perf_counter() - start:.2f}s ({len(index.lists)} lists)")
+
+    for nprobe in (1, 4, 8, 16, 32, 64):
+        index.nprobe = nprobe
+        found, qps = await measure(approximate, queries)
+        recall = np.mean([len(set(a) & set(b)) / K for a, b in zip(found, truth)])
+        print(f"  {f'IVF-flat nprobe={nprobe}':<22} recall {recall:.3f}  {qps:>8.0f} QPS")
+
+if __name__ == "__main__":
+    asyncio.run(main())
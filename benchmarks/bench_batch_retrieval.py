@@ -0,0 +1,42 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.vector_store import VectorStoreMemory
+
+SIZE = 100_000
+DIM = 384
+QUERIES = 2000
+K = 10
+
+async def main():
+    rng = np.random.default_rng(0)
+    store = VectorStoreMemory(dim=DIM)
+    for i, vector in enumerate(rng.normal(size=(SIZE, DIM)).astype(np.float32)):
+        await store.store(str(i), vector, {"i": i})
+    queries = rng.normal(size=(QUERIES, DIM)).astype(np.float32)
+
+    start = time.perf_counter()
+    looped = [await store.retrieve(query, k=K) for query in queries]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = await store.retrieve_batch(queries, k=K)
+    batch_time = time.perf_counter() - start
+
+    same = all(
+        [r["metadata"]["i"] for r in a] == [r["metadata"]["i"] for r in b]
+        for a, b in zip(looped, batched)
+    )
+    print(f"{QUERIES} queries x {SIZE} vectors x {DIM} dims, top-{K}")
+    print(f"  retrieve loop    {loop_time:>7.2f}s  {QUERIES / loop_time:>8.0f} QPS")
+    print(f"  retrieve_batch   {batch_time:>7.2f}s  {QUERIES / batch_time:>8.0f} QPS  (identical results: {same})")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.manager import MemoryManager
+from memory.retention import RetentionPolicy
+
+FACTS = 50000
+DUPLICATE_FACTS = 10000
+VECTORS = 20000
+DUPLICATE_VECTORS = 4000
+DIM = 256
+MAX_FACTS = 30000
+MAX_VECTORS = 12000
+
+async def ticker(stop: asyncio.Event, gaps: list):
+    """Measures how long the event loop goes without getting to run a 1 ms timer."""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+async def traffic(manager: MemoryManager, stop: asyncio.Event, latencies: list):
+    """Agent-like load: a recall across every tier, then a new fact, back to back."""
+    rng = np.random.default_rng(1)
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await manager.recall(f"topic {i % 500}", k=5, query_embedding=rng.standard_normal(DIM))
+        await manager.long_term.store(f"live fact {i}", f"observed topic {i % 500}")
+        latencies.append(time.perf_counter() - start)
+        i += 1
+
+async def load(manager: MemoryManager):
+    rng = np.random.default_rng(0)
+    await asyncio.gather(*(
+        manager.long_term.store(f"fact {i}", f"topic {i % 500} detail {i}") for i in range(FACTS)
+    ))
+    # Same fact under a differently spelled key
+    await asyncio.gather(*(
+        manager.long_term.store(f"FACT  {i}", f"Topic {i % 500} detail {i}") for i in range(DUPLICATE_FACTS)
+    ))
+    vectors = rng.standard_normal((VECTORS, DIM)).astype(np.float32)
+    for i, vector in enumerate(vectors):
+        await manager.vector_store.store(f"vector {i}", vector)
+    for i in range(DUPLICATE_VECTORS):
+        await manager.vector_store.store(f"vector {i} again", vectors[i] + 0.01 * rng.standard_normal(DIM))
+
+def percentile(values, p):
+    return sorted(values)[min(len(values) - 1, int(p * len(values)))] * 1e3
+
+async def run(manager: MemoryManager, consolidate: bool, seconds: float = 5.0):
+    stop, gaps, latencies = asyncio.Event(), [], []
+    tasks = [asyncio.create_task(ticker(stop, gaps)), asyncio.create_task(traffic(manager, stop, latencies))]
+    if consolidate:
+        manager.start_consolidation()
+    await asyncio.sleep(seconds)
+    await manager.stop_consolidation()
+    stop.set()
+    await asyncio.gather(*tasks)
+    label = "consolidating" if consolidate else "idle"
+    print(f"  {label:<14} recall+store p50 {percentile(latencies, 0.5):6.1f} ms   p99 {percentile(latencies, 0.99):6.1f} ms   "
+          f"loop stalled up to {max(gaps) * 1e3:6.1f} ms")
+
+async def counts(manager: MemoryManager) -> str:
+    facts = (await manager.long_term.db.fetchone("SELECT COUNT(*) FROM facts"))[0]
+    return f"{facts} facts, {len(manager.vector_store)} vectors"
+
+async def main():
+    directory = tempfile.mkdtemp(prefix="nexus-consolidation-")
+    try:
+        manager = MemoryManager(
+            os.path.join(directory, "memory.db"),
+            retention={"facts": RetentionPolicy(max_rows=MAX_FACTS), "vectors": RetentionPolicy(max_rows=MAX_VECTORS)},
+            consolidation_interval=0.0
+        )
+        await load(manager)
+        print(f"before: {await counts(manager)}")
+        await run(manager, consolidate=False)
+        await run(manager, consolidate=True)
+
+        # Enough passes for one full sweep of the largest table
+        sweep = -(-(FACTS + DUPLICATE_FACTS) // manager.consolidator.batch_size) + 1
+        start = time.perf_counter()
+        for _ in range(sweep):
+            await manager.consolidate()
+        print(f"after {manager.consolidator.stats['passes']} passes ({time.perf_counter() - start:.1f}s for the last {sweep}): "
+              f"{await counts(manager)}")
+        stats = manager.consolidator.get_stats()
+        print(f"  merged {stats.get('facts_merged', 0)} facts, {stats.get('vectors_merged', 0)} vectors; "
+              f"evicted {stats.get('facts_evicted', 0)} facts, {stats.get('vectors_evicted', 0)} vectors; "
+              f"compacted {stats.get('vectors_compacted', 0)} vector rows")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    asyncio.run(main())
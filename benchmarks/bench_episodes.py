@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.episodic import Episode, ZSTD_AVAILABLE
+
+EPISODES = 200
+STEPS = 400
+K = 5
+TOOLS = ["web_search", "read_file", "python", "calculator", "http_get"]
+
+def make_words(rng, count=3000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(2, 9))) for _ in range(count)]
+
+def make_episode(rng, words, i):
+    def text(n):
+        return " ".join(rng.choice(words) for _ in range(n))
+    steps = [
+        {
+            "thought": text(25),
+            "action": rng.choice(TOOLS),
+            "action_input": {"query": text(6)},
+            "observation": text(150)
+        }
+        for _ in range(STEPS)
+    ]
+    return f"task {i}: {text(8)}", steps, f"answer {i}: {text(20)}"
+
+def file_size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+def old_retrieve(conn, query):
+    """The previous Episode.retrieve: substring scan, every matching episode's steps parsed."""
+    rows = conn.execute(
+        "SELECT task, steps, success, final_answer FROM episodes WHERE task LIKE ? ORDER BY timestamp DESC LIMIT ?",
+        (f"%{query}%", K)
+    ).fetchall()
+    return [{"task": r[0], "steps": json.loads(r[1]), "success": bool(r[2]), "final_answer": r[3]} for r in rows]
+
+async def timed(fn, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+    return (time.perf_counter() - start) / repeat * 1e3
+
+async def main():
+    rng = random.Random(0)
+    words = make_words(rng)
+    episodes = [make_episode(rng, words, i) for i in range(EPISODES)]
+    raw = sum(len(json.dumps(steps)) for _, steps, _ in episodes)
+    directory = tempfile.mkdtemp(prefix="nexus-episodes-")
+    try:
+        old_path = os.path.join(directory, "old.db")
+        with sqlite3.connect(old_path) as conn:
+            conn.execute("CREATE TABLE episodes (id INTEGER PRIMARY KEY AUTOINCREMENT, task TEXT, steps TEXT, "
+                         "success BOOLEAN, final_answer TEXT, duration REAL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+            conn.executemany(
+                "INSERT INTO episodes (task, steps, success, final_answer, duration) VALUES (?, ?, 1, ?, 1.0)",
+                ((task, json.dumps(steps), answer) for task, steps, answer in episodes)
+            )
+
+        new_path = os.path.join(directory, "new.db")
+        memory = Episode(new_path)
+        start = time.perf_counter()
+        for task, steps, answer in episodes:
+            await memory.store_episode(task, steps, True, answer, 1.0)
+        store_time = (time.perf_counter() - start) / EPISODES * 1e3
+
+        codec = "zstd" if ZSTD_AVAILABLE else "zlib"
+        print(f"{EPISODES} episodes x {STEPS} steps, {raw / EPISODES / 2**20:.2f} MB of step JSON each ({codec})")
+        print(f"  database size      inline JSON {file_size(old_path) / 2**20:7.1f} MB   "
+              f"compressed {file_size(new_path) / 2**20:7.1f} MB")
+        print(f"  store_episode      {store_time:.1f} ms/episode")
+
+        query = "task"  # matches every episode, like a broad recall
+        with sqlite3.connect(old_path) as conn:
+            before = await timed(lambda: old_retrieve(conn, query))
+        summaries = await timed(lambda: memory.retrieve(query, K))
+        with_steps = await timed(lambda: memory.retrieve(query, K, include_steps=True))
+        one = await timed(lambda: memory.get_steps(1))
+        print(f"  retrieve top {K}     before {before:7.1f} ms   summaries {summaries:6.2f} ms   "
+              f"with steps {with_steps:6.1f} ms")
+        print(f"  get_steps (one)    {one:.1f} ms")
+
+        start = time.perf_counter()
+        Episode(old_path)
+        print(f"  migrating the inline database: {time.perf_counter() - start:.1f}s")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    asyncio.run(main())
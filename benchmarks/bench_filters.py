@@ -0,0 +1,50 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.vector_store import VectorStoreMemory
+
+SIZE = 100_000
+DIM = 384
+QUERIES = 100
+K = 10
+SELECTIVITIES = (0.001, 0.01, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 0.9)
+
+async def measure(store, queries, filter):
+    start = time.perf_counter()
+    for query in queries:
+        await store.retrieve(query, k=K, filter=filter)
+    return (time.perf_counter() - start) / len(queries) * 1e3
+
+async def main():
+    rng = np.random.default_rng(0)
+    store = VectorStoreMemory(dim=DIM)
+    # bucket is uniform in [0, 1000), so {"$lt": s * 1000} matches a fraction s of the store
+    buckets = rng.integers(0, 1000, SIZE)
+    for i, vector in enumerate(rng.normal(size=(SIZE, DIM)).astype(np.float32)):
+        await store.store(str(i), vector, {"bucket": int(buckets[i]), "tenant": f"t{i % 100}"})
+    queries = rng.normal(size=(QUERIES, DIM)).astype(np.float32)
+
+    unfiltered = await measure(store, queries, None)
+    print(f"{SIZE} vectors x {DIM} dims, top-{K}; unfiltered {unfiltered:.2f} ms/query")
+    print(f"  {'selectivity':>11}  {'pre-filter':>10}  {'post-filter':>11}  {'auto':>8}")
+    for selectivity in SELECTIVITIES:
+        filter = {"bucket": {"$lt": int(selectivity * 1000)}}
+        timings = []
+        for ratio in (1.0, 0.0, 0.25):  # always pre, always post, default cost model
+            store.prefilter_ratio = ratio
+            timings.append(await measure(store, queries, filter))
+        print(f"  {selectivity:>11.3f}  {timings[0]:>8.2f}ms  {timings[1]:>9.2f}ms  {timings[2]:>6.2f}ms")
+
+    store.prefilter_ratio = 0.25
+    equality = await measure(store, queries, {"tenant": "t7"})
+    print(f"  equality on one of 100 tenants: {equality:.2f} ms/query")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.episodic import Episode
+from memory.long_term import LongTermMemory
+
+ROWS = 1_000_000
+K = 5
+VOCABULARY = 20_000
+
+def make_words(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(VOCABULARY)]
+
+def sentence(rng, words, length):
+    # Zipf-like: low word ids are common, high ones rare
+    return " ".join(words[min(int(rng.paretovariate(1.1)) - 1, VOCABULARY - 1)] for _ in range(length))
+
+def time_queries(fn, queries, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            fn(query)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e3
+
+async def time_retrieve(memory, queries, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            await memory.retrieve(query, K)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e3
+
+async def run(rng, words, path):
+    # Old-schema rows, bulk loaded; opening the memories below migrates them
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE episodes (id INTEGER PRIMARY KEY AUTOINCREMENT, task TEXT, steps TEXT, "
+                     "success BOOLEAN, final_answer TEXT, duration REAL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("CREATE TABLE facts (key TEXT PRIMARY KEY, value TEXT, metadata TEXT, "
+                     "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        conn.executemany(
+            "INSERT INTO episodes (task, steps, success, final_answer, duration) VALUES (?, '[]', 1, ?, 1.0)",
+            ((sentence(rng, words, 8), sentence(rng, words, 12)) for _ in range(ROWS))
+        )
+        conn.executemany(
+            "INSERT INTO facts (key, value, metadata) VALUES (?, ?, '{}')",
+            ((f"{sentence(rng, words, 3)} {i}", json.dumps(sentence(rng, words, 10))) for i in range(ROWS))
+        )
+
+    start = time.perf_counter()
+    episodes = Episode(path)
+    facts = LongTermMemory(path)
+    print(f"{ROWS} episodes + {ROWS} facts; FTS5 migration (index rebuild): {time.perf_counter() - start:.1f}s")
+
+    queries = {
+        "common word": [words[i] for i in range(3)],
+        "rare word": [words[i] for i in range(5000, 5005)],
+        "prefix": [words[i][:4] for i in range(100, 105)],
+        "two words": [f"{words[i]} {words[i + 2000]}" for i in range(10, 15)]
+    }
+    print(f"  {'query':<12} {'episodes LIKE':>14} {'episodes FTS':>13} {'facts LIKE':>11} {'facts FTS':>10}  (ms/query, top {K})")
+    for name, group in queries.items():
+        with sqlite3.connect(path) as conn:
+            episodes_like = time_queries(lambda q: conn.execute(
+                "SELECT task, steps, success, final_answer FROM episodes WHERE task LIKE ? ORDER BY timestamp DESC LIMIT ?",
+                (f"%{q}%", K)).fetchall(), group, repeat=1)
+            facts_like = time_queries(lambda q: conn.execute(
+                "SELECT key, value, metadata FROM facts WHERE key LIKE ? LIMIT ?",
+                (f"%{q}%", K)).fetchall(), group, repeat=1)
+        episodes_fts = await time_retrieve(episodes, group)
+        facts_fts = await time_retrieve(facts, group)
+        print(f"  {name:<12} {episodes_like:>14.1f} {episodes_fts:>13.1f} {facts_like:>11.1f} {facts_fts:>10.1f}")
+
+async def main():
+    rng = random.Random(0)
+    words = make_words(rng)
+    directory = tempfile.mkdtemp(prefix="nexus-fts-")
+    try:
+        await run(rng, words, os.path.join(directory, "memory.db"))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.client import RemoteMemoryManager
+from memory.manager import MemoryManager
+from memory.server import run_server
+
+VECTORS = 10000
+DIM = 384
+QUERIES = 2000
+MESSAGES = 5000
+IN_FLIGHT = 64
+
+async def measure(label: str, count: int, run) -> None:
+    start = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {count / elapsed:>9.0f} ops/s   {elapsed / count * 1e6:7.1f} us/op")
+
+async def pipelined(calls, limit: int = IN_FLIGHT):
+    """Keep `limit` calls in flight at a time."""
+    for start in range(0, len(calls), limit):
+        await asyncio.gather(*(call() for call in calls[start:start + limit]))
+
+async def workloads(memory, queries: np.ndarray, remote: bool) -> None:
+    store, short_term = memory.vector_store, memory.short_term
+    where = "remote" if remote else "in-process"
+    await measure(f"vector retrieve, {where}", QUERIES, lambda: sequential([lambda q=q: store.retrieve(q, 5) for q in queries]))
+    if remote:
+        await measure("vector retrieve, pipelined", QUERIES, lambda: pipelined([lambda q=q: store.retrieve(q, 5) for q in queries]))
+        await measure("vector retrieve, retrieve_many", QUERIES, lambda: batched(store, queries))
+    await measure(f"short-term store, {where}", MESSAGES, lambda: sequential(
+        [lambda i=i: short_term.store("user", f"message {i}") for i in range(MESSAGES)]
+    ))
+    if remote:
+        await measure("short-term store, pipelined", MESSAGES, lambda: pipelined(
+            [lambda i=i: short_term.store("user", f"message {i}") for i in range(MESSAGES)]
+        ))
+
+async def sequential(calls):
+    for call in calls:
+        await call()
+
+async def batched(store, queries: np.ndarray):
+    for start in range(0, len(queries), IN_FLIGHT):
+        await store.retrieve_many(queries[start:start + IN_FLIGHT], k=5)
+
+async def load(memory, vectors: np.ndarray) -> None:
+    for start in range(0, len(vectors), 500):
+        items = [(f"doc {i}", vectors[i]) for i in range(start, min(start + 500, len(vectors)))]
+        if hasattr(memory.vector_store, "store_many"):
+            await memory.vector_store.store_many(items)
+        else:
+            for content, vector in items:
+                await memory.vector_store.store(content, vector)
+
+async def main():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((VECTORS, DIM)).astype(np.float32)
+    queries = rng.standard_normal((QUERIES, DIM)).astype(np.float32)
+    directory = tempfile.mkdtemp(prefix="nexus-server-")
+    path = os.path.join(directory, "memory.sock")
+    server = multiprocessing.Process(target=run_server, args=(path,), kwargs={"db_path": os.path.join(directory, "server.db")})
+    server.start()
+    try:
+        print(f"{VECTORS} x {DIM} vectors, k=5; {IN_FLIGHT} calls in flight when pipelined")
+        local = MemoryManager(os.path.join(directory, "local.db"))
+        await load(local, vectors)
+        await workloads(local, queries, remote=False)
+
+        while not os.path.exists(path):
+            await asyncio.sleep(0.05)
+        remote = RemoteMemoryManager(path)
+        await load(remote, vectors)
+        await workloads(remote, queries, remote=True)
+        await remote.close()
+    finally:
+        server.terminate()
+        server.join()
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import json
+import os
+import re
+import sys
+import timeit
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from llm.parser import ResponseParser
+from llm.streaming_parser import StreamingReactParser
+
+class LegacyResponseParser:
+    """The previous regex-on-full-text implementation, kept as the baseline."""
+
+    def parse_react_response(self, text: str):
+        thought_match = re.search(r"Thought:\s*(.*?)(?:\nAction:|\nFinal Answer:|$)", text, re.DOTALL)
+        action_match = re.search(r"Action:\s*(.*)", text)
+        action_input_match = re.search(r"Action Input:\s*(.*)", text)
+        final_answer_match = re.search(r"Final Answer:\s*(.*)", text, re.DOTALL)
+        action_input = None
+        if action_input_match:
+            try:
+                action_input = json.loads(action_input_match.group(1).strip())
+            except:
+                json_match = re.search(r"\{.*\}", action_input_match.group(1).strip())
+                if json_match:
+                    try:
+                        action_input = json.loads(json_match.group(0))
+                    except:
+                        pass
+        return (
+            thought_match.group(1).strip() if thought_match else "",
+            action_match.group(1).strip() if action_match else None,
+            action_input,
+            final_answer_match.group(1).strip() if final_answer_match else None
+        )
+
+    def extract_json(self, text: str):
+        try:
+            return json.loads(text)
+        except:
+            json_match = re.search(r"(\{.*\})", text, re.DOTALL)
+            if json_match:
+                try:
+                    return json.loads(json_match.group(1))
+                except:
+                    pass
+        return {}
+
+def make_react_response(kb: int) -> str:
+    sentence = "I should look at the results carefully and consider {edge} cases before acting. "
+    thought = (sentence * (kb * 1024 // len(sentence) + 1))[:kb * 1024]
+    payload = {"query": "agent frameworks", "filters": [{"k": i, "v": {"nested": [i, {"x": "}{"}]}} for i in range(kb * 8)]}
+    return f"Thought: {thought}\nAction: search\nAction Input: {json.dumps(payload)}"
+
+def make_brace_heavy_text(kb: int) -> str:
+    # Prose full of unmatched braces around one valid plan: worst case for `\{.*\}` DOTALL
+    noise = "if (x) { y = f({a}); } else { z = {b: {c}; " * (kb * 1024 // 44)
+    return f"Here is my reasoning: {noise}\nPlan: {json.dumps({'steps': [{'id': 1, 'task': 'go'}]})}\nThanks {{"
+
+def bench(label: str, func, number: int) -> float:
+    seconds = timeit.timeit(func, number=number) / number
+    print(f"  {label:<28} {seconds * 1e6:>10.1f} us")
+    return seconds
+
+def main():
+    legacy = LegacyResponseParser()
+    parser = ResponseParser()
+
+    for kb in (1, 8, 64):
+        text = make_react_response(kb)
+        number = max(5, 2000 // kb)
+        print(f"\nReAct response, {len(text) / 1024:.0f} KB")
+        old = bench("legacy regex", lambda: legacy.parse_react_response(text), number)
+        new = bench("single-pass parser", lambda: parser.parse_react_response(text), number)
+
+        def streamed():
+            stream = StreamingReactParser()
+            for i in range(0, len(text), 64):
+                stream.feed(text[i:i + 64])
+            stream.close()
+        bench("streamed (64-char chunks)", streamed, number)
+        print(f"  speedup: {old / new:.1f}x")
+
+    for kb in (1, 8, 32):
+        text = make_brace_heavy_text(kb)
+        number = max(3, 200 // kb)
+        print(f"\nextract_json on brace-heavy text, {len(text) / 1024:.0f} KB")
+        old = bench("legacy greedy regex", lambda: legacy.extract_json(text), number)
+        new = bench("in-place JSON decode", lambda: parser.extract_json(text), number)
+        print(f"  speedup: {old / new:.1f}x (legacy found plan: {bool(legacy.extract_json(text))}, "
+              f"new parser found plan: {bool(parser.extract_json(text))})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.quantization import ProductQuantizer, ScalarQuantizer
+from memory.vector_store import VectorStoreMemory
+
+SIZE = 30_000
+DIM = 1536
+QUERIES = 50
+K = 10
+
+def make_data(rng):
+    # Clustered like real embeddings: topic centers plus per-document noise
+    topics = rng.normal(size=(300, DIM))
+    data = topics[rng.integers(0, len(topics), SIZE)] + 1.5 * rng.normal(size=(SIZE, DIM))
+    queries = topics[rng.integers(0, len(topics), QUERIES)] + 1.5 * rng.normal(size=(QUERIES, DIM))
+    return data.astype(np.float32), queries.astype(np.float32)
+
+async def evaluate(label, store, data, queries, truth=None):
+    start = time.perf_counter()
+    for i, vector in enumerate(data):
+        await store.store(str(i), vector, {"i": i})
+    # Training runs in a worker thread once train_size vectors are in; wait for the codes
+    await store.quantize()
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = [[r["metadata"]["i"] for r in await store.retrieve(q, k=K)] for q in queries]
+    qps = len(queries) / (time.perf_counter() - start)
+
+    recall = 1.0 if truth is None else np.mean([len(set(a) & set(b)) / K for a, b in zip(found, truth)])
+    stats = store.get_stats()
+    print(f"  {label:<26} {stats['bytes_per_vector']:>6} B/vector  {stats['vector_bytes'] / 2**20:>7.1f} MB  "
+          f"recall@{K} {recall:.3f}  {qps:>7.1f} QPS  build {build:.1f}s")
+    return found
+
+async def main():
+    rng = np.random.default_rng(0)
+    data, queries = make_data(rng)
+    print(f"{SIZE} vectors x {DIM} dims, {QUERIES} queries")
+
+    truth = await evaluate("float32 (exact)", VectorStoreMemory(dim=DIM), data, queries)
+    await evaluate("int8 scalar", VectorStoreMemory(dim=DIM, quantizer=ScalarQuantizer()), data, queries, truth)
+    await evaluate("int8 scalar + rerank 50", VectorStoreMemory(dim=DIM, quantizer=ScalarQuantizer(), rerank=50), data, queries, truth)
+    await evaluate("PQ m=96", VectorStoreMemory(dim=DIM, quantizer=ProductQuantizer(m=96)), data, queries, truth)
+    await evaluate("PQ m=96 + rerank 100", VectorStoreMemory(dim=DIM, quantizer=ProductQuantizer(m=96), rerank=100), data, queries, truth)
+    await evaluate("PQ m=192 + rerank 100", VectorStoreMemory(dim=DIM, quantizer=ProductQuantizer(m=192), rerank=100), data, queries, truth)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.agent import Agent
+from core.replay import TrajectoryReplayCache
+from llm.provider import LLMProvider, LLMResponse
+from memory.manager import MemoryManager
+from tools.base import Tool
+
+RUNS = 300
+DISTINCT_TASKS = 20
+STEPS_PER_TASK = 3
+LLM_LATENCY = 0.02
+DRIFT = 0.05  # share of tool calls whose result changed since the episode was recorded
+
+class ScriptedLLM(LLMProvider):
+    """Looks up `STEPS_PER_TASK` records one after another, then answers; every call costs LLM_LATENCY."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, messages, tools=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(LLM_LATENCY)
+        prompt = messages[-1].content
+        record = re.search(r"Task: Look up record (\d+)", prompt).group(1)
+        done = len(re.findall(r"Observation: value", prompt))
+        if done == STEPS_PER_TASK:
+            return LLMResponse(content=f"Thought: I have everything.\nFinal Answer: record {record} checked")
+        return LLMResponse(
+            content=f'Thought: next field.\nAction: lookup\nAction Input: {{"record": {record}, "field": {done}}}'
+        )
+
+    async def stream_generate(self, messages, **kwargs):
+        yield ""
+
+    def supports_tool_calling(self):
+        return False
+
+class LookupTool(Tool):
+    name: str = "lookup"
+    description: str = "Read one field of a record"
+    parameters: dict = {"type": "object", "properties": {"record": {"type": "integer"}, "field": {"type": "integer"}}}
+    drift: float = 0.0
+
+    async def _run(self, record, field):
+        changed = random.random() < self.drift
+        return f"value {record}.{field}" + (" (updated)" if changed else "")
+
+async def run(label: str, directory: str, use_cache: bool):
+    random.seed(0)
+    llm, tool = ScriptedLLM(), LookupTool()
+    memory = MemoryManager(os.path.join(directory, f"{label}.db"))
+    cache = TrajectoryReplayCache(memory.episodic) if use_cache else None
+    agent = Agent(llm=llm, tools=[tool], memory=memory, enable_tracing=False, replay_cache=cache)
+    tasks = [f"Look up record {random.randrange(DISTINCT_TASKS)}" for _ in range(RUNS)]
+    # Drift only applies once the first recordings exist
+    start = time.perf_counter()
+    for i, task in enumerate(tasks):
+        tool.drift = DRIFT if i >= DISTINCT_TASKS else 0.0
+        result = await agent.run(task)
+        assert "output" in result, result
+    elapsed = time.perf_counter() - start
+    line = f"  {label:<14} {llm.calls:5d} LLM calls   {elapsed / RUNS * 1e3:6.1f} ms/task"
+    if cache:
+        stats = cache.get_stats()
+        line += (f"   hit rate {stats['hit_rate']:.0%}, {stats['llm_calls_avoided']} calls avoided, "
+                 f"{stats['fell_back']} replays fell back to the LLM")
+    print(line)
+
+async def main():
+    directory = tempfile.mkdtemp(prefix="nexus-replay-")
+    try:
+        print(f"{RUNS} runs over {DISTINCT_TASKS} distinct tasks, {STEPS_PER_TASK} tool calls each, "
+              f"{LLM_LATENCY * 1e3:.0f} ms per LLM call, {DRIFT:.0%} tool drift")
+        await run("no replay", directory, use_cache=False)
+        await run("replay cache", directory, use_cache=True)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    asyncio.run(main())
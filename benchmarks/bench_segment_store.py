@@ -0,0 +1,67 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from memory.segment_store import SegmentVectorStore
+
+SIZE = 200_000
+DIM = 384
+
+# Runs in a fresh interpreter, like a worker starting up
+OPEN_SCRIPT = """
+import asyncio, sys, time
+import numpy as np
+sys.path.append({root!r})
+from memory.segment_store import SegmentVectorStore
+start = time.perf_counter()
+store = SegmentVectorStore({path!r}, read_only=True)
+opened = time.perf_counter() - start
+query = np.random.default_rng(1).normal(size={dim}).astype(np.float32)
+start = time.perf_counter()
+asyncio.run(store.retrieve(query, k=10))
+first = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(10):
+    asyncio.run(store.retrieve(query, k=10))
+print(opened, first, (time.perf_counter() - start) / 10, len(store))
+"""
+
+async def main():
+    path = tempfile.mkdtemp(prefix="nexus-vectors-")
+    try:
+        rng = np.random.default_rng(0)
+        store = SegmentVectorStore(path, dim=DIM, segment_size=32768, max_segments=4)
+        start = time.perf_counter()
+        for i in range(0, SIZE, 10_000):
+            for vector in rng.normal(size=(10_000, DIM)).astype(np.float32):
+                await store.store(f"memory {i}", vector, {"source": "bench"})
+        build = time.perf_counter() - start
+        store.close()
+        stats = store.get_stats()
+        print(f"{SIZE} vectors x {DIM} dims: {stats['bytes'] / 2**20:.0f} MB on disk, "
+              f"{stats['segments']} segments after {stats['merges']:.0f} background merges")
+        print(f"  append                {build / SIZE * 1e6:>8.1f} us/vector")
+
+        output = subprocess.run(
+            [sys.executable, "-c", OPEN_SCRIPT.format(root=ROOT, path=path, dim=DIM)],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        opened, first, warm, rows = float(output[0]), float(output[1]), float(output[2]), output[3]
+        print(f"  open in new process   {opened * 1e3:>8.2f} ms ({rows} rows, nothing read yet)")
+        print(f"  first query           {first * 1e3:>8.2f} ms (pages faulted in from the OS cache)")
+        print(f"  warm query            {warm * 1e3:>8.2f} ms")
+    finally:
+        shutil.rmtree(path)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+import time
+from collections import deque
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from llm.provider import Message
+from llm.tokenizer import get_token_counter
+from memory.short_term import ShortTermMemory
+
+TURNS = 20000
+
+class MessageCountMemory:
+    """The previous window: a deque bounded by message count, recounted and re-serialized on every read."""
+
+    def __init__(self, max_messages: int = 50):
+        self.messages = deque(maxlen=max_messages)
+        self.token_counter = get_token_counter()
+
+    async def add_message(self, content, role="user", metadata=None):
+        self.messages.append(Message(role=role, content=content))
+
+    async def get_all(self):
+        return [m.model_dump() for m in list(self.messages)]
+
+    def token_count(self):
+        return self.token_counter.count_messages(self.messages)
+
+async def run(memory, label: str):
+    """An agent loop: each turn adds a message, then assembles the context and checks its size."""
+    # Fresh counter cache per run, so neither side benefits from the other's counts
+    memory.token_counter._cache.clear()
+    largest = 0
+    start = time.perf_counter()
+    await memory.add_message("You are a helpful agent. " * 40, role="system")
+    for i in range(TURNS):
+        await memory.add_message(f"step {i}: observation " + "data " * (i % 97), role="user" if i % 2 else "assistant")
+        context = await memory.get_all()
+        largest = max(largest, memory.token_count())
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed / TURNS * 1e6:7.1f} us/turn   context {len(context):3d} messages, "
+          f"largest {largest} tokens, system prompt kept: {context[0]['role'] == 'system'}")
+
+async def main():
+    print(f"{TURNS} turns, context assembled after each (budget 4000 tokens)")
+    await run(MessageCountMemory(), "message-count deque")
+    await run(ShortTermMemory(max_tokens=4000), "token window")
+
+if __name__ == "__main__":
+    asyncio.run(main())
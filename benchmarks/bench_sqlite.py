@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.long_term import LongTermMemory
+
+WRITES = 2000
+READS = 2000
+
+class ConnectPerCallMemory:
+    """The previous access pattern: a new connection per call, rollback journal, on the event loop."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS facts (key TEXT PRIMARY KEY, value TEXT, metadata TEXT)")
+
+    async def store(self, key, value, metadata=None):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO facts (key, value, metadata) VALUES (?, ?, ?)",
+                (key, json.dumps(value), json.dumps(metadata or {}))
+            )
+
+    async def retrieve(self, query, k=5):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT key, value FROM facts WHERE key = ?", (query,)).fetchall()
+
+class SharedLayerMemory(LongTermMemory):
+    """LongTermMemory with the same key lookup as above, so only the access layer differs."""
+
+    async def retrieve(self, query, k=5):
+        return await self.db.fetchall("SELECT key, value FROM facts WHERE key = ?", (query,))
+
+async def ticker(stop: asyncio.Event, gaps: list):
+    """Measures how long the event loop goes without getting to run a 1 ms timer."""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+async def run(memory, label: str):
+    stop, gaps = asyncio.Event(), []
+    tick = asyncio.create_task(ticker(stop, gaps))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(memory.store(f"key{i}", f"value {i}") for i in range(WRITES)))
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(memory.retrieve(f"key{i}") for i in range(READS)))
+    read_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(memory.store(f"mixed{i}", i) for i in range(WRITES // 2)),
+        *(memory.retrieve(f"key{i}") for i in range(READS // 2))
+    )
+    mixed_time = time.perf_counter() - start
+
+    stop.set()
+    await tick
+    print(f"  {label:<18} {WRITES / write_time:>9.0f} writes/s {READS / read_time:>9.0f} reads/s "
+          f"{(WRITES + READS) / 2 / mixed_time:>9.0f} mixed ops/s   loop stalled up to {max(gaps) * 1e3:6.1f} ms")
+
+async def main():
+    directory = tempfile.mkdtemp(prefix="nexus-sqlite-")
+    try:
+        print(f"{WRITES} concurrent fact writes, {READS} concurrent reads, then both at once")
+        await run(ConnectPerCallMemory(os.path.join(directory, "old.db")), "connect per call")
+        memory = SharedLayerMemory(os.path.join(directory, "new.db"))
+        await run(memory, "shared WAL layer")
+        stats = memory.db.get_stats()
+        print(f"  group commit: {stats['writes']} writes in {stats['commits']} commits "
+              f"(avg {stats['avg_group']:.1f}, largest {stats['largest_group']})")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import asyncio
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from memory.vector_store import VectorStoreMemory
+
+DIM = 256
+
+def legacy_retrieve(vectors, query, k):
+    """The previous pure-Python scan: re-normalize everything, build dicts, full sort."""
+    def cosine(v1, v2):
+        dot = sum(a * b for a, b in zip(v1, v2))
+        m1 = math.sqrt(sum(a * a for a in v1))
+        m2 = math.sqrt(sum(b * b for b in v2))
+        return dot / (m1 * m2) if m1 and m2 else 0.0
+    scored = [{**v, "similarity": cosine(query, v["embedding"])} for v in vectors]
+    scored.sort(key=lambda x: x["similarity"], reverse=True)
+    return scored[:k]
+
+async def main():
+    rng = np.random.default_rng(0)
+    for size in (2_000, 20_000, 200_000):
+        data = rng.normal(size=(size, DIM)).astype(np.float32)
+        queries = rng.normal(size=(20, DIM)).astype(np.float32)
+
+        store = VectorStoreMemory(dim=DIM)
+        start = time.perf_counter()
+        for i, vector in enumerate(data):
+            await store.store(f"memory {i}", vector)
+        insert = (time.perf_counter() - start) / size
+
+        start = time.perf_counter()
+        for query in queries:
+            await store.retrieve(query, k=10)
+        new = (time.perf_counter() - start) / len(queries)
+
+        print(f"\n{size} vectors x {DIM} dims")
+        print(f"  insert (amortized)        {insert * 1e6:>10.1f} us")
+        print(f"  retrieve k=10 (numpy)     {new * 1e3:>10.2f} ms")
+
+        if size <= 20_000:
+            legacy_vectors = [{"content": f"memory {i}", "embedding": v.tolist(), "metadata": {}} for i, v in enumerate(data)]
+            start = time.perf_counter()
+            legacy_retrieve(legacy_vectors, queries[0].tolist(), 10)
+            old = time.perf_counter() - start
+            print(f"  retrieve k=10 (legacy)    {old * 1e3:>10.2f} ms")
+            print(f"  speedup: {old / new:.0f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,6 +2,7 @@ import json
 import time
 from typing import List, Dict, Any, Optional, Callable
 from llm.provider import LLMProvider, Message
+from llm.concurrency import AdaptiveConcurrencyLimiter
 from tools.base import Tool
 from tools.executor import ToolExecutor
 from memory.short_term import ShortTermMemory
@@ -9,7 +10,10 @@ from state.manager import StateManager, TaskStatus
 from memory.manager import MemoryManager
 
 from core.executor import AgentExecutor
+from core.replay import TrajectoryReplayCache
 from core.observability import ExecutionTracer
+from observability.metrics import MetricsCollector
+from observability.usage import UsageLedger
 
 class Agent:
     def __init__(
@@ -17,14 +21,21 @@ class Agent:
         llm: LLMProvider,
         tools: List[Tool],
         memory: Optional[MemoryManager] = None,
-        enable_tracing: bool = True
+        enable_tracing: bool = True,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        metrics: Optional[MetricsCollector] = None,
+        role_llms: Optional[Dict[str, LLMProvider]] = None,
+        replay_cache: Optional[TrajectoryReplayCache] = None
     ):
         self.llm = llm
         self.tools = tools
-        self.executor = AgentExecutor(llm, tools)
+        self.executor = AgentExecutor(
+            llm, tools, concurrency_limiter=concurrency_limiter, role_llms=role_llms, replay_cache=replay_cache
+        )
         self.memory = memory or MemoryManager()
         self.state_manager: Optional[StateManager] = None
         self.tracer = ExecutionTracer() if enable_tracing else None
+        self.metrics = metrics
         
     async def run(
         self,
@@ -45,11 +56,13 @@ class Agent:
             self.tracer.start_trace(task)
             
         start_time = time.time()
+        ledger = kwargs.pop("ledger", None) or UsageLedger()
         if pattern == "react":
             result = await self.executor.execute_react_loop(
                 task, 
                 self.state_manager, 
                 approval_callback=approval_callback,
+                ledger=ledger,
                 **kwargs
             )
         else:
@@ -60,16 +73,32 @@ class Agent:
         if self.tracer:
             self.tracer.end_trace(result)
             
+        if self.metrics:
+            for entry in ledger.entries:
+                self.metrics.record_llm_usage(
+                    entry["call_site"], entry["model"], entry["prompt_tokens"], entry["completion_tokens"], entry["cost"]
+                )
+            self.metrics.record_task_completion(
+                success="output" in result,
+                total_duration=duration,
+                iterations=ledger.calls("react_step"),
+                total_cost=ledger.total_cost
+            )
+            
         if "output" in result:
             await self.memory.remember(result["output"], role="assistant")
-            # Store episode
-            await self.memory.add_episode(
-                task=task,
-                steps=self.state_manager.get_state().history,
-                success=self.state_manager.get_state().status == TaskStatus.COMPLETED,
-                final_answer=result.get("output", ""),
-                duration=duration
-            )
+            # A fully replayed run adds nothing the replayed episode does not already record
+            if not result.get("replay", {}).get("completed"):
+                success = self.state_manager.get_state().status == TaskStatus.COMPLETED
+                episode_id = await self.memory.add_episode(
+                    task=task,
+                    steps=self.state_manager.get_state().history,
+                    success=success,
+                    final_answer=result.get("output", ""),
+                    duration=duration
+                )
+                if success and self.executor.replay_cache:
+                    await self.executor.replay_cache.add(episode_id, task, result["output"])
             
         return {
             **result,
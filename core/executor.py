@@ -1,64 +1,214 @@
 import time
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from llm.provider import LLMProvider, Message
+from llm.concurrency import AdaptiveConcurrencyLimiter, ConcurrencyLimitedProvider
+from llm.cascade import CascadeProvider
+from llm.router import RoutingProvider
 from llm.prompt_builder import PromptBuilder
 from llm.parser import ResponseParser, ReactOutput
 from tools.base import Tool, ToolResult
 from tools.executor import ToolExecutor
-from core.robustness import ErrorHandler
+from core.robustness import ErrorHandler, CircuitBreaker, endpoint_circuit_breaker
 from state.manager import StateManager, TaskStatus
+from observability.usage import UsageLedger
 
 from core.reflector import Reflector
 from core.planner import TaskPlanner, Plan
+from core.replay import TrajectoryReplayCache, Trajectory
 
 class AgentExecutor:
     """
     Implements the core agent loop (Observe → Think → Act).
     Supports ReAct, Planning, and Adaptive execution.
+    With a `replay_cache`, a ReAct run first replays a matching successful
+    episode and only calls the LLM once observations diverge from it.
     """
     
-    def __init__(self, llm: LLMProvider, tools: List[Tool]):
-        self.llm = llm
+    ROLES = ("react", "plan", "replan", "critique", "summarization")
+    # A summary gets at most a quarter of the free prompt budget, and never more than this
+    SUMMARY_MAX_TOKENS = 256
+    
+    def __init__(
+        self,
+        llm: LLMProvider,
+        tools: List[Tool],
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        role_llms: Optional[Dict[str, LLMProvider]] = None,
+        replay_cache: Optional[TrajectoryReplayCache] = None
+    ):
+        role_llms = role_llms or {}
+        unknown = set(role_llms) - set(self.ROLES)
+        if unknown:
+            raise ValueError(f"Unknown LLM roles: {sorted(unknown)}. Expected: {list(self.ROLES)}")
+        self.role_llms = role_llms
+        # Roles without an assignment use the main LLM; summarization is opt-in
+        llms = {role: role_llms.get(role, llm) for role in self.ROLES if role != "summarization"}
+        if "summarization" in role_llms:
+            llms["summarization"] = role_llms["summarization"]
+        if concurrency_limiter:
+            # ReAct steps, plans and critiques all share the same in-flight limit
+            wrapped: Dict[int, LLMProvider] = {}
+            for role, provider in llms.items():
+                if id(provider) not in wrapped:
+                    wrapped[id(provider)] = ConcurrencyLimitedProvider(provider, concurrency_limiter)
+                llms[role] = wrapped[id(provider)]
+        self.llms = llms
+        self.llm = llms["react"]
+        # One breaker per endpoint and model, shared by every agent calling it. Cascades
+        # and routers call several; each of their members keeps its own breaker instead
+        if circuit_breaker is None and not isinstance(getattr(self.llm, "llm", self.llm), (CascadeProvider, RoutingProvider)):
+            circuit_breaker = endpoint_circuit_breaker(self.llm)
+        self.circuit_breaker = circuit_breaker
         self.tools = {t.name: t for t in tools}
         self.tool_executor = ToolExecutor()
         self.prompt_builder = PromptBuilder()
         self.parser = ResponseParser()
-        self.reflector = Reflector(llm)
-        self.planner = TaskPlanner(llm)
+        self.reflector = Reflector(llms["critique"])
+        self.planner = TaskPlanner(llms["plan"], replan_llm=llms["replan"])
+        self.replay_cache = replay_cache
+        
+    def get_role_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Escalation and latency stats for every role assigned a cascading provider."""
+        return {
+            role: provider.get_stats()
+            for role, provider in self.role_llms.items()
+            if isinstance(provider, CascadeProvider)
+        }
+        
+    async def _summarize_scratchpad(
+        self,
+        task: str,
+        scratchpad: str,
+        max_prompt_tokens: int,
+        ledger: UsageLedger
+    ) -> str:
+        """
+        Once the scratchpad no longer fits the prompt, replace its oldest steps
+        with a summary from the summarization model. The most recent steps keep
+        half the free budget, so the next few steps fit without summarizing again.
+        """
+        base_prompt = self.prompt_builder.build_react_prompt(task, list(self.tools.values()))
+        overflow, _ = self.prompt_builder.split_scratchpad(base_prompt, scratchpad, max_prompt_tokens)
+        if not overflow:
+            return scratchpad
+        free = max_prompt_tokens - self.prompt_builder.count_tokens(base_prompt)
+        dropped, kept = self.prompt_builder.split_scratchpad(base_prompt, scratchpad, max_prompt_tokens - free // 2)
         
+        llm = self.llms["summarization"]
+        prompt = (
+            f"Task: {task}\n\nSummarize these earlier agent steps in a few sentences. "
+            f"Keep every fact and tool result needed to finish the task.\n\n" + "\n".join(dropped)
+        )
+        success, response = await ErrorHandler.retry_with_backoff(
+            llm.generate, 2, messages=[Message(role="user", content=prompt)], max_tokens=max(min(free // 4, self.SUMMARY_MAX_TOKENS), 1)
+        )
+        if not success:
+            # Plain truncation still applies when the prompt is built
+            return scratchpad
+        ledger.record("summarization", response, model=getattr(llm, "model", None))
+        return "\n".join([f"Summary of earlier steps: {response.content.strip()}"] + kept)
+        
+    async def _replay(
+        self,
+        trajectory: Trajectory,
+        state_manager: StateManager,
+        max_steps: int
+    ) -> Tuple[str, Optional[str], int]:
+        """
+        Take the recorded tool calls, at most `max_steps`, for as long as their observations match the recording.
+        Returns (scratchpad, the final answer if the whole episode replayed, steps replayed).
+        """
+        scratchpad = ""
+        replayed = 0
+        answer = None
+        for step in trajectory.steps[:max_steps]:
+            tool = self.tools.get(step.tool)
+            # Tools needing approval never run on a recording's say-so
+            if tool is None or tool.requires_approval:
+                break
+            if step.thought:
+                state_manager.add_history("thought", step.thought)
+            state_manager.add_history("action", {"tool": step.tool, "input": step.input, "replayed": True})
+            tool_result = await self.tool_executor.execute(tool, step.input)
+            observation = str(tool_result.output) if tool_result.success else f"Error: {tool_result.error}"
+            state_manager.add_history("observation", observation)
+            thought = f"\nThought: {step.thought}" if step.thought is not None else ""
+            scratchpad += f"{thought}\nAction: {step.tool}\nAction Input: {step.input}\nObservation: {observation}\n"
+            replayed += 1
+            if not self.replay_cache.validator(step.observation, observation):
+                state_manager.add_history("system", f"Replay of episode {trajectory.episode_id} diverged at step {replayed}")
+                break
+        else:
+            if trajectory.match == "exact" and len(trajectory.steps) <= max_steps:
+                answer = trajectory.final_answer
+        self.replay_cache.record(replayed, answer is not None)
+        return scratchpad, answer, replayed
+
     async def execute_react_loop(
         self,
         task: str,
         state_manager: StateManager,
         max_iterations: int = 10,
         use_planning: bool = False,
-        approval_callback: Optional[Callable[[str, Dict], bool]] = None
+        approval_callback: Optional[Callable[[str, Dict], bool]] = None,
+        max_prompt_tokens: Optional[int] = None,
+        ledger: Optional[UsageLedger] = None
     ) -> Dict[str, Any]:
         """
         Main loop implementation with optional adaptive planning.
+        Token usage and cost of every LLM call are returned under "usage";
+        runs that replayed a past episode report it under "replay".
         """
+        ledger = ledger or UsageLedger()
+        model = getattr(self.llm, "model", None)
         scratchpad = ""
         current_plan: Optional[Plan] = None
+        replay: Dict[str, Any] = {}
+        replayed = 0
+        
+        trajectory = await self.replay_cache.lookup(task) if self.replay_cache and not use_planning else None
+        if trajectory:
+            scratchpad, answer, replayed = await self._replay(trajectory, state_manager, max_iterations)
+            replay = {
+                "episode_id": trajectory.episode_id,
+                "match": trajectory.match,
+                "replayed_steps": replayed,
+                "completed": answer is not None
+            }
+            if answer is not None:
+                state_manager.add_history("thought", f"Replayed episode {trajectory.episode_id}")
+                state_manager.update_status(TaskStatus.COMPLETED)
+                return {"output": answer, "usage": ledger.summary(), "replay": replay}
         
         if use_planning:
             state_manager.add_history("system", "Creating initial plan...")
-            current_plan = await self.planner.create_plan(task)
+            current_plan = await self.planner.create_plan(task, ledger=ledger)
             state_manager.add_history("plan", current_plan.model_dump())
             scratchpad += f"\nCurrent Plan:\n" + "\n".join([f"- {s.task}" for s in current_plan.steps]) + "\n"
         
-        for i in range(max_iterations):
+        # Replayed steps count against the iteration budget
+        for i in range(max_iterations - replayed):
+            if max_prompt_tokens and "summarization" in self.llms:
+                scratchpad = await self._summarize_scratchpad(task, scratchpad, max_prompt_tokens, ledger)
+                
             # Build prompt
-            prompt = self.prompt_builder.build_react_prompt(task, list(self.tools.values()), scratchpad)
+            prompt = self.prompt_builder.build_react_prompt(
+                task, list(self.tools.values()), scratchpad, max_prompt_tokens=max_prompt_tokens
+            )
             
             # GENERATE WITH RETRY
             success, response = await ErrorHandler.retry_with_backoff(
                 self.llm.generate,
+                circuit_breaker=self.circuit_breaker,
                 messages=[Message(role="user", content=prompt)]
             )
             
             if not success:
                  state_manager.update_status(TaskStatus.FAILED)
-                 return {"error": f"LLM Generation failed: {response}"}
+                 return {"error": f"LLM Generation failed: {response}", "usage": ledger.summary()}
+            
+            ledger.record("react_step", response, model=model)
             
             # PARSE
             parsed: ReactOutput = self.parser.parse_react_response(response.content)
@@ -68,7 +218,7 @@ class AgentExecutor:
             
             # REFLECTION & ADAPTIVE REPLANNING
             if i > 0 and i % 3 == 0:
-                critique = await self.reflector.critique(task, state_manager.get_state().history)
+                critique = await self.reflector.critique(task, state_manager.get_state().history, ledger=ledger)
                 state_manager.add_history("reflection", critique)
                 
                 reflection_msg = f"Reflection: {critique.get('critique')} Suggestion: {critique.get('suggestion')}"
@@ -77,13 +227,16 @@ class AgentExecutor:
                 # Trigger replan if not progressing
                 if use_planning and not critique.get("is_progressing", True):
                     state_manager.add_history("system", "Progress stalled. Replanning...")
-                    current_plan = await self.planner.replan(current_plan, "Stalled progress", critique.get("suggestion"))
+                    current_plan = await self.planner.replan(
+                        current_plan, "Stalled progress", critique.get("suggestion"), ledger=ledger
+                    )
                     state_manager.add_history("plan_update", current_plan.model_dump())
                     scratchpad += f"\nUpdated Plan:\n" + "\n".join([f"- {s.task}" for s in current_plan.steps]) + "\n"
                 
             if parsed.is_complete:
                 state_manager.update_status(TaskStatus.COMPLETED)
-                return {"output": parsed.final_answer}
+                result = {"output": parsed.final_answer, "usage": ledger.summary()}
+                return {**result, "replay": replay} if replay else result
             
             if parsed.action:
                 # ACT
@@ -121,4 +274,4 @@ class AgentExecutor:
                 scratchpad += f"\nThought: {parsed.thought}\nWait, I need to provide an Action or Final Answer."
 
         state_manager.update_status(TaskStatus.FAILED)
-        return {"error": "Max iterations reached"}
+        return {"error": "Max iterations reached", "usage": ledger.summary()}
@@ -0,0 +1,239 @@
+import asyncio
+import math
+import random
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional
+from pydantic import PrivateAttr
+from llm.provider import LLMProvider, Message, LLMResponse
+from tools.base import Tool, ToolResult
+
+class LatencyDistribution(ABC):
+    """
+    Injected delay in seconds, sampled from a seeded random.Random.
+    """
+
+    @abstractmethod
+    def sample(self, rng: random.Random) -> float:
+        """Draw one delay in seconds."""
+        pass
+
+class ConstantLatency(LatencyDistribution):
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def sample(self, rng: random.Random) -> float:
+        return self.seconds
+
+class UniformLatency(LatencyDistribution):
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.uniform(self.low, self.high)
+
+class LogNormalLatency(LatencyDistribution):
+    """Typical service latency: `median` seconds, right-skewed by `sigma`."""
+
+    def __init__(self, median: float, sigma: float = 0.5, cap: Optional[float] = None):
+        self.median = median
+        self.sigma = sigma
+        self.cap = cap
+
+    def sample(self, rng: random.Random) -> float:
+        value = rng.lognormvariate(math.log(self.median), self.sigma)
+        return min(value, self.cap) if self.cap else value
+
+class ParetoLatency(LatencyDistribution):
+    """
+    Heavy tail: at least `minimum` seconds, and a small fraction of calls take
+    many times longer. Lower `alpha` means a heavier tail.
+    """
+
+    def __init__(self, minimum: float, alpha: float = 1.5, cap: Optional[float] = None):
+        self.minimum = minimum
+        self.alpha = alpha
+        self.cap = cap
+
+    def sample(self, rng: random.Random) -> float:
+        value = self.minimum * rng.paretovariate(self.alpha)
+        return min(value, self.cap) if self.cap else value
+
+class InjectedFault(Exception):
+    """A failure produced by fault injection."""
+    pass
+
+class _FakeResponse:
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+class InjectedRateLimitError(InjectedFault):
+    """An injected HTTP 429 that carries Retry-After like a provider error."""
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Injected rate limit: HTTP 429 Too Many Requests (retry after {retry_after}s)")
+        self.retry_after = retry_after
+        self.response = _FakeResponse({"retry-after": str(retry_after)})
+
+class FaultInjector:
+    """
+    Seeded fault schedule shared by the fault-injecting wrappers.
+    Every call draws its faults independently at the configured rates, so the
+    same seed replays the same sequence of latencies, errors and corruptions.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyDistribution] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        truncate_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.truncate_rate = truncate_rate
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, float] = {
+            "calls": 0,
+            "injected_latency": 0.0,
+            "errors": 0,
+            "rate_limits": 0,
+            "truncations": 0,
+            "malformed": 0
+        }
+
+    def _roll(self, rate: float) -> bool:
+        return rate > 0 and self.rng.random() < rate
+
+    async def before_call(self) -> None:
+        """Sleep for the sampled latency, then maybe raise an error or a 429."""
+        self.stats["calls"] += 1
+        if self.latency:
+            delay = self.latency.sample(self.rng)
+            self.stats["injected_latency"] += delay
+            await asyncio.sleep(delay)
+        if self._roll(self.rate_limit_rate):
+            self.stats["rate_limits"] += 1
+            raise InjectedRateLimitError(self.retry_after)
+        if self._roll(self.error_rate):
+            self.stats["errors"] += 1
+            raise InjectedFault("Injected error: connection reset by peer")
+
+    def truncate_at(self, length: int) -> Optional[int]:
+        """Length to cut a stream at, or None to deliver it whole."""
+        if length <= 0 or not self._roll(self.truncate_rate):
+            return None
+        self.stats["truncations"] += 1
+        return self.rng.randrange(length)
+
+    def corrupt(self, content: str) -> str:
+        """Maybe return a malformed version of a ReAct response."""
+        if not self._roll(self.malformed_rate):
+            return content
+        self.stats["malformed"] += 1
+        mode = self.rng.randrange(4)
+        if mode == 0:
+            # JSON cut off mid-object
+            brace = content.rfind("}")
+            return content[:brace] if brace >= 0 else content[:len(content) // 2]
+        if mode == 1:
+            # Markers lost, e.g. the model answered in free text
+            for marker in ("Thought:", "Action Input:", "Action:", "Final Answer:"):
+                content = content.replace(marker, "")
+            return content
+        if mode == 2:
+            # Single quotes instead of JSON double quotes
+            return content.replace('"', "'")
+        return ""
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "avg_injected_latency": self.stats["injected_latency"] / calls if calls else 0.0
+        }
+
+class FaultInjectingProvider(LLMProvider):
+    """
+    Wraps any LLMProvider and injects latency, errors, 429s with Retry-After,
+    truncated streams and malformed ReAct output according to a FaultInjector.
+    """
+
+    def __init__(self, llm: LLMProvider, injector: FaultInjector):
+        self.llm = llm
+        self.injector = injector
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose wrapped provider attributes (model, base_url, ...)
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    async def generate(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        **kwargs
+    ) -> LLMResponse:
+        await self.injector.before_call()
+        response = await self.llm.generate(messages, tools=tools, temperature=temperature, max_tokens=max_tokens, **kwargs)
+        content = self.injector.corrupt(response.content)
+        if content is not response.content:
+            response = response.model_copy(update={"content": content})
+        return response
+
+    async def stream_generate(
+        self,
+        messages: List[Message],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        await self.injector.before_call()
+        chunks = [chunk async for chunk in self.llm.stream_generate(messages, **kwargs)]
+        content = self.injector.corrupt("".join(chunks))
+        # Re-chunk along the original boundaries so consumers see the same stream shape
+        cut = self.injector.truncate_at(len(content))
+        if cut is not None:
+            content = content[:cut]
+        position = 0
+        for chunk in chunks:
+            if position >= len(content):
+                break
+            yield content[position:position + len(chunk)]
+            position += len(chunk)
+        if position < len(content):
+            yield content[position:]
+
+    def supports_tool_calling(self) -> bool:
+        return self.llm.supports_tool_calling()
+
+class FaultInjectingTool(Tool):
+    """
+    Wraps a Tool with the same name and schema, injecting latency and
+    exceptions before delegating to it.
+    """
+    _tool: Tool = PrivateAttr()
+    _injector: FaultInjector = PrivateAttr()
+
+    def __init__(self, tool: Tool, injector: FaultInjector):
+        super().__init__(
+            name=tool.name,
+            description=tool.description,
+            parameters=tool.parameters,
+            requires_approval=tool.requires_approval
+        )
+        self._tool = tool
+        self._injector = injector
+
+    async def execute(self, **kwargs) -> ToolResult:
+        # Raised, not reported in a ToolResult, so retries and circuit breakers see it
+        await self._injector.before_call()
+        return await self._tool.execute(**kwargs)
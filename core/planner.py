@@ -2,6 +2,7 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from llm.provider import LLMProvider, Message
 from llm.parser import ResponseParser
+from observability.usage import UsageLedger
 
 class PlanStep(BaseModel):
     id: int
@@ -16,20 +17,30 @@ class TaskPlanner:
     """
     Decomposes complex tasks into actionable steps.
     """
-    def __init__(self, llm: LLMProvider):
+    def __init__(self, llm: LLMProvider, replan_llm: Optional[LLMProvider] = None):
         self.llm = llm
+        # Replanning can run on a different (e.g. cheaper or cascaded) model
+        self.replan_llm = replan_llm or llm
         self.parser = ResponseParser()
         
-    async def create_plan(self, task: str, context: Optional[Dict] = None) -> Plan:
+    async def create_plan(self, task: str, context: Optional[Dict] = None, ledger: Optional[UsageLedger] = None) -> Plan:
         prompt = f"Decompose the following task into steps. Task: {task}. Context: {context}\nOutput valid JSON with format: {{'steps': [{{'id': 1, 'task': '...', 'tool': '...', 'dependencies': []}}]}}"
         
         response = await self.llm.generate([Message(role="user", content=prompt)])
+        if ledger:
+            ledger.record("plan", response, model=getattr(self.llm, "model", None))
         plan_data = self.parser.extract_json(response.content)
         
         steps = [PlanStep(**step) for step in plan_data.get("steps", [])]
         return Plan(steps=steps)
 
-    async def replan(self, current_plan: Plan, execution_result: Any, feedback: str = "") -> Plan:
+    async def replan(
+        self,
+        current_plan: Plan,
+        execution_result: Any,
+        feedback: str = "",
+        ledger: Optional[UsageLedger] = None
+    ) -> Plan:
         """
         Update plan based on execution results or feedback.
         """
@@ -49,7 +60,9 @@ Current Plan:
 Please update the plan to address the feedback or failure. Remove completed steps and add necessary new steps.
 Output valid JSON with format: {{'steps': [{{'id': 1, 'task': '...', 'tool': '...', 'dependencies': []}}]}}
 """
-        response = await self.llm.generate([Message(role="user", content=prompt)])
+        response = await self.replan_llm.generate([Message(role="user", content=prompt)])
+        if ledger:
+            ledger.record("replan", response, model=getattr(self.replan_llm, "model", None))
         plan_data = self.parser.extract_json(response.content)
         
         steps = [PlanStep(**step) for step in plan_data.get("steps", [])]
@@ -1,5 +1,7 @@
 from typing import Dict, Any, List, Optional
 from llm.provider import LLMProvider, Message
+from llm.parser import ResponseParser
+from observability.usage import UsageLedger
 from state.manager import AgentState
 
 class Reflector:
@@ -8,11 +10,13 @@ class Reflector:
     """
     def __init__(self, llm: LLMProvider):
         self.llm = llm
+        self.parser = ResponseParser()
 
     async def critique(
         self, 
         task: str, 
-        recent_history: List[Dict[str, Any]]
+        recent_history: List[Dict[str, Any]],
+        ledger: Optional[UsageLedger] = None
     ) -> Dict[str, Any]:
         """
         Analyze recent actions and provide feedback.
@@ -42,20 +46,14 @@ Output JSON format:
 }}
 """
         response = await self.llm.generate([Message(role="user", content=prompt)])
+        if ledger:
+            ledger.record("critique", response, model=getattr(self.llm, "model", None))
         
-        # Simple parsing for now, assuming LLM follows instructions or use Parser
-        try:
-            import json
-            import re
-            content = response.content
-            # Try to find JSON block
-            match = re.search(r"(\{.*\})", content, re.DOTALL)
-            if match:
-                content = match.group(1)
-            return json.loads(content)
-        except:
-            return {
-                "is_progressing": True, 
-                "critique": "Failed to parse critique.", 
-                "suggestion": "Continue."
-            }
+        critique = self.parser.extract_json(response.content)
+        if isinstance(critique, dict) and critique:
+            return critique
+        return {
+            "is_progressing": True, 
+            "critique": "Failed to parse critique.", 
+            "suggestion": "Continue."
+        }
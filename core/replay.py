@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from pydantic import BaseModel
+from llm.embeddings import EmbeddingProvider
+from memory.episodic import Episode
+from memory.retention import normalize
+from memory.vector_store import VectorStoreMemory
+
+class ReplayStep(BaseModel):
+    """One recorded tool call and what it returned."""
+    thought: Optional[str] = None
+    tool: str
+    input: Dict[str, Any] = {}
+    observation: str
+
+class Trajectory(BaseModel):
+    """The tool calls of a successful episode, in order, and its final answer."""
+    episode_id: int
+    task: str
+    steps: List[ReplayStep]
+    final_answer: str
+    match: str  # "exact" or "similar"
+
+def extract_steps(history: List[Dict]) -> List[ReplayStep]:
+    """Pair each recorded action with the observation that followed it (StateManager history format)."""
+    steps, thought, pending = [], None, None
+    for event in history:
+        kind, data = event.get("event"), event.get("data")
+        if kind == "thought":
+            thought = data
+        elif kind == "action" and isinstance(data, dict):
+            pending = {"thought": thought, "tool": data.get("tool"), "input": data.get("input") or {}}
+        elif kind == "observation" and pending is not None:
+            steps.append(ReplayStep(**pending, observation=str(data)))
+            pending = None
+    return steps
+
+def same_observation(recorded: str, observed: str) -> bool:
+    return normalize(recorded) == normalize(observed)
+
+class TrajectoryReplayCache:
+    """
+    Reuses successful past episodes to skip LLM steps on repeated tasks.
+    A task is matched to the latest successful episode of the same task
+    (normalized text) or, with an `embedder`, to the most similar recorded
+    task at or above `similarity_threshold`. The executor then proposes the
+    recorded tool calls one by one and checks each observation with
+    `validator` (normalized equality by default); the first divergence hands
+    control back to the LLM, with the replayed steps in its scratchpad.
+    Only exact matches replay the final answer too: a similar task may need
+    a different answer from the same observations, so the LLM writes it.
+    Parsed trajectories are kept in an LRU of `max_entries`.
+    """
+
+    def __init__(
+        self,
+        episodic: Episode,
+        embedder: Optional[EmbeddingProvider] = None,
+        similarity_threshold: float = 0.95,
+        validator: Optional[Callable[[str, str], bool]] = None,
+        max_entries: int = 1024
+    ):
+        self.episodic = episodic
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.validator = validator or same_observation
+        self.max_entries = max_entries
+        self._trajectories: "OrderedDict[int, List[ReplayStep]]" = OrderedDict()
+        self._tasks: Optional[VectorStoreMemory] = None
+        self.stats = {
+            "lookups": 0, "exact_hits": 0, "similar_hits": 0, "misses": 0,
+            "replayed_steps": 0, "completed": 0, "fell_back": 0, "llm_calls_avoided": 0
+        }
+
+    async def lookup(self, task: str) -> Optional[Trajectory]:
+        """The trajectory to replay for `task`, or None."""
+        self.stats["lookups"] += 1
+        episode, match = await self.episodic.find_successful(task), "exact"
+        if episode is None and self.embedder is not None:
+            episode, match = await self._similar(task), "similar"
+        steps = await self._steps(episode["id"]) if episode else None
+        if not steps:
+            self.stats["misses"] += 1
+            return None
+        self.stats[f"{match}_hits"] += 1
+        return Trajectory(
+            episode_id=episode["id"], task=episode["task"], steps=steps,
+            final_answer=episode["final_answer"] or "", match=match
+        )
+
+    async def _steps(self, episode_id: int) -> List[ReplayStep]:
+        if episode_id in self._trajectories:
+            self._trajectories.move_to_end(episode_id)
+            return self._trajectories[episode_id]
+        steps = extract_steps(await self.episodic.get_steps(episode_id))
+        self._trajectories[episode_id] = steps
+        if len(self._trajectories) > self.max_entries:
+            self._trajectories.popitem(last=False)
+        return steps
+
+    async def _similar(self, task: str) -> Optional[Dict]:
+        if self._tasks is None:
+            # Index the most recent successes once; later ones arrive through `add`
+            self._tasks = VectorStoreMemory()
+            episodes = await self.episodic.list_episodes(success=True, limit=self.max_entries)
+            if episodes:
+                vectors = await self.embedder.embed([episode["task"] for episode in episodes])
+                for episode, vector in zip(episodes, vectors):
+                    await self._index(episode["id"], episode["task"], episode["final_answer"], vector)
+        best = await self._tasks.retrieve((await self.embedder.embed([task]))[0], k=1)
+        if best and best[0]["similarity"] >= self.similarity_threshold:
+            return best[0]["metadata"]
+        return None
+
+    async def _index(self, episode_id: int, task: str, final_answer: str, vector) -> None:
+        await self._tasks.store(task, vector, {"id": episode_id, "task": task, "final_answer": final_answer})
+
+    async def add(self, episode_id: int, task: str, final_answer: str) -> None:
+        """Make a newly recorded successful episode available to similarity lookups."""
+        if self.embedder is not None and self._tasks is not None:
+            await self._index(episode_id, task, final_answer, (await self.embedder.embed([task]))[0])
+
+    def record(self, replayed: int, completed: bool) -> None:
+        """Account for one replay: `replayed` recorded actions taken without asking the LLM."""
+        self.stats["replayed_steps"] += replayed
+        # Each replayed action stands in for a ReAct step, and so does a replayed final answer
+        self.stats["llm_calls_avoided"] += replayed + (1 if completed else 0)
+        self.stats["completed" if completed else "fell_back"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["exact_hits"] + self.stats["similar_hits"]
+        return {**self.stats, "hit_rate": hits / self.stats["lookups"] if self.stats["lookups"] else 0.0}
@@ -1,9 +1,162 @@
 import asyncio
 import logging
-from typing import Callable, Any, TypeVar, Tuple
+import random
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Any, Deque, Dict, List, Optional, TypeVar, Tuple
+from llm.rate_limiter import retry_after_seconds, is_rate_limit_error
 
 T = TypeVar("T")
 
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised (or returned) instead of calling a dependency whose circuit is open."""
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker over a rolling error window.
+    Opens when the failure rate over the last `window_seconds` exceeds
+    `failure_threshold` (after `minimum_calls`), fails fast for
+    `open_seconds`, then lets `half_open_max_calls` probes through to
+    decide whether to close again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: float = 0.5,
+        minimum_calls: int = 10,
+        window_seconds: float = 30.0,
+        open_seconds: float = 15.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.window: Deque[Tuple[float, bool]] = deque()
+        self.listeners: List[Callable[[str, CircuitState, CircuitState], None]] = []
+
+    def add_listener(self, listener: Callable[[str, CircuitState, CircuitState], None]) -> None:
+        """Register a callback invoked as listener(name, old_state, new_state)."""
+        self.listeners.append(listener)
+
+    def _transition(self, new_state: CircuitState) -> None:
+        old_state = self.state
+        if old_state == new_state:
+            return
+        self.state = new_state
+        if new_state == CircuitState.OPEN:
+            self.opened_at = time.monotonic()
+        if new_state == CircuitState.HALF_OPEN:
+            self.half_open_calls = 0
+        if new_state == CircuitState.CLOSED:
+            self.window.clear()
+        logging.warning(f"Circuit '{self.name}': {old_state.value} -> {new_state.value}")
+        for listener in self.listeners + _global_listeners:
+            try:
+                listener(self.name, old_state, new_state)
+            except Exception as e:
+                logging.error(f"Circuit listener failed: {e}")
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """Check whether a call may proceed; counts half-open probes."""
+        if self.state == CircuitState.OPEN:
+            if self.retry_in() > 0:
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+        if self.state == CircuitState.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a half-open probe slot for a call cancelled without an outcome."""
+        if self.state == CircuitState.HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def _record(self, success: bool) -> None:
+        now = time.monotonic()
+        self.window.append((now, success))
+        while self.window and self.window[0][0] < now - self.window_seconds:
+            self.window.popleft()
+
+    def record_success(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.CLOSED)
+            return
+        self._record(True)
+
+    def record_failure(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            # The probe failed: the dependency is still down
+            self._transition(CircuitState.OPEN)
+            return
+        self._record(False)
+        failures = sum(1 for _, ok in self.window if not ok)
+        if len(self.window) >= self.minimum_calls and failures / len(self.window) >= self.failure_threshold:
+            self._transition(CircuitState.OPEN)
+
+    def get_stats(self) -> Dict[str, Any]:
+        failures = sum(1 for _, ok in self.window if not ok)
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "window_calls": len(self.window),
+            "window_failures": failures,
+            "retry_in": self.retry_in() if self.state == CircuitState.OPEN else 0.0
+        }
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_global_listeners: List[Callable[[str, CircuitState, CircuitState], None]] = []
+
+def get_circuit_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Return the process-wide breaker for `name` (an endpoint or tool), creating it on first use."""
+    breaker = _circuit_breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(name, **kwargs)
+        _circuit_breakers[name] = breaker
+    return breaker
+
+def endpoint_circuit_breaker(provider: Any, **kwargs) -> CircuitBreaker:
+    """
+    The breaker for the endpoint and model an LLM provider calls. It is shared
+    by every provider naming the same base_url and model; a provider naming
+    neither (a mock, an in-process model) gets one of its own.
+    """
+    base_url, model = getattr(provider, "base_url", None), getattr(provider, "model", None)
+    if base_url is None and model is None:
+        return CircuitBreaker(f"llm:{type(provider).__name__}", **kwargs)
+    return get_circuit_breaker(f"llm:{base_url or type(provider).__name__}:{model}", **kwargs)
+
+def reset_circuit_breakers() -> None:
+    """Forget every process-wide breaker and global listener (for tests)."""
+    _circuit_breakers.clear()
+    _global_listeners.clear()
+
+def add_circuit_listener(listener: Callable[[str, CircuitState, CircuitState], None]) -> None:
+    """Subscribe to state transitions of every circuit breaker."""
+    _global_listeners.append(listener)
+
 class ErrorHandler:
     """
     Robust error handling and retry logic.
@@ -15,33 +168,51 @@ class ErrorHandler:
         max_retries: int = 5,
         base_delay: float = 1.0,
         *args,
+        circuit_breaker: Optional[CircuitBreaker] = None,
         **kwargs
     ) -> Tuple[bool, Any]:
         """
         Execute function with exponential backoff retry.
-        Handles rate limits specifically.
+        Handles rate limits specifically. With a circuit breaker, fails fast
+        with CircuitOpenError while the dependency is known to be down.
         """
         last_error = None
         
         for attempt in range(max_retries):
+            if circuit_breaker and not circuit_breaker.allow_request():
+                return False, CircuitOpenError(circuit_breaker.name, circuit_breaker.retry_in())
             try:
                 result = await func(*args, **kwargs)
+                if circuit_breaker:
+                    circuit_breaker.record_success()
                 return True, result
             except Exception as e:
                 last_error = e
+                if circuit_breaker:
+                    circuit_breaker.record_failure()
+                if attempt == max_retries - 1:
+                    break
                 # Check for rate limit indicators in various provider exceptions
-                error_str = str(e).lower()
-                is_rate_limit = any(x in error_str for x in ["rate_limit", "429", "too many requests"])
+                is_rate_limit = is_rate_limit_error(e)
+                retry_after = retry_after_seconds(e)
                 
-                if is_rate_limit:
-                    # Often APIs provide a "retry-after" in some form, 
-                    # for now we'll just use a more aggressive backoff for 429s
+                if retry_after is not None:
+                    # The provider told us exactly when to come back
+                    wait_time = retry_after
+                elif is_rate_limit:
                     wait_time = base_delay * (5 ** attempt) # Slower backoff for rate limits
                 else:
                     wait_time = base_delay * (2 ** attempt)
+                # Jitter so concurrent callers don't retry in lockstep
+                wait_time = round(wait_time * random.uniform(1.0, 1.25), 2)
                 
                 logging.warning(f"Attempt {attempt + 1} failed ({'Rate Limit' if is_rate_limit else 'Error'}): {e}. Retrying in {wait_time}s...")
                 await asyncio.sleep(wait_time)
+            except BaseException:
+                # Cancelled: no outcome to record, but a half-open probe slot must be given back
+                if circuit_breaker:
+                    circuit_breaker.release()
+                raise
                 
         return False, last_error
 
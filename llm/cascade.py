@@ -0,0 +1,199 @@
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+from .provider import LLMProvider, Message, LLMResponse
+from .parser import ResponseParser
+from core.robustness import CircuitBreaker, CircuitOpenError, endpoint_circuit_breaker
+
+# A validator scores a response: True/False, or a confidence in [0, 1]
+Validator = Callable[[LLMResponse], Union[bool, float]]
+
+_parser = ResponseParser()
+
+def react_validator(response: LLMResponse) -> float:
+    """Accept ReAct output that either finishes or names an action with parseable input."""
+    parsed = _parser.parse_react_response(response.content)
+    if parsed.is_complete and parsed.final_answer:
+        return 1.0
+    if parsed.action and parsed.action_input is not None:
+        return 1.0
+    return 0.0
+
+def json_validator(*required_keys: str) -> Validator:
+    """Accept responses containing a JSON object with all `required_keys`."""
+    def validate(response: LLMResponse) -> float:
+        data = _parser.extract_json(response.content)
+        if not isinstance(data, dict) or not data:
+            return 0.0
+        return 1.0 if all(key in data for key in required_keys) else 0.0
+    return validate
+
+class CascadeProvider(LLMProvider):
+    """
+    Tries a small model first and escalates to a large one only when needed.
+    The small response is escalated when the call fails, the validator rejects
+    it, or its confidence is below `min_confidence`. Stats report the
+    escalation rate and the latency saved versus always calling the large model.
+    Each model has its own circuit breaker (by default, the one for its
+    endpoint and model): while the small model's is open, calls go straight
+    to the large one; while the large model's is open, escalations fail fast.
+    """
+
+    def __init__(
+        self,
+        small: LLMProvider,
+        large: LLMProvider,
+        validator: Optional[Validator] = None,
+        min_confidence: float = 0.5,
+        name: str = "cascade",
+        small_breaker: Optional[CircuitBreaker] = None,
+        large_breaker: Optional[CircuitBreaker] = None
+    ):
+        self.small = small
+        self.large = large
+        self.small_breaker = small_breaker or endpoint_circuit_breaker(small)
+        self.large_breaker = large_breaker or endpoint_circuit_breaker(large)
+        self.validator = validator or react_validator
+        self.min_confidence = min_confidence
+        self.name = name
+        self.stats: Dict[str, float] = {
+            "calls": 0,
+            "escalations": 0,
+            "small_errors": 0,
+            "small_latency": 0.0,    # total seconds in small calls, accepted or not
+            "accepted_latency": 0.0, # total seconds in accepted small calls
+            "wasted_latency": 0.0,   # small-call seconds spent before escalating
+            "large_latency": 0.0,
+            "large_calls": 0
+        }
+
+    def _confidence(self, response: LLMResponse) -> float:
+        try:
+            score = self.validator(response)
+        except Exception as e:
+            logging.warning(f"Cascade '{self.name}' validator failed: {e}")
+            return 0.0
+        return float(score)
+
+    def _accept(self, provider: LLMProvider, response: LLMResponse) -> LLMResponse:
+        if response.model is None:
+            response.model = getattr(provider, "model", None)
+        return response
+
+    async def _call_small(self, call: Callable[[LLMProvider], Any]) -> Optional[Any]:
+        """Run `call` on the small model; None means escalate."""
+        if not self.small_breaker.allow_request():
+            self.stats["escalations"] += 1
+            return None
+        start = time.monotonic()
+        try:
+            result = await call(self.small)
+            self.small_breaker.record_success()
+        except Exception as e:
+            logging.warning(f"Cascade '{self.name}' small model failed, escalating: {e}")
+            self.small_breaker.record_failure()
+            self.stats["small_errors"] += 1
+            result = None
+        except BaseException:
+            self.small_breaker.release()
+            raise
+        latency = time.monotonic() - start
+        self.stats["small_latency"] += latency
+
+        if result is not None and self._confidence(result) >= self.min_confidence:
+            self.stats["accepted_latency"] += latency
+            return result
+        self.stats["escalations"] += 1
+        self.stats["wasted_latency"] += latency
+        return None
+
+    def _check_large(self) -> None:
+        if not self.large_breaker.allow_request():
+            raise CircuitOpenError(self.large_breaker.name, self.large_breaker.retry_in())
+
+    async def generate(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        **kwargs
+    ) -> LLMResponse:
+        self.stats["calls"] += 1
+
+        async def call(provider: LLMProvider) -> LLMResponse:
+            return await provider.generate(messages, tools=tools, temperature=temperature, max_tokens=max_tokens, **kwargs)
+
+        response = await self._call_small(call)
+        if response is not None:
+            return self._accept(self.small, response)
+
+        self._check_large()
+        start = time.monotonic()
+        try:
+            response = await call(self.large)
+        except Exception:
+            self.large_breaker.record_failure()
+            raise
+        except BaseException:
+            self.large_breaker.release()
+            raise
+        self.large_breaker.record_success()
+        self.stats["large_latency"] += time.monotonic() - start
+        self.stats["large_calls"] += 1
+        return self._accept(self.large, response)
+
+    async def stream_generate(
+        self,
+        messages: List[Message],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        # The small answer must be validated before any of it is handed out
+        self.stats["calls"] += 1
+
+        async def call(provider: LLMProvider) -> LLMResponse:
+            chunks = [chunk async for chunk in provider.stream_generate(messages, **kwargs)]
+            return LLMResponse(content="".join(chunks))
+
+        response = await self._call_small(call)
+        if response is not None:
+            yield response.content
+            return
+
+        self._check_large()
+        start = time.monotonic()
+        try:
+            async for chunk in self.large.stream_generate(messages, **kwargs):
+                yield chunk
+        except Exception:
+            self.large_breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled, or the consumer stopped early: no verdict on the endpoint
+            self.large_breaker.release()
+            raise
+        self.large_breaker.record_success()
+        self.stats["large_latency"] += time.monotonic() - start
+        self.stats["large_calls"] += 1
+
+    def supports_tool_calling(self) -> bool:
+        return self.small.supports_tool_calling() and self.large.supports_tool_calling()
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        accepted = calls - self.stats["escalations"]
+        large_calls = self.stats["large_calls"]
+        avg_large = self.stats["large_latency"] / large_calls if large_calls else None
+
+        latency_saved = None
+        if avg_large is not None:
+            # Accepted calls avoided a large call; escalated ones paid for the small attempt
+            latency_saved = accepted * avg_large - self.stats["accepted_latency"] - self.stats["wasted_latency"]
+
+        return {
+            **self.stats,
+            "escalation_rate": self.stats["escalations"] / calls if calls else 0.0,
+            "avg_small_latency": self.stats["small_latency"] / calls if calls else None,
+            "avg_large_latency": avg_large,
+            "latency_saved": latency_saved
+        }
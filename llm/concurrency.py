@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+from .provider import LLMProvider, Message, LLMResponse
+from .rate_limiter import is_rate_limit_error
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD in-flight limit for outbound LLM calls.
+    The limit grows by ~1 per round trip while latency and errors are healthy
+    and is halved on 429s, error bursts or latency spikes (TCP-style).
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_tolerance: float = 2.0,
+        error_rate_threshold: float = 0.2,
+        backoff_ratio: float = 0.5,
+        metrics: Optional[Any] = None
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.error_rate_threshold = error_rate_threshold
+        self.backoff_ratio = backoff_ratio
+        self.metrics = metrics
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.baseline_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self._last_decrease = 0.0
+        self.stats: Dict[str, float] = {
+            "requests": 0,
+            "queued_requests": 0,
+            "total_queue_delay": 0.0,
+            "last_queue_delay": 0.0,
+            "increases": 0,
+            "decreases": 0
+        }
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self) -> float:
+        """Wait for an in-flight slot. Returns the time spent queueing."""
+        start = time.monotonic()
+        if self.in_flight < self.current_limit and not self._waiters:
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self.stats["queued_requests"] += 1
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed to us just before cancellation
+                    self._release_slot()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+
+        queue_delay = time.monotonic() - start
+        self.stats["requests"] += 1
+        self.stats["total_queue_delay"] += queue_delay
+        self.stats["last_queue_delay"] = queue_delay
+        if self.metrics:
+            self.metrics.record_llm_concurrency(self.current_limit, self.in_flight, queue_delay)
+        return queue_delay
+
+    def release(self, latency: float, error: bool = False, rate_limited: bool = False) -> None:
+        """Return a slot and feed the call outcome into the AIMD controller."""
+        self._update_limit(latency, error, rate_limited)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.current_limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _update_limit(self, latency: float, error: bool, rate_limited: bool) -> None:
+        self.error_rate = 0.9 * self.error_rate + 0.1 * (1.0 if error else 0.0)
+
+        spike = False
+        if not error:
+            if self.baseline_latency is None:
+                self.baseline_latency = latency
+            spike = latency > self.baseline_latency * self.latency_tolerance
+            if not spike:
+                # Slow-moving estimate of healthy latency
+                self.baseline_latency = 0.95 * self.baseline_latency + 0.05 * latency
+
+        if rate_limited or spike or self.error_rate > self.error_rate_threshold:
+            self._decrease()
+        elif not error and self.in_flight >= self.current_limit / 2:
+            # Only grow when we are actually using the current limit
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.stats["increases"] += 1
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        # One multiplicative decrease per congestion event, not per failed request
+        if now - self._last_decrease < (self.baseline_latency or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        self.stats["decreases"] += 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.release(time.monotonic() - start, error=True, rate_limited=is_rate_limit_error(e))
+            raise
+        except BaseException:
+            # Cancellation says nothing about the provider's health
+            self._release_slot()
+            raise
+        else:
+            self.release(time.monotonic() - start)
+
+    def get_stats(self) -> Dict[str, Any]:
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "limit": self.current_limit,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "avg_queue_delay": self.stats["total_queue_delay"] / requests if requests else 0.0,
+            "baseline_latency": self.baseline_latency,
+            "error_rate": self.error_rate
+        }
+
+class ConcurrencyLimitedProvider(LLMProvider):
+    """
+    Wraps any LLMProvider so every call goes through an AdaptiveConcurrencyLimiter.
+    """
+
+    def __init__(self, llm: LLMProvider, limiter: AdaptiveConcurrencyLimiter):
+        self.llm = llm
+        self.limiter = limiter
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose wrapped provider attributes (model, rate_limiter, ...)
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    async def generate(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        **kwargs
+    ) -> LLMResponse:
+        async with self.limiter.slot():
+            return await self.llm.generate(messages, tools=tools, temperature=temperature, max_tokens=max_tokens, **kwargs)
+
+    async def stream_generate(
+        self,
+        messages: List[Message],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        async with self.limiter.slot():
+            async for chunk in self.llm.stream_generate(messages, **kwargs):
+                yield chunk
+
+    def supports_tool_calling(self) -> bool:
+        return self.llm.supports_tool_calling()
+
+_shared_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+def get_concurrency_limiter(name: str = "default", **kwargs) -> AdaptiveConcurrencyLimiter:
+    """Return the process-wide concurrency limiter registered under `name`."""
+    limiter = _shared_limiters.get(name)
+    if limiter is None:
+        limiter = AdaptiveConcurrencyLimiter(**kwargs)
+        _shared_limiters[name] = limiter
+    return limiter
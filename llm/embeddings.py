@@ -0,0 +1,104 @@
+import hashlib
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import numpy as np
+from openai import AsyncOpenAI
+from .http_pool import ClientPool, get_client_pool
+from .rate_limiter import RateLimiter, get_rate_limiter, retry_after_seconds, is_rate_limit_error
+from .tokenizer import get_token_counter
+
+class EmbeddingProvider(ABC):
+    """
+    Abstract base class for text embedding backends.
+    `embed` takes a batch of texts and returns one float32 row per text.
+    `name` identifies the model (and dimensions) so cached vectors from one
+    model are never served for another.
+    """
+
+    name: str = "embeddings"
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts as a (len(texts), dim) float32 array."""
+        pass
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI-compatible /embeddings endpoint, sharing pooled connections and rate limits."""
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        dimensions: Optional[int] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        organization: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        client_pool: Optional[ClientPool] = None
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.name = f"{model}:{dimensions}" if dimensions else model
+        base_url = base_url or os.environ.get("OPENAI_BASE_URL")
+        self.client_pool = client_pool or get_client_pool()
+        self._client_args = {
+            "api_key": api_key or os.environ.get("OPENAI_API_KEY"), "base_url": base_url, "organization": organization
+        }
+        self.rate_limiter = rate_limiter or get_rate_limiter(base_url or "openai")
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The pooled client for the running event loop."""
+        return self.client_pool.get_client(**self._client_args)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        params = {"model": self.model, "input": texts}
+        if self.dimensions:
+            params["dimensions"] = self.dimensions
+        counter = get_token_counter()
+        reserved = await self.rate_limiter.acquire(sum(counter.count(text) for text in texts))
+        try:
+            response = await self.client.embeddings.create(**params)
+        except Exception as e:
+            self.rate_limiter.reconcile(reserved, 0)
+            retry_after = retry_after_seconds(e)
+            if retry_after is None and is_rate_limit_error(e):
+                retry_after = 1.0
+            if retry_after is not None:
+                self.rate_limiter.pause(retry_after)
+            raise
+        usage = getattr(response, "usage", None)
+        self.rate_limiter.reconcile(reserved, usage.total_tokens if usage else None)
+        # Rows come back tagged with their input position; don't rely on order
+        rows = sorted(response.data, key=lambda item: item.index)
+        return np.array([row.embedding for row in rows], dtype=np.float32)
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic local embeddings by feature hashing, for tests and offline runs.
+    Words and character trigrams are hashed into `dim` signed buckets, so
+    texts sharing vocabulary get similar vectors; no semantics beyond that.
+    """
+
+    _WORD = re.compile(r"\w+")
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hash-{dim}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = self._WORD.findall(text.lower())
+        features = words + [f"#{w[i:i + 3]}" for w in words for i in range(max(1, len(w) - 2))]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._vector(text) for text in texts])
@@ -0,0 +1,192 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+import httpx
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+class PoolConfig(BaseModel):
+    """Connection pool limits and timeouts shared by all pooled clients."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 120.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 30.0
+    http2: bool = True
+    prewarm_connections: int = 0
+
+class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts requests and reports pool occupancy."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.in_flight = 0
+        self.errors = 0
+        self.total_time = 0.0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        start = time.monotonic()
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_time += time.monotonic() - start
+
+    def get_stats(self) -> Dict[str, Any]:
+        # httpcore does not expose pool stats publicly; read them defensively
+        connections = list(getattr(getattr(self, "_pool", None), "connections", []) or [])
+        idle = sum(1 for c in connections if getattr(c, "is_idle", lambda: False)())
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "errors": self.errors,
+            "avg_time_to_headers": self.total_time / self.requests if self.requests else 0.0,
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "http2_connections": sum(1 for c in connections if "HTTP/2" in str(getattr(c, "info", lambda: "")()))
+        }
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+class ClientPool:
+    """
+    Process-wide factory for AsyncOpenAI clients.
+    One keep-alive connection pool is kept per base_url and shared by every
+    client (one per api key / organization) talking to that endpoint, so new
+    providers reuse warm TLS connections instead of opening their own.
+    Pooled connections belong to the event loop that opened them, so pools
+    and clients are kept per running loop; those of closed loops are dropped.
+    With `prewarm_connections` set, each new pool opens that many connections
+    in the background as soon as it is created.
+    """
+
+    def __init__(self, config: Optional[PoolConfig] = None):
+        self.config = config or PoolConfig()
+        self._http_clients: Dict[Tuple[Any, str], httpx.AsyncClient] = {}
+        self._transports: Dict[Tuple[Any, str], _InstrumentedTransport] = {}
+        self._clients: Dict[Tuple[Any, str, Optional[str], Optional[str]], AsyncOpenAI] = {}
+        self._prewarming: Set[asyncio.Task] = set()
+
+    def _drop_closed_loops(self) -> None:
+        for table in (self._http_clients, self._transports, self._clients):
+            for key in [key for key in table if key[0] is not None and key[0].is_closed()]:
+                del table[key]
+
+    def get_http_client(self, base_url: Optional[str] = None) -> httpx.AsyncClient:
+        base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        loop = _running_loop()
+        http_client = self._http_clients.get((loop, base_url))
+        if http_client is None:
+            self._drop_closed_loops()
+            config = self.config
+            limits = httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry
+            )
+            transport = _InstrumentedTransport(
+                http2=config.http2 and HTTP2_AVAILABLE,
+                limits=limits
+            )
+            http_client = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(
+                    connect=config.connect_timeout,
+                    read=config.read_timeout,
+                    write=config.write_timeout,
+                    pool=config.pool_timeout
+                )
+            )
+            self._transports[(loop, base_url)] = transport
+            self._http_clients[(loop, base_url)] = http_client
+            if loop is not None and config.prewarm_connections:
+                task = loop.create_task(self.prewarm(base_url, config.prewarm_connections))
+                self._prewarming.add(task)
+                task.add_done_callback(self._prewarming.discard)
+        return http_client
+
+    def get_client(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        organization: Optional[str] = None
+    ) -> AsyncOpenAI:
+        key = (_running_loop(), (base_url or DEFAULT_BASE_URL).rstrip("/"), api_key, organization)
+        client = self._clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                organization=organization,
+                http_client=self.get_http_client(base_url)
+            )
+            self._clients[key] = client
+        return client
+
+    async def prewarm(self, base_url: Optional[str] = None, connections: int = 2) -> int:
+        """
+        Open `connections` keep-alive connections to an endpoint ahead of traffic.
+        Any HTTP status counts: the point is the TCP/TLS handshake, not the response.
+        Returns the number of connections that were established.
+        """
+        url = (base_url or DEFAULT_BASE_URL).rstrip("/") + "/"
+        http_client = self.get_http_client(base_url)
+        # HTTP/2 multiplexes over a single connection
+        if self.config.http2 and HTTP2_AVAILABLE:
+            connections = 1
+        results = await asyncio.gather(
+            *[http_client.head(url) for _ in range(connections)],
+            return_exceptions=True
+        )
+        return sum(1 for r in results if not isinstance(r, Exception))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool stats for the running event loop."""
+        loop = _running_loop()
+        return {
+            "clients": sum(1 for key in self._clients if key[0] is loop),
+            "pools": {url: transport.get_stats() for (owner, url), transport in self._transports.items() if owner is loop}
+        }
+
+    async def aclose(self) -> None:
+        """Close the pools of the running event loop."""
+        loop = _running_loop()
+        for task in list(self._prewarming):
+            task.cancel()
+        for (owner, _), http_client in list(self._http_clients.items()):
+            if owner is loop:
+                await http_client.aclose()
+        for table in (self._http_clients, self._transports, self._clients):
+            for key in [key for key in table if key[0] is loop]:
+                del table[key]
+
+_default_pool: Optional[ClientPool] = None
+
+def get_client_pool(config: Optional[PoolConfig] = None) -> ClientPool:
+    """Return the process-wide ClientPool; `config` only applies on first call."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ClientPool(config)
+    return _default_pool
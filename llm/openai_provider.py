@@ -2,6 +2,9 @@ import os
 from typing import List, Dict, Any, Optional, AsyncIterator
 from openai import AsyncOpenAI
 from .provider import LLMProvider, Message, LLMResponse
+from .http_pool import ClientPool, get_client_pool
+from .tokenizer import get_token_counter
+from .rate_limiter import RateLimiter, get_rate_limiter, estimate_message_tokens, retry_after_seconds, is_rate_limit_error
 
 class OpenAIProvider(LLMProvider):
     """OpenAI implementation of LLMProvider."""
@@ -11,7 +14,9 @@ class OpenAIProvider(LLMProvider):
         model: str = "gpt-4o-mini",
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
-        organization: Optional[str] = None
+        organization: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        client_pool: Optional[ClientPool] = None
     ):
         self.model = model
         
@@ -23,12 +28,18 @@ class OpenAIProvider(LLMProvider):
              # If using DeepSeek key and no base_url specified, default to DeepSeek API
              final_base_url = "https://api.deepseek.com"
 
-        self.client = AsyncOpenAI(
-            api_key=final_api_key,
-            base_url=final_base_url,
-            organization=organization
-        )
+        self.base_url = final_base_url
+        # Providers for the same endpoint share pooled keep-alive connections
+        self.client_pool = client_pool or get_client_pool()
+        self._client_args = {"api_key": final_api_key, "base_url": final_base_url, "organization": organization}
+        # All providers talking to the same endpoint share one budget
+        self.rate_limiter = rate_limiter or get_rate_limiter(final_base_url or "openai")
         
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The pooled client for the running event loop."""
+        return self.client_pool.get_client(**self._client_args)
+
     async def generate(
         self,
         messages: List[Message],
@@ -51,7 +62,13 @@ class OpenAIProvider(LLMProvider):
             # Placeholder for tool conversion logic
             params["tools"] = tools
             
-        response = await self.client.chat.completions.create(**params)
+        reserved = await self.rate_limiter.acquire(estimate_message_tokens(formatted_messages) + max_tokens)
+        try:
+            response = await self.client.chat.completions.create(**params)
+        except Exception as e:
+            self._handle_error(e, reserved)
+            raise
+        self.rate_limiter.reconcile(reserved, response.usage.total_tokens if response.usage else None)
         choice = response.choices[0].message
         
         tool_calls = None
@@ -75,7 +92,8 @@ class OpenAIProvider(LLMProvider):
                 "prompt_tokens": response.usage.prompt_tokens,
                 "completion_tokens": response.usage.completion_tokens,
                 "total_tokens": response.usage.total_tokens
-            }
+            } if response.usage else None,
+            model=getattr(response, "model", None) or self.model
         )
         
     async def stream_generate(
@@ -84,17 +102,46 @@ class OpenAIProvider(LLMProvider):
         **kwargs
     ) -> AsyncIterator[str]:
         formatted_messages = [{"role": m.role, "content": m.content} for m in messages]
+        # Ask for a final usage chunk so the reservation can be reconciled like generate()
+        kwargs.setdefault("stream_options", {"include_usage": True})
         
-        stream = await self.client.chat.completions.create(
-            model=self.model,
-            messages=formatted_messages,
-            stream=True,
-            **kwargs
-        )
+        prompt_tokens = estimate_message_tokens(formatted_messages)
+        reserved = await self.rate_limiter.acquire(prompt_tokens + kwargs.get("max_tokens", 1000))
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=formatted_messages,
+                stream=True,
+                **kwargs
+            )
+        except Exception as e:
+            self._handle_error(e, reserved)
+            raise
         
-        async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        usage = None
+        output: List[str] = []
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    output.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Without a usage chunk (endpoint ignored stream_options, or the stream
+            # failed or was abandoned) charge what was actually sent and received
+            if usage is None:
+                usage = prompt_tokens + get_token_counter().count("".join(output))
+            self.rate_limiter.reconcile(reserved, usage)
+    
+    def _handle_error(self, error: Exception, reserved: int) -> None:
+        """Release the token reservation and honor any Retry-After from the provider."""
+        self.rate_limiter.reconcile(reserved, 0)
+        retry_after = retry_after_seconds(error)
+        if retry_after is None and is_rate_limit_error(error):
+            retry_after = 1.0
+        if retry_after is not None:
+            self.rate_limiter.pause(retry_after)
     
     def supports_tool_calling(self) -> bool:
         return True
@@ -1,5 +1,6 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from .provider import Message
+from .tokenizer import TokenCounter, get_token_counter
 from tools.base import Tool
 
 class PromptBuilder:
@@ -44,19 +45,67 @@ Provide a numbered list of steps. Each step should:
 Plan:
 """
 
+    TRUNCATION_MARKER = "[Earlier steps truncated]"
+
+    def __init__(self, token_counter: Optional[TokenCounter] = None):
+        self.token_counter = token_counter or get_token_counter()
+
+    def count_tokens(self, text: str) -> int:
+        return self.token_counter.count(text)
+
     def build_react_prompt(
         self,
         task: str,
         tools: List[Tool],
-        scratchpad: str = ""
+        scratchpad: str = "",
+        max_prompt_tokens: Optional[int] = None
     ) -> str:
         tool_descriptions = "\n".join([f"- {t.name}: {t.description} (Params: {t.parameters})" for t in tools])
+        if max_prompt_tokens:
+            scratchpad = self.fit_scratchpad(
+                self.REACT_TEMPLATE.format(task=task, tool_descriptions=tool_descriptions, scratchpad=""),
+                scratchpad,
+                max_prompt_tokens
+            )
         return self.REACT_TEMPLATE.format(
             task=task,
             tool_descriptions=tool_descriptions,
             scratchpad=scratchpad
         )
 
+    def split_scratchpad(self, base_prompt: str, scratchpad: str, max_prompt_tokens: int) -> Tuple[List[str], List[str]]:
+        """
+        Split scratchpad lines into (dropped, kept) so the kept, most recent
+        lines fit the token budget alongside `base_prompt`.
+        Lines are counted individually, so on each step only new lines are tokenized.
+        """
+        budget = max_prompt_tokens - self.count_tokens(base_prompt)
+        lines = scratchpad.split("\n")
+        kept = 0
+        used = 0
+        for line in reversed(lines):
+            # +1 for the newline joining the lines
+            cost = self.count_tokens(line) + 1
+            if used + cost > budget:
+                break
+            kept += 1
+            used += cost
+        split = len(lines) - kept
+        return lines[:split], lines[split:]
+
+    def fit_scratchpad(self, base_prompt: str, scratchpad: str, max_prompt_tokens: int) -> str:
+        """
+        Drop the oldest scratchpad lines until the prompt, with a marker
+        noting the truncation, fits the token budget.
+        """
+        dropped, kept = self.split_scratchpad(base_prompt, scratchpad, max_prompt_tokens)
+        if not dropped:
+            return scratchpad
+        # The marker's tokens come out of the budget before choosing the lines to keep
+        reserved = self.count_tokens(self.TRUNCATION_MARKER) + 1
+        dropped, kept = self.split_scratchpad(base_prompt, scratchpad, max_prompt_tokens - reserved)
+        return "\n".join([self.TRUNCATION_MARKER] + kept)
+
     def build_planning_prompt(
         self,
         task: str,
@@ -12,6 +12,7 @@ class LLMResponse(BaseModel):
     role: str = "assistant"
     tool_calls: Optional[List[Dict[str, Any]]] = None
     usage: Optional[Dict[str, int]] = None
+    model: Optional[str] = None
 
 class LLMProvider(ABC):
     """
@@ -0,0 +1,211 @@
+import asyncio
+import os
+import time
+import weakref
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+from .tokenizer import get_token_counter
+
+class TokenBucket:
+    """
+    Continuously refilling token bucket.
+    The balance may go negative when actual usage exceeds a reservation.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: Optional[float] = None) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        now = now if now is not None else time.monotonic()
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimiter:
+    """
+    Proactive requests/min and tokens/min limiter for LLM calls.
+    Callers are admitted strictly in arrival order: the head of the queue
+    waits for budget while everyone else waits behind it, so nobody fails
+    and nobody starves.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute else None
+        self.blocked_until = 0.0
+        # asyncio.Lock binds to the loop it is first used on; keep one per loop
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        self.stats: Dict[str, float] = {
+            "requests": 0,
+            "reserved_tokens": 0,
+            "actual_tokens": 0,
+            "throttled_requests": 0,
+            "total_wait": 0.0,
+            "pauses": 0
+        }
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[loop] = lock
+        return lock
+
+    def _wait_time(self, tokens: float) -> float:
+        now = time.monotonic()
+        wait = max(0.0, self.blocked_until - now)
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.wait_time(1, now))
+        if self.token_bucket:
+            wait = max(wait, self.token_bucket.wait_time(tokens, now))
+        return wait
+
+    async def acquire(self, estimated_tokens: int = 0) -> int:
+        """
+        Wait until one request and `estimated_tokens` tokens fit the budget.
+        Returns the number of tokens reserved, to be passed to `reconcile`.
+        """
+        tokens = estimated_tokens
+        if self.token_bucket:
+            # A single request larger than the whole budget would never fit
+            tokens = min(tokens, int(self.token_bucket.capacity))
+
+        start = time.monotonic()
+        async with self._lock():
+            throttled = False
+            while True:
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    break
+                throttled = True
+                await asyncio.sleep(wait)
+
+            if self.request_bucket:
+                self.request_bucket.consume(1)
+            if self.token_bucket:
+                self.token_bucket.consume(tokens)
+
+        self.stats["requests"] += 1
+        self.stats["reserved_tokens"] += tokens
+        self.stats["total_wait"] += time.monotonic() - start
+        if throttled:
+            self.stats["throttled_requests"] += 1
+        return tokens
+
+    def reconcile(self, reserved_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Correct a reservation once the provider reports actual usage."""
+        if actual_tokens is None:
+            return
+        self.stats["actual_tokens"] += actual_tokens
+        if not self.token_bucket:
+            return
+        difference = reserved_tokens - actual_tokens
+        if difference > 0:
+            self.token_bucket.refund(difference)
+        elif difference < 0:
+            self.token_bucket.consume(-difference)
+
+    def pause(self, seconds: float) -> None:
+        """Stop admitting requests for `seconds` (e.g. from a Retry-After header)."""
+        if seconds <= 0:
+            return
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.stats["pauses"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "available_requests": self.request_bucket.tokens if self.request_bucket else None,
+            "available_tokens": self.token_bucket.tokens if self.token_bucket else None,
+            "paused_for": max(0.0, self.blocked_until - time.monotonic())
+        }
+
+_shared_limiters: Dict[str, RateLimiter] = {}
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+def get_rate_limiter(
+    name: str = "default",
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None
+) -> RateLimiter:
+    """
+    Return the process-wide limiter registered under `name`, creating it on first use.
+    Budgets default to the LLM_RPM_LIMIT / LLM_TPM_LIMIT environment variables.
+    """
+    limiter = _shared_limiters.get(name)
+    if limiter is None:
+        limiter = RateLimiter(
+            requests_per_minute=requests_per_minute or _env_float("LLM_RPM_LIMIT"),
+            tokens_per_minute=tokens_per_minute or _env_float("LLM_TPM_LIMIT")
+        )
+        _shared_limiters[name] = limiter
+    return limiter
+
+def estimate_message_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Prompt size from the shared (memoized) token counter."""
+    return get_token_counter().count_messages(messages)
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Extract a Retry-After delay from a provider exception, if it carries one."""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+    error_str = str(error).lower()
+    return any(x in error_str for x in ["rate_limit", "rate limit", "429", "too many requests"])
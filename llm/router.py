@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+from .provider import LLMProvider, Message, LLMResponse
+from core.robustness import CircuitBreaker, CircuitOpenError, endpoint_circuit_breaker
+
+class Backend:
+    """
+    One LLMProvider behind a RoutingProvider, with its routing weight and health.
+    Without a `circuit_breaker`, it uses the breaker for its provider's endpoint and model.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        provider: LLMProvider,
+        weight: float = 1.0,
+        latency_window: int = 200,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        self.name = name
+        self.provider = provider
+        self.weight = weight
+        self.circuit_breaker = circuit_breaker or endpoint_circuit_breaker(provider)
+        self.health = 1.0  # EWMA of success, 0..1
+        self.latencies: Deque[float] = deque(maxlen=latency_window)
+        self.stats: Dict[str, float] = {
+            "requests": 0,
+            "successes": 0,
+            "failures": 0,
+            "hedges_sent": 0,
+            "wins": 0,
+            "cancelled": 0
+        }
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.health = 0.8 * self.health + 0.2
+        self.stats["successes"] += 1
+        if self.circuit_breaker:
+            self.circuit_breaker.record_success()
+
+    def record_failure(self) -> None:
+        self.health = 0.8 * self.health
+        self.stats["failures"] += 1
+        if self.circuit_breaker:
+            self.circuit_breaker.record_failure()
+
+    def check_circuit(self) -> None:
+        if self.circuit_breaker and not self.circuit_breaker.allow_request():
+            raise CircuitOpenError(self.circuit_breaker.name, self.circuit_breaker.retry_in())
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(percentile / 100.0 * len(ordered)))
+        return ordered[index]
+
+    def get_stats(self) -> Dict[str, Any]:
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "weight": self.weight,
+            "health": self.health,
+            "win_rate": self.stats["wins"] / requests if requests else 0.0,
+            "p50_latency": self.latency_percentile(50),
+            "p95_latency": self.latency_percentile(95)
+        }
+
+class RoutingProvider(LLMProvider):
+    """
+    Routes calls across several LLMProvider backends.
+    The primary is drawn by weight * health; failures fall back through the
+    remaining backends in their configured order. With hedging enabled, a
+    duplicate request goes to the next backend once the primary exceeds its
+    observed p95 latency, and whichever loses the race is cancelled.
+    """
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        min_hedge_delay: float = 0.05,
+        min_samples: int = 20,
+        seed: Optional[int] = None
+    ):
+        if not backends:
+            raise ValueError("RoutingProvider needs at least one backend")
+        self.backends = backends
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self._random = random.Random(seed)
+
+    def _route(self) -> List[Backend]:
+        """Primary by weighted health, then the others in fallback order."""
+        scores = [b.weight * max(b.health, 0.01) for b in self.backends]
+        primary = self._random.choices(self.backends, weights=scores, k=1)[0]
+        return [primary] + [b for b in self.backends if b is not primary]
+
+    def _hedge_delay(self, backend: Backend) -> Optional[float]:
+        if not self.hedge or len(backend.latencies) < self.min_samples:
+            return None
+        return max(self.min_hedge_delay, backend.latency_percentile(self.hedge_percentile))
+
+    async def _call(self, backend: Backend, messages: List[Message], kwargs: Dict[str, Any]) -> LLMResponse:
+        # An open circuit fails instantly, which moves routing on to the next backend
+        backend.check_circuit()
+        backend.stats["requests"] += 1
+        start = time.monotonic()
+        try:
+            response = await backend.provider.generate(messages, **kwargs)
+        except asyncio.CancelledError:
+            backend.stats["cancelled"] += 1
+            if backend.circuit_breaker:
+                backend.circuit_breaker.release()
+            raise
+        except Exception:
+            backend.record_failure()
+            raise
+        backend.record_success(time.monotonic() - start)
+        return response
+
+    async def generate(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        **kwargs
+    ) -> LLMResponse:
+        kwargs = {"tools": tools, "temperature": temperature, "max_tokens": max_tokens, **kwargs}
+        candidates = self._route()
+        last_error: Optional[Exception] = None
+
+        while candidates:
+            primary = candidates.pop(0)
+            pending = {asyncio.ensure_future(self._call(primary, messages, kwargs)): primary}
+            hedge_delay = self._hedge_delay(primary)
+
+            try:
+                while pending:
+                    timeout = hedge_delay if hedge_delay is not None and len(pending) == 1 and candidates else None
+                    done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                    if not done:
+                        # Primary is past its p95: race a duplicate on the next backend
+                        hedge_backend = candidates.pop(0)
+                        hedge_backend.stats["hedges_sent"] += 1
+                        pending[asyncio.ensure_future(self._call(hedge_backend, messages, kwargs))] = hedge_backend
+                        hedge_delay = None
+                        continue
+
+                    for task in done:
+                        backend = pending.pop(task)
+                        if task.exception() is None:
+                            backend.stats["wins"] += 1
+                            return task.result()
+                        last_error = task.exception()
+                        logging.warning(f"Backend '{backend.name}' failed: {last_error}")
+            finally:
+                for task in pending:
+                    task.cancel()
+
+        raise last_error or RuntimeError("All backends failed")
+
+    async def stream_generate(
+        self,
+        messages: List[Message],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        last_error: Optional[Exception] = None
+        for backend in self._route():
+            try:
+                backend.check_circuit()
+            except CircuitOpenError as e:
+                last_error = e
+                continue
+            backend.stats["requests"] += 1
+            start = time.monotonic()
+            started = False
+            try:
+                async for chunk in backend.provider.stream_generate(messages, **kwargs):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                backend.record_failure()
+                if started:
+                    # Chunks were already handed out; switching backends would splice two answers
+                    raise
+                last_error = e
+                continue
+            backend.record_success(time.monotonic() - start)
+            backend.stats["wins"] += 1
+            return
+        raise last_error or RuntimeError("All backends failed")
+
+    def supports_tool_calling(self) -> bool:
+        return all(b.provider.supports_tool_calling() for b in self.backends)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {b.name: b.get_stats() for b in self.backends}
@@ -0,0 +1,310 @@
+import json
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+# Only these characters matter for brace matching; everything else is skipped at C speed
+_STRUCTURAL = re.compile(r'[{}"\\]')
+_DECODER = json.JSONDecoder()
+# A JSON object opens with a key or closes immediately; other braces are never tried
+_OBJECT_START = re.compile(r'\{\s*["}]')
+
+class ReactOutput(BaseModel):
+    thought: str
+    action: Optional[str] = None
+    action_input: Optional[Dict[str, Any]] = None
+    final_answer: Optional[str] = None
+    is_complete: bool = False
+
+class ParseEvent(BaseModel):
+    """A ReAct field that has been fully received."""
+    field: str
+    value: Any
+
+def decode_json_object(text: str, start: int = 0) -> Tuple[Optional[Dict[str, Any]], int]:
+    """
+    Decode the JSON object starting exactly at `text[start]` (which must be '{').
+    Returns (object, end) or (None, start) if there is no complete, valid object there.
+    """
+    try:
+        value, end = _DECODER.raw_decode(text, start)
+    except ValueError:
+        return None, start
+    if not isinstance(value, dict):
+        return None, start
+    return value, end
+
+def parse_first_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the first {...} block in `text` that parses as a JSON object.
+    Each candidate brace is decoded in place, so a stray brace fails after a
+    few characters instead of triggering a regex backtrack over the whole text.
+    """
+    for match in _OBJECT_START.finditer(text):
+        value, _ = decode_json_object(text, match.start())
+        if value is not None:
+            return value
+    return None
+
+class _JSONScanner:
+    """Incremental balanced-brace scanner for one top-level object split across chunks."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.parts: List[str] = []
+        self.done = False
+
+    def feed(self, text: str, start: int = 0) -> int:
+        """Consume text[start:]; returns the position just past the object (or len(text))."""
+        skip = start if self.escape else -1
+        self.escape = False
+        for match in _STRUCTURAL.finditer(text, start):
+            pos = match.start()
+            if pos == skip:
+                continue
+            ch = match.group()
+            if self.in_string:
+                if ch == "\\":
+                    skip = pos + 1
+                    # A trailing backslash escapes the first character of the next chunk
+                    self.escape = skip == len(text)
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = self.depth > 0
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}" and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.parts.append(text[start:pos + 1])
+                    self.done = True
+                    return pos + 1
+        self.parts.append(text[start:])
+        return len(text)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+class StreamingReactParser:
+    """
+    Single-pass, incremental parser for ReAct output.
+    Feed it chunks from `stream_generate` (or one whole string); it returns
+    ParseEvents as soon as each field is complete. Markers are recognised at
+    the start of a line, except that the first "Thought:" may follow other
+    text; the first occurrence of each field wins, and the final answer runs
+    to the end of the response.
+    """
+
+    MARKERS = [
+        ("Final Answer:", "final_answer"),
+        ("Action Input:", "action_input"),
+        ("Action:", "action"),
+        ("Thought:", "thought"),
+        ("Observation:", "observation")
+    ]
+    MARKER_LENGTH = max(len(marker) for marker, _ in MARKERS)
+    TEXT_FIELDS = ("thought", "final_answer", "observation")
+
+    def __init__(self):
+        self.values: Dict[str, Any] = {}
+        self._buffer = ""
+        self._pos = 0            # start of unprocessed text in _buffer
+        self._scan_from = 0      # unprocessed text before this offset holds no newline
+        self._line_open = False  # the head of the current line was already processed
+        self._field: Optional[str] = None
+        self._parts: List[str] = []
+        self._json: Optional[_JSONScanner] = None
+        self._closed = False
+
+    def feed(self, chunk: str) -> List[ParseEvent]:
+        if self._pos:
+            self._scan_from = max(0, self._scan_from - self._pos)
+        buffer = self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        events: List[ParseEvent] = []
+
+        while self._pos < len(buffer):
+            if self._json is not None:
+                self._pos = self._json.feed(buffer, self._pos)
+                if not self._json.done:
+                    break
+                events += self._complete()
+                # Whatever follows the object on its line belongs to no field
+                self._line_open = True
+                continue
+
+            newline = buffer.find("\n", max(self._pos, self._scan_from))
+            if newline >= 0:
+                line_start = self._pos
+                self._pos = newline + 1
+                self._scan_from = 0
+                events += self._process_line(buffer, line_start, newline, True)
+                continue
+
+            # Partial line: act early where we safely can, otherwise wait for more text
+            self._scan_from = len(buffer)
+            if self._line_open:
+                # Middle of a long line, no marker can start here
+                if self._field in self.TEXT_FIELDS:
+                    self._parts.append(buffer[self._pos:])
+                self._pos = len(buffer)
+                break
+            head = buffer[self._pos:self._pos + self.MARKER_LENGTH + 16].lstrip()
+            target = self._line_field(head)
+            if target == "action_input" and "{" in buffer[self._pos:]:
+                # Start on the JSON now instead of waiting for the end of the line
+                line_start = self._pos
+                self._pos = len(buffer)
+                events += self._process_line(buffer, line_start, len(buffer), False)
+                continue
+            # Preamble lines wait for their newline: "Thought:" may still appear mid-line
+            preamble = target is None and not self.values
+            if len(head) >= self.MARKER_LENGTH and target not in ("action", "action_input") and not preamble:
+                line_start = self._pos
+                self._pos = len(buffer)
+                events += self._process_line(buffer, line_start, len(buffer), False)
+                self._line_open = True
+            break
+
+        return events
+
+    def close(self) -> List[ParseEvent]:
+        """Flush the remaining text and complete the field in progress."""
+        if self._closed:
+            return []
+        events: List[ParseEvent] = []
+        if self._json is None and self._pos < len(self._buffer):
+            start = self._pos
+            self._pos = len(self._buffer)
+            events += self._process_line(self._buffer, start, len(self._buffer), False)
+        events += self._complete()
+        self._buffer = ""
+        self._pos = 0
+        self._closed = True
+        return events
+
+    def parse(self, text: str) -> ReactOutput:
+        self.feed(text)
+        self.close()
+        return self.result()
+
+    def result(self) -> ReactOutput:
+        final_answer = self.values.get("final_answer")
+        return ReactOutput(
+            thought=self.values.get("thought", ""),
+            action=self.values.get("action"),
+            action_input=self.values.get("action_input"),
+            final_answer=final_answer,
+            is_complete=final_answer is not None
+        )
+
+    def _line_field(self, head: str) -> Optional[str]:
+        """The field a line starting with `head` would feed."""
+        if self._field == "final_answer":
+            return self._field
+        for marker, field in self.MARKERS:
+            if head.startswith(marker):
+                return None if field in self.values else field
+        return self._field
+
+    def _process_line(self, buffer: str, start: int, end: int, newline: bool) -> List[ParseEvent]:
+        line_end = "\n" if newline else ""
+        if self._line_open:
+            # Tail of a line whose head was already handled
+            self._line_open = False
+            if self._field in self.TEXT_FIELDS:
+                self._parts.append(buffer[start:end] + line_end)
+            return []
+        if self._field == "final_answer":
+            self._parts.append(buffer[start:end] + line_end)
+            return []
+
+        events: List[ParseEvent] = []
+        line = buffer[start:end]
+        stripped = line.lstrip()
+        rest = line
+        for marker, field in self.MARKERS:
+            if stripped.startswith(marker):
+                events += self._complete()
+                # Later repeats of a field (e.g. a hallucinated second step) are ignored
+                self._field = None if field in self.values else field
+                rest = stripped[len(marker):]
+                break
+        else:
+            if self._field is None and not self.values:
+                # Like the regex parser, accept a first "Thought:" after other text on its line
+                thought = line.find("Thought:")
+                if thought >= 0:
+                    self._field = "thought"
+                    rest = line[thought + len("Thought:"):]
+
+        if self._field is None:
+            return events
+
+        if self._field == "action_input" and not self._parts:
+            brace = rest.find("{")
+            if brace >= 0:
+                json_start = end - len(rest) + brace
+                value, json_end = decode_json_object(buffer, json_start)
+                if value is not None:
+                    # Fast path: the whole object is already here
+                    self._pos = json_end
+                    self._line_open = True
+                    self._field = None
+                    self.values["action_input"] = value
+                    return events + [ParseEvent(field="action_input", value=value)]
+                # Incomplete so far: scan braces incrementally as chunks arrive
+                self._json = _JSONScanner()
+                self._pos = json_start
+                self._scan_from = 0
+                return events
+            if not rest.strip():
+                return events
+
+        self._parts.append(rest + line_end)
+        if self._field in ("action", "action_input") and rest.strip():
+            # Action names and non-JSON inputs are single lines
+            events += self._complete()
+        return events
+
+    def _complete(self) -> List[ParseEvent]:
+        field = self._field
+        if field is None:
+            return []
+
+        if field == "action_input":
+            if self._json is not None:
+                text = self._json.text
+                self._json = None
+            else:
+                text = "".join(self._parts).strip()
+            try:
+                value = json.loads(text)
+            except ValueError:
+                value = parse_first_json_object(text)
+            if not isinstance(value, dict):
+                value = None
+        else:
+            value = "".join(self._parts).strip()
+            if field == "action" and not value:
+                value = None
+
+        self._field = None
+        self._parts = []
+        if field == "observation":
+            return []
+        self.values[field] = value
+        return [ParseEvent(field=field, value=value)]
+
+async def parse_stream(chunks: AsyncIterator[str]) -> AsyncIterator[ParseEvent]:
+    """Parse a `stream_generate` iterator, yielding fields as they complete."""
+    parser = StreamingReactParser()
+    async for chunk in chunks:
+        for event in parser.feed(chunk):
+            yield event
+    for event in parser.close():
+        yield event
@@ -0,0 +1,224 @@
+import base64
+import math
+import os
+import re
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Exact OpenAI tokenization when tiktoken is installed (optional)
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# OpenAI chat format: every message is wrapped in a few control tokens,
+# and every reply is primed with the assistant header
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+class TokenCounter(ABC):
+    """
+    Pluggable token counter.
+    Counts are memoized per text segment (LRU), so repeated prompt segments,
+    tool descriptions and stored messages are only tokenized once.
+    """
+
+    def __init__(self, cache_size: int = 8192):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def _count(self, text: str) -> int:
+        """Tokenize `text` and return the token count (uncached)."""
+        pass
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        cached = self._cache.get(text)
+        if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end(text)
+            return cached
+        self.misses += 1
+        tokens = self._count(text)
+        self._cache[text] = tokens
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tokens
+
+    def count_message(self, message: Any) -> int:
+        """Tokens for one chat message (a Message or a {'role', 'content'} dict)."""
+        if isinstance(message, dict):
+            content = message.get("content") or ""
+        else:
+            content = message.content or ""
+        return self.count(str(content)) + TOKENS_PER_MESSAGE
+
+    def count_messages(self, messages: Iterable[Any]) -> int:
+        return sum(self.count_message(m) for m in messages) + TOKENS_PER_REPLY
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "counter": type(self).__name__,
+            "cached_segments": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class ApproximateTokenCounter(TokenCounter):
+    """
+    Fast estimate (~4 characters per token for English text and code).
+    """
+
+    def __init__(self, chars_per_token: float = 4.0, cache_size: int = 8192):
+        super().__init__(cache_size)
+        self.chars_per_token = chars_per_token
+
+    def _count(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+class BPETokenCounter(TokenCounter):
+    """
+    Offline byte-level BPE, compatible with tiktoken rank files.
+    Text is split GPT-style into pieces, and each piece is merged by lowest
+    rank. Pieces repeat constantly (words, indentation), so they are cached too.
+    """
+
+    # Approximation of cl100k_base's pattern using the stdlib `re` module
+    PATTERN = re.compile(
+        r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?(?:[^\s\w]|_)+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+    )
+
+    def __init__(self, ranks: Dict[bytes, int], cache_size: int = 8192, piece_cache_size: int = 65536):
+        super().__init__(cache_size)
+        self.ranks = ranks
+        self.piece_cache_size = piece_cache_size
+        self._piece_cache: Dict[bytes, int] = {}
+
+    @classmethod
+    def from_tiktoken_file(cls, path: str, **kwargs) -> "BPETokenCounter":
+        """Load a `.tiktoken` ranks file (base64 token and rank per line)."""
+        ranks: Dict[bytes, int] = {}
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    token, rank = line.split()
+                    ranks[base64.b64decode(token)] = int(rank)
+        return cls(ranks, **kwargs)
+
+    @classmethod
+    def train(cls, corpus: Iterable[str], num_merges: int = 1000, **kwargs) -> "BPETokenCounter":
+        """Learn `num_merges` merges from a corpus, starting from the 256 single bytes."""
+        ranks = {bytes([i]): i for i in range(256)}
+        words: Counter = Counter()
+        for text in corpus:
+            for piece in cls.PATTERN.findall(text):
+                words[tuple(bytes([b]) for b in piece.encode("utf-8"))] += 1
+
+        for _ in range(num_merges):
+            pairs: Counter = Counter()
+            for word, freq in words.items():
+                for pair in zip(word, word[1:]):
+                    pairs[pair] += freq
+            if not pairs:
+                break
+            (left, right), _ = pairs.most_common(1)[0]
+            merged = left + right
+            ranks[merged] = len(ranks)
+
+            new_words: Counter = Counter()
+            for word, freq in words.items():
+                parts: List[bytes] = []
+                i = 0
+                while i < len(word):
+                    if i < len(word) - 1 and word[i] == left and word[i + 1] == right:
+                        parts.append(merged)
+                        i += 2
+                    else:
+                        parts.append(word[i])
+                        i += 1
+                new_words[tuple(parts)] += freq
+            words = new_words
+
+        return cls(ranks, **kwargs)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            for token, rank in sorted(self.ranks.items(), key=lambda item: item[1]):
+                f.write(base64.b64encode(token) + b" " + str(rank).encode() + b"\n")
+
+    def _merge(self, piece: bytes) -> List[bytes]:
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best_rank: Optional[int] = None
+            best_index = -1
+            for i in range(len(parts) - 1):
+                rank = self.ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+                    best_index = i
+            if best_rank is None:
+                break
+            parts[best_index:best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+        return parts
+
+    def _count_piece(self, piece: bytes) -> int:
+        if piece in self.ranks:
+            return 1
+        cached = self._piece_cache.get(piece)
+        if cached is None:
+            cached = len(self._merge(piece))
+            if len(self._piece_cache) >= self.piece_cache_size:
+                self._piece_cache.clear()
+            self._piece_cache[piece] = cached
+        return cached
+
+    def _count(self, text: str) -> int:
+        return sum(self._count_piece(piece.encode("utf-8")) for piece in self.PATTERN.findall(text))
+
+class TiktokenCounter(TokenCounter):
+    """
+    Exact counts for OpenAI models via the optional tiktoken package.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base", cache_size: int = 8192):
+        if tiktoken is None:
+            raise ImportError("tiktoken is not installed. Install with: pip install tiktoken")
+        super().__init__(cache_size)
+        self.encoding = tiktoken.get_encoding(encoding)
+
+    def _count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+_default_counter: Optional[TokenCounter] = None
+
+def get_token_counter() -> TokenCounter:
+    """
+    Return the process-wide token counter.
+    Uses a BPE rank file from TOKENIZER_FILE if set, tiktoken if installed,
+    and the approximate counter otherwise.
+    """
+    global _default_counter
+    if _default_counter is None:
+        tokenizer_file = os.environ.get("TOKENIZER_FILE")
+        if tokenizer_file:
+            _default_counter = BPETokenCounter.from_tiktoken_file(tokenizer_file)
+        elif tiktoken is not None:
+            try:
+                _default_counter = TiktokenCounter()
+            except Exception:
+                # tiktoken fetches its rank files on first use; stay usable offline
+                _default_counter = ApproximateTokenCounter()
+        else:
+            _default_counter = ApproximateTokenCounter()
+    return _default_counter
+
+def set_token_counter(counter: TokenCounter) -> None:
+    global _default_counter
+    _default_counter = counter
@@ -0,0 +1,136 @@
+import math
+from typing import List, Optional, Tuple
+import numpy as np
+
+class _InvertedList:
+    """Growable contiguous block of (row id, unit vector) pairs for one cluster."""
+
+    def __init__(self, dim: int, capacity: int = 16):
+        self.size = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        needed = self.size + len(ids)
+        if needed > len(self.ids):
+            capacity = max(needed, 2 * len(self.ids))
+            grown_ids = np.empty(capacity, dtype=np.int64)
+            grown_ids[:self.size] = self.ids[:self.size]
+            grown_vectors = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+            grown_vectors[:self.size] = self.vectors[:self.size]
+            self.ids, self.vectors = grown_ids, grown_vectors
+        self.ids[self.size:needed] = ids
+        self.vectors[self.size:needed] = vectors
+        self.size = needed
+
+class IVFFlatIndex:
+    """
+    Inverted-file index over unit vectors (cosine similarity), in pure NumPy.
+    Vectors are clustered by spherical k-means into `nlist` lists; a query
+    scans only the `nprobe` lists whose centroids are closest. Raising
+    `nprobe` trades latency for recall (nprobe == nlist is exact).
+    New vectors are appended to their nearest list without retraining.
+    """
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        kmeans_iterations: int = 10,
+        training_sample: int = 64,
+        seed: int = 0
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.kmeans_iterations = kmeans_iterations
+        self.training_sample = training_sample  # points per centroid used for k-means
+        self.seed = seed
+        self.reset()
+
+    def reset(self) -> None:
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[_InvertedList] = []
+        self.trained_size = 0
+        self.size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def _assign(self, vectors: np.ndarray, batch: int = 8192) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), batch):
+            block = vectors[start:start + batch]
+            assignments[start:start + batch] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Build centroids and inverted lists from all current vectors (row id = position)."""
+        n, dim = vectors.shape
+        nlist = self.nlist or max(1, int(4 * math.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+
+        sample_size = min(n, nlist * self.training_sample)
+        sample = vectors[rng.choice(n, sample_size, replace=False)] if sample_size < n else vectors
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+
+        self.centroids = centroids
+        self.lists = [_InvertedList(dim) for _ in range(nlist)]
+        self.size = 0
+        self.add(np.arange(n, dtype=np.int64), vectors)
+        self.trained_size = n
+
+    def build(self, vectors: np.ndarray) -> "IVFFlatIndex":
+        """
+        A new index with these settings, trained over `vectors`. This one is
+        left untouched, so the build can run in a worker thread while it serves.
+        """
+        index = IVFFlatIndex(self.nlist, self.nprobe, self.kmeans_iterations, self.training_sample, self.seed)
+        index.train(vectors)
+        return index
+
+    def adopt(self, other: "IVFFlatIndex") -> None:
+        """Swap in the centroids and inverted lists of an index from `build`."""
+        self.centroids, self.lists = other.centroids, other.lists
+        self.trained_size, self.size = other.trained_size, other.size
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        assignments = self._assign(vectors)
+        order = np.argsort(assignments, kind="stable")
+        sorted_lists = assignments[order]
+        boundaries = np.flatnonzero(np.diff(sorted_lists)) + 1
+        for group in np.split(order, boundaries):
+            if len(group):
+                self.lists[assignments[group[0]]].add(ids[group], vectors[group])
+        self.size += len(ids)
+
+    def search(self, query: np.ndarray, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(row ids, scores) of the approximate top k for a unit query, best first."""
+        nprobe = min(nprobe or self.nprobe, len(self.lists))
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < len(self.lists) else range(len(self.lists))
+
+        ids, scores = [], []
+        for probe in probes:
+            inverted = self.lists[probe]
+            if inverted.size:
+                ids.append(inverted.ids[:inverted.size])
+                scores.append(inverted.vectors[:inverted.size] @ query)
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids = np.concatenate(ids)
+        scores = np.concatenate(scores)
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return ids[order], scores[order]
@@ -0,0 +1,200 @@
+import asyncio
+import builtins
+import itertools
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .base import BaseMemory
+from .protocol import BATCH, CALL, OK, ProtocolError, frame, read_frame
+from .server import DEFAULT_SOCKET
+
+class MemoryServerError(RuntimeError):
+    """An exception raised by the memory server that has no builtin equivalent here."""
+
+def _remote_error(name: str, message: str) -> Exception:
+    """Re-raise server errors as the same builtin type where possible (ValueError, KeyError, ...)."""
+    error_type = getattr(builtins, name, None)
+    if isinstance(error_type, type) and issubclass(error_type, Exception):
+        return error_type(message)
+    return MemoryServerError(f"{name}: {message}")
+
+class MemoryClient:
+    """
+    One pipelined connection to a MemoryServer.
+    Calls return as soon as their frame is queued; any number can be in
+    flight and replies are matched by request id. Frames queued in the same
+    event loop turn go out in one write.
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET):
+        self.path = path
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._outbox: List[bytes] = []
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self.stats = {"calls": 0, "batches": 0, "writes": 0}
+
+    async def connect(self) -> None:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+                self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        error: Exception = ConnectionError("Memory server closed the connection")
+        try:
+            while True:
+                request_id, status, value = await read_frame(self._reader)
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if status == OK:
+                    future.set_result(value)
+                else:
+                    future.set_exception(_remote_error(*value))
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError) as e:
+            if isinstance(e, ProtocolError):
+                error = e
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            if self._writer is not None:
+                self._writer.close()
+
+    def _flush(self) -> None:
+        if self._outbox and self._writer is not None and not self._writer.is_closing():
+            self._writer.write(b"".join(self._outbox))
+            self.stats["writes"] += 1
+        self._outbox.clear()
+
+    async def _request(self, opcode: int, payload: Any) -> Any:
+        if self._writer is None or self._writer.is_closing():
+            await self.connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        if not self._outbox:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self._outbox.append(frame(request_id, opcode, payload))
+        if self._writer.transport.get_write_buffer_size() > 2**20:
+            await self._writer.drain()
+        return await future
+
+    async def call(self, target: str, method: str, *args, **kwargs) -> Any:
+        self.stats["calls"] += 1
+        return await self._request(CALL, [target, method, list(args), kwargs])
+
+    async def batch(self, calls: Sequence[Tuple[str, str, Sequence[Any], Dict[str, Any]]]) -> List[Any]:
+        """
+        Run several calls in one round trip, in order. Returns their results;
+        the first failed call's error is raised after all have run.
+        """
+        self.stats["batches"] += 1
+        outcomes = await self._request(BATCH, [[target, method, list(args), kwargs] for target, method, args, kwargs in calls])
+        for ok, value in outcomes:
+            if not ok:
+                raise _remote_error(*value)
+        return [value for _, value in outcomes]
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+        self._writer = self._reader_task = None
+
+class RemoteMemory(BaseMemory):
+    """
+    One memory tier of a MemoryServer, with that tier's interface (every
+    method is async here, and pydantic results arrive as dicts), plus
+    `store_many` and `retrieve_many`, which send a whole batch in one frame.
+    """
+
+    def __init__(self, client: MemoryClient, tier: str):
+        self.client = client
+        self.tier = tier
+
+    async def store(self, *args, **kwargs) -> None:
+        await self.client.call(self.tier, "store", *args, **kwargs)
+
+    async def retrieve(self, *args, **kwargs) -> List[Dict]:
+        return await self.client.call(self.tier, "retrieve", *args, **kwargs)
+
+    async def clear(self) -> None:
+        await self.client.call(self.tier, "clear")
+
+    async def store_many(self, items: Sequence[Sequence[Any]]) -> None:
+        """Store every (positional arguments...) tuple in `items` in one round trip."""
+        await self.client.batch([(self.tier, "store", list(item), {}) for item in items])
+
+    async def retrieve_many(self, queries: Sequence[Any], k: int = 5, **kwargs) -> List[List[Dict]]:
+        return await self.client.batch([(self.tier, "retrieve", [query, k], kwargs) for query in queries])
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        async def call(*args, **kwargs):
+            return await self.client.call(self.tier, method, *args, **kwargs)
+        return call
+
+class RemoteMemoryManager:
+    """
+    Drop-in for MemoryManager, backed by a shared MemoryServer: every
+    process using the same socket sees the same memories. Tiers are
+    RemoteMemory proxies. Background consolidation runs in the server
+    process while it serves, so `start_consolidation` and
+    `stop_consolidation` do nothing here; `consolidate` runs a pass there now.
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET):
+        self.client = MemoryClient(path)
+        self.short_term = RemoteMemory(self.client, "short_term")
+        self.long_term = RemoteMemory(self.client, "long_term")
+        self.episodic = RemoteMemory(self.client, "episodic")
+        self.vector_store = RemoteMemory(self.client, "vector_store")
+
+    async def remember(self, content: Any, role: str = None, memory_type: str = "auto", metadata: Optional[Dict] = None) -> None:
+        await self.client.call("manager", "remember", content, role, memory_type, metadata)
+
+    async def add_episode(self, task: str, steps: List[Dict], success: bool, final_answer: str, duration: float) -> int:
+        return await self.client.call("manager", "add_episode", task, steps, success, final_answer, duration)
+
+    async def recall(
+        self,
+        query: str,
+        memory_types: List[str] = ["short_term", "long_term", "episodic", "vector"],
+        k: int = 5,
+        query_embedding: Optional[Any] = None,
+        weights: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        return await self.client.call("manager", "recall", query, memory_types, k, query_embedding, weights)
+
+    async def flush(self) -> None:
+        await self.client.call("manager", "flush")
+
+    async def consolidate(self) -> Dict[str, int]:
+        return await self.client.call("manager", "consolidate")
+
+    def start_consolidation(self) -> None:
+        pass
+
+    async def stop_consolidation(self) -> None:
+        # Other clients still rely on the server's consolidation
+        pass
+
+    async def clear_all(self) -> None:
+        await self.client.call("manager", "clear_all")
+
+    async def close(self) -> None:
+        await self.client.close()
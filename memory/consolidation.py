@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from llm.provider import Message
+from .retention import RetentionPolicy
+from .vector_store import VectorStoreMemory
+
+Summarizer = Callable[[List[Message]], Awaitable[str]]
+
+async def summarize_turns(messages: List[Message], max_chars: int = 2000) -> str:
+    """Extractive summary, one clipped line per turn; pass an LLM-backed summarizer for real ones."""
+    lines = [f"{message.role}: {' '.join(str(message.content or '').split())[:200]}" for message in messages]
+    return "\n".join(lines)[:max_chars]
+
+class MemoryConsolidator:
+    """
+    Background maintenance for a MemoryManager.
+    A pass condenses aging short-term turns into a long-term summary fact,
+    merges duplicate facts and redundant episodes, tombstones near-identical
+    vectors, and enforces each tier's RetentionPolicy ("facts",
+    "experiences", "episodes", "vectors").
+    Work is incremental: each step touches at most `batch_size` rows and
+    resumes from where the previous pass stopped, steps are separated by
+    `pause` seconds, and vector similarity, eviction scans and compaction
+    run in worker threads, so agent reads and writes (which share the SQLite
+    writer) are never queued behind a long maintenance transaction.
+    """
+
+    def __init__(
+        self,
+        manager: Any,
+        retention: Optional[Dict[str, RetentionPolicy]] = None,
+        interval: float = 60.0,
+        batch_size: int = 500,
+        pause: float = 0.01,
+        short_term_keep: int = 20,
+        summarizer: Optional[Summarizer] = None,
+        vector_threshold: float = 0.98,
+        compact_ratio: float = 0.25
+    ):
+        self.manager = manager
+        self.retention = retention or {}
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.short_term_keep = short_term_keep
+        self.summarizer = summarizer or summarize_turns
+        self.vector_threshold = vector_threshold
+        self.compact_ratio = compact_ratio
+        self._cursors = {"facts": 0, "episodes": 0, "vectors": 0}
+        self._task: Optional[asyncio.Task] = None
+        self._warned = False
+        self.stats: Dict[str, int] = {"passes": 0, "errors": 0}
+
+    async def run_once(self) -> Dict[str, int]:
+        """One incremental pass over every tier; returns what it changed."""
+        memory = self.manager
+        done = {"summarized_turns": await self._summarize_short_term()}
+        await asyncio.sleep(self.pause)
+
+        self._cursors["facts"], done["facts_merged"] = await memory.long_term.merge_duplicates(
+            self._cursors["facts"], self.batch_size
+        )
+        await asyncio.sleep(self.pause)
+        self._cursors["episodes"], done["episodes_merged"] = await memory.episodic.merge_duplicates(
+            self._cursors["episodes"], self.batch_size
+        )
+        await asyncio.sleep(self.pause)
+        done["vectors_merged"] = await self._merge_vectors()
+
+        evictions = {
+            "facts": memory.long_term.evict,
+            "experiences": memory.long_term.evict_experiences,
+            "episodes": memory.episodic.evict
+        }
+        for tier, evict in evictions.items():
+            if tier in self.retention:
+                await asyncio.sleep(self.pause)
+                done[f"{tier}_evicted"] = await evict(self.retention[tier], self.batch_size)
+
+        store = memory.vector_store
+        if not isinstance(store, VectorStoreMemory) and not self._warned:
+            self._warned = True
+            logging.warning(
+                f"Memory consolidation skips vector deduplication, eviction and compaction: {type(store).__name__} does not support them"
+            )
+        if isinstance(store, VectorStoreMemory):
+            if "vectors" in self.retention:
+                await asyncio.sleep(self.pause)
+                done["vectors_evicted"] = await self._evict_vectors(self.retention["vectors"])
+            # Tombstones still cost scan time; past `compact_ratio` of the rows, rebuild without them
+            if store.row_count and store.row_count - len(store) > self.compact_ratio * store.row_count:
+                done["vectors_compacted"] = await store.compact()
+                self._cursors["vectors"] = 0
+
+        self.stats["passes"] += 1
+        for key, value in done.items():
+            self.stats[key] = self.stats.get(key, 0) + value
+        return done
+
+    async def _summarize_short_term(self) -> int:
+        short_term = self.manager.short_term
+        excess = len(short_term.messages) - self.short_term_keep
+        if excess <= 0:
+            return 0
+        # System messages frame the conversation; they stay in the window
+        turns = [message for message in short_term.messages if message.role != "system"][:excess]
+        if not turns:
+            return 0
+        summary = await self.summarizer(turns)
+        await self.manager.long_term.store(
+            f"conversation_summary:{datetime.now().isoformat()}",
+            summary,
+            {"source": "short_term", "turns": len(turns)}
+        )
+        short_term.discard(turns)
+        return len(turns)
+
+    async def _merge_vectors(self) -> int:
+        store = self.manager.vector_store
+        if not isinstance(store, VectorStoreMemory):
+            return 0
+        start = self._cursors["vectors"]
+        stop = start + self.batch_size
+        generation = store.generation
+        duplicates = await asyncio.to_thread(store.near_duplicates, start, stop, self.vector_threshold)
+        if store.generation != generation:
+            # Cleared or compacted meanwhile: these row ids no longer mean the same rows
+            self._cursors["vectors"] = 0
+            return 0
+        self._cursors["vectors"] = stop if stop < store.row_count else 0
+        return store.delete(duplicates)
+
+    async def _evict_vectors(self, policy: RetentionPolicy) -> int:
+        store = self.manager.vector_store
+        generation = store.generation
+        victims = await asyncio.to_thread(store.eviction_candidates, policy, self.batch_size)
+        if store.generation != generation:
+            return 0
+        return store.delete(victims)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Memory consolidation pass failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Run a pass every `interval` seconds in the background, until `stop`."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "running": self._task is not None and not self._task.done()}
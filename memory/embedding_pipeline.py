@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional, Set
+import numpy as np
+from llm.embeddings import EmbeddingProvider
+from storage.sqlite import get_database
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache in SQLite, keyed by a hash of (model, text).
+    Vectors are stored as raw float32 bytes.
+    """
+
+    def __init__(self, path: str = "agent_memory.db"):
+        self.path = path
+        self.db = get_database(path)
+        self.db.write_sync(lambda conn: conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                key TEXT PRIMARY KEY,
+                vector BLOB
+            )
+        """))
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+    async def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        def get_many(conn: sqlite3.Connection) -> Dict[str, np.ndarray]:
+            found = {}
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            return found
+        return await self.db.read(get_many)
+
+    async def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+        await self.db.write(lambda conn: conn.executemany(
+            "INSERT OR IGNORE INTO embedding_cache (key, vector) VALUES (?, ?)", rows
+        ))
+
+    async def clear(self) -> None:
+        await self.db.execute("DELETE FROM embedding_cache")
+
+class EmbeddingPipeline:
+    """
+    Micro-batching, caching front end for an EmbeddingProvider.
+    Texts are queued and sent as one request once `batch_size` are waiting
+    or `max_delay` seconds after the first one, whichever comes first.
+    Cached texts never reach the provider, and identical texts in flight
+    share one request. `submit` is write-behind: it returns at once and
+    the vector is stored into the target memory when the batch completes;
+    `drain` waits for all of that work.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        cache: Optional[EmbeddingCache] = None,
+        batch_size: int = 64,
+        max_delay: float = 0.02,
+        max_concurrency: int = 4
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[str, str] = {}            # key -> text, waiting for a batch
+        self._futures: Dict[str, asyncio.Future] = {}  # key -> result, until resolved
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"requests": 0, "batches": 0, "embedded": 0, "cache_hits": 0, "deduplicated": 0, "errors": 0}
+
+    def _enqueue(self, text: str) -> asyncio.Future:
+        self.stats["requests"] += 1
+        key = EmbeddingCache.key(self.provider.name, text)
+        future = self._futures.get(key)
+        if future is not None:
+            self.stats["deduplicated"] += 1
+            return future
+        loop = asyncio.get_running_loop()
+        future = self._futures[key] = loop.create_future()
+        self._pending[key] = text
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self._track(self._run(batch))
+
+    def _track(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[str, str]) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        keys = list(batch)
+        try:
+            vectors = await self.cache.get_many(keys) if self.cache else {}
+            self.stats["cache_hits"] += len(vectors)
+            missing = [key for key in keys if key not in vectors]
+            if missing:
+                async with self._semaphore:
+                    embedded = await self.provider.embed([batch[key] for key in missing])
+                self.stats["batches"] += 1
+                self.stats["embedded"] += len(missing)
+                fresh = dict(zip(missing, embedded))
+                if self.cache:
+                    await self.cache.put_many(fresh)
+                vectors.update(fresh)
+        except Exception as e:
+            self.stats["errors"] += 1
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._futures.pop(key)
+            if not future.done():
+                future.set_result(vectors[key])
+
+    async def embed(self, text: str, urgent: bool = False) -> np.ndarray:
+        """
+        Embedding for one text, batched with whatever else is queued.
+        `urgent` sends the batch now instead of waiting out `max_delay`,
+        for callers (like a query) that are blocked on the result.
+        """
+        future = self._enqueue(text)
+        if urgent:
+            self._flush()
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        return np.stack(await asyncio.gather(*(self._enqueue(text) for text in texts)))
+
+    def submit(self, text: str, memory: Any, metadata: Optional[Dict] = None) -> None:
+        """Queue `text` and store it into `memory` (a vector store) once embedded."""
+        self._track(self._store(self._enqueue(text), text, memory, metadata))
+
+    async def _store(self, future: asyncio.Future, text: str, memory: Any, metadata: Optional[Dict]) -> None:
+        try:
+            await memory.store(text, await future, metadata)
+        except Exception as e:
+            logging.error(f"Embedding write-behind failed: {e}")
+
+    async def drain(self) -> None:
+        """Flush the queue and wait until every submitted text has been stored."""
+        while self._pending or self._tasks:
+            self._flush()
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "queued": len(self._pending), "in_flight": len(self._tasks)}
@@ -1,32 +1,113 @@
+import asyncio
 import sqlite3
 import json
-from typing import Any, List, Dict, Optional
+import zlib
+from typing import Any, List, Dict, Optional, Tuple
 from datetime import datetime
 from .base import BaseMemory
+from .fts import ensure_fts_index, search_rows
+from .retention import RetentionPolicy, digest, evict_rows, merge_duplicate_rows
+from storage.sqlite import ensure_columns, get_database
+
+# zstd compresses faster and smaller than zlib (pip install zstandard)
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+SUMMARY_COLUMNS = ["id", "task", "success", "final_answer", "duration", "step_count", "timestamp"]
+
+def compress_steps(steps: List[Dict]) -> tuple:
+    """(codec, blob) for a step list."""
+    data = json.dumps(steps, separators=(",", ":")).encode()
+    if ZSTD_AVAILABLE:
+        return "zstd", zstandard.ZstdCompressor(level=6).compress(data)
+    return "zlib", zlib.compress(data, 6)
+
+def decompress_steps(codec: str, blob: bytes) -> List[Dict]:
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Episode steps were compressed with zstd; pip install zstandard to read them")
+        return json.loads(zstandard.ZstdDecompressor().decompress(blob))
+    return json.loads(zlib.decompress(blob))
 
 class Episode(BaseMemory):
     """
     Experience replay system for learning from past actions.
+    Episodes are searched by relevance through an FTS5 index over the task
+    and final answer (BM25, prefix matching).
+    The step history, the bulk of an episode, is stored compressed in its
+    own table: searches return lightweight summaries and steps are loaded
+    on demand with `get_steps` (or `include_steps=True`).
+    Retrievals count accesses per episode, which retention uses to evict
+    the least used episodes first.
     """
-    
+
     def __init__(self, db_path: str = "agent_memory.db"):
         self.db_path = db_path
-        self._init_db()
-        
-    def _init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS episodes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    task TEXT,
-                    steps TEXT,
-                    success BOOLEAN,
-                    final_answer TEXT,
-                    duration REAL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        self.db = get_database(db_path)
+        self.fts_enabled = self.db.write_sync(self._init_db)
+
+    def _init_db(self, conn: sqlite3.Connection) -> bool:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS episodes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT,
+                steps TEXT,
+                success BOOLEAN,
+                final_answer TEXT,
+                duration REAL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS episode_steps (
+                episode_id INTEGER PRIMARY KEY REFERENCES episodes(id),
+                codec TEXT,
+                data BLOB
+            )
+        """)
+        ensure_columns(conn, "episodes", {
+            "step_count": "INTEGER",
+            "access_count": "INTEGER DEFAULT 0",
+            "last_access": "DATETIME",
+            "digest": "TEXT",
+            "task_digest": "TEXT"
+        })
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_episodes_timestamp ON episodes(timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_episodes_success_timestamp ON episodes(success, timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_episodes_access ON episodes(access_count, last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_episodes_digest ON episodes(digest)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_episodes_task_digest ON episodes(task_digest, success)")
+        rows = conn.execute("SELECT id, task FROM episodes WHERE task_digest IS NULL").fetchall()
+        conn.executemany(
+            "UPDATE episodes SET task_digest = ? WHERE id = ?", [(digest(task), episode_id) for episode_id, task in rows]
+        )
+        # Evicted or merged episodes take their steps with them
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS episodes_steps_delete AFTER DELETE ON episodes BEGIN
+                DELETE FROM episode_steps WHERE episode_id = old.id;
+            END
+        """)
+        self._migrate_inline_steps(conn)
+        return ensure_fts_index(conn, "episodes", ["task", "final_answer"], rowid="id")
+
+    @staticmethod
+    def _migrate_inline_steps(conn: sqlite3.Connection, batch: int = 500) -> None:
+        """Move JSON step histories written by older versions into compressed episode_steps rows."""
+        while True:
+            rows = conn.execute("SELECT id, steps FROM episodes WHERE steps IS NOT NULL LIMIT ?", (batch,)).fetchall()
+            if not rows:
+                return
+            for episode_id, steps_json in rows:
+                steps = json.loads(steps_json) or []
+                conn.execute(
+                    "INSERT OR REPLACE INTO episode_steps (episode_id, codec, data) VALUES (?, ?, ?)",
+                    (episode_id, *compress_steps(steps))
                 )
-            """)
-            
+                conn.execute("UPDATE episodes SET steps = NULL, step_count = ? WHERE id = ?", (len(steps), episode_id))
+
     async def store_episode(
         self,
         task: str,
@@ -35,34 +116,107 @@ class Episode(BaseMemory):
         final_answer: str,
         duration: float
     ) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "INSERT INTO episodes (task, steps, success, final_answer, duration) VALUES (?, ?, ?, ?, ?)",
-                (task, json.dumps(steps), success, final_answer, duration)
+        # Serializing megabytes of steps would stall the event loop, and the writer thread is shared
+        codec, blob = await asyncio.to_thread(compress_steps, steps)
+
+        def insert(conn: sqlite3.Connection) -> int:
+            episode_id = conn.execute(
+                """INSERT INTO episodes (task, success, final_answer, duration, step_count, digest, task_digest)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (task, success, final_answer, duration, len(steps), digest(task, bool(success), final_answer), digest(task))
+            ).lastrowid
+            conn.execute(
+                "INSERT INTO episode_steps (episode_id, codec, data) VALUES (?, ?, ?)",
+                (episode_id, codec, blob)
             )
-            return cursor.lastrowid
-            
+            return episode_id
+        return await self.db.write(insert)
+
     async def store(self, key: str, value: Any, metadata: Optional[Dict] = None) -> None:
         # Generic store if needed
         pass
 
-    async def retrieve(self, query: str, k: int = 5) -> List[Dict]:
-        """Find episodes by task similarity (basic keyword search)."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT task, steps, success, final_answer FROM episodes WHERE task LIKE ? ORDER BY timestamp DESC LIMIT ?",
+    async def get_steps(self, episode_id: int) -> List[Dict]:
+        """Full step history of one episode ([] if unknown)."""
+        def load(conn: sqlite3.Connection) -> List[Dict]:
+            row = conn.execute("SELECT codec, data FROM episode_steps WHERE episode_id = ?", (episode_id,)).fetchone()
+            return decompress_steps(*row) if row else []
+        return await self.db.read(load)
+
+    async def retrieve(self, query: str, k: int = 5, include_steps: bool = False) -> List[Dict]:
+        """Summaries of episodes whose task or answer matches the query's words, most relevant first."""
+        episodes = await self.db.read(lambda conn: self._retrieve(conn, query, k, include_steps))
+        if episodes:
+            ids = [(episode["id"],) for episode in episodes]
+            self.db.write_nowait(lambda conn: conn.executemany(
+                "UPDATE episodes SET access_count = access_count + 1, last_access = CURRENT_TIMESTAMP WHERE id = ?", ids
+            ))
+        return episodes
+
+    def _retrieve(self, conn: sqlite3.Connection, query: str, k: int, include_steps: bool = False) -> List[Dict]:
+        if self.fts_enabled:
+            found = search_rows(conn, "episodes", SUMMARY_COLUMNS, query, k, rowid="id")
+        else:
+            found = conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)}, 0.0 FROM episodes WHERE task LIKE ? ORDER BY timestamp DESC LIMIT ?",
                 (f"%{query}%", k)
-            )
-            return [
-                {
-                    "task": row[0],
-                    "steps": json.loads(row[1]),
-                    "success": bool(row[2]),
-                    "final_answer": row[3]
-                }
-                for row in cursor.fetchall()
-            ]
+            ).fetchall()
+        episodes = [self._summary(row[:-1], score=row[-1]) for row in found]
+        if include_steps and episodes:
+            # Every episode's steps in one query, on the same reader
+            ids = [episode["id"] for episode in episodes]
+            steps = {
+                episode_id: decompress_steps(codec, data)
+                for episode_id, codec, data in conn.execute(
+                    f"SELECT episode_id, codec, data FROM episode_steps WHERE episode_id IN ({','.join('?' * len(ids))})", ids
+                )
+            }
+            for episode in episodes:
+                episode["steps"] = steps.get(episode["id"], [])
+        return episodes
+
+    @staticmethod
+    def _summary(row: tuple, **extra) -> Dict:
+        summary = dict(zip(SUMMARY_COLUMNS, row))
+        summary["success"] = bool(summary["success"])
+        return {**summary, **extra}
+
+    async def find_successful(self, task: str) -> Optional[Dict]:
+        """Summary of the most recent successful episode of the same task (up to case and whitespace)."""
+        row = await self.db.fetchone(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM episodes WHERE task_digest = ? AND success = 1 ORDER BY id DESC LIMIT 1",
+            (digest(task),)
+        )
+        return self._summary(row) if row else None
+
+    async def list_episodes(self, success: Optional[bool] = None, limit: int = 10) -> List[Dict]:
+        """Most recent episode summaries, optionally only successes or failures."""
+        where, params = ("WHERE success = ?", (success,)) if success is not None else ("", ())
+        rows = await self.db.fetchall(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM episodes {where} ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (*params, limit)
+        )
+        return [self._summary(row) for row in rows]
+
+    async def evict(self, policy: RetentionPolicy, limit: int = 200) -> int:
+        """Delete up to `limit` episodes breaking `policy`, least accessed (then least recently) first."""
+        return await self.db.write(lambda conn: evict_rows(
+            conn, "episodes", policy, limit, least_used="access_count, last_access, timestamp", rowid="id"
+        ))
+
+    async def merge_duplicates(self, after: int = 0, limit: int = 200) -> Tuple[int, int]:
+        """
+        Merge redundant episodes (same task, outcome and answer up to case and
+        whitespace) into the most recent one.
+        Scans `limit` episodes past the `after` cursor; returns (next cursor, merged).
+        """
+        return await self.db.write(lambda conn: merge_duplicate_rows(
+            conn, "episodes", ["task", "success", "final_answer"], lambda row: digest(row[0], bool(row[1]), row[2]),
+            after, limit, keep="id DESC", rowid="id"
+        ))
 
     async def clear(self) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        def clear(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM episode_steps")
             conn.execute("DELETE FROM episodes")
+        await self.db.write(clear)
@@ -0,0 +1,154 @@
+from typing import Any, Dict, Hashable, List, Optional
+import numpy as np
+
+Filter = Dict[str, Any]
+
+_RANGE_OPERATORS = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal
+}
+_OPERATORS = {"$eq", "$ne", "$in", "$nin", "$exists"} | set(_RANGE_OPERATORS)
+
+def _key(value: Any) -> Hashable:
+    # True == 1 in a dict; keep booleans apart from numbers
+    return ("bool", value) if isinstance(value, bool) else value
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+class _Postings:
+    """Row ids for one (field, value), appended in order and exposed as an array."""
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self._array: Optional[np.ndarray] = None
+
+    def add(self, row: int) -> None:
+        self.ids.append(row)
+        self._array = None
+
+    def array(self) -> np.ndarray:
+        if self._array is None:
+            self._array = np.array(self.ids, dtype=np.int64)
+        return self._array
+
+class MetadataIndex:
+    """
+    Inverted index from metadata values to row ids, for filtered vector search.
+    Filters are MongoDB-style dicts:
+        {"source": "web"}                          equality
+        {"tenant": {"$in": ["a", "b"]}}            set membership ($nin negates)
+        {"timestamp": {"$gte": 10, "$lt": 20}}     numeric ranges
+        {"$or": [{...}, {...}]}, {"$and": [...]}   combinations
+    plus $eq, $ne and $exists. A list value is indexed per element, so
+    {"tags": "x"} matches any entry whose tags contain "x".
+    Numeric fields also get a dense float64 column for vectorized ranges.
+    A match is returned as a boolean row mask (a bitset over the store).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.size = 0
+        self._postings: Dict[str, Dict[Hashable, _Postings]] = {}
+        self._present: Dict[str, _Postings] = {}
+        self._numeric: Dict[str, np.ndarray] = {}
+
+    def add(self, row: int, metadata: Dict[str, Any]) -> None:
+        """Index a row; rows must be added in order."""
+        for field, value in metadata.items():
+            self._present.setdefault(field, _Postings()).add(row)
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            for item in values:
+                try:
+                    key = _key(item)
+                    postings = self._postings.setdefault(field, {}).get(key)
+                except TypeError:
+                    continue  # unhashable values (nested dicts) are stored but not indexed
+                if postings is None:
+                    postings = self._postings[field][key] = _Postings()
+                postings.add(row)
+            if _is_number(value):
+                self._set_numeric(field, row, float(value))
+        self.size = row + 1
+
+    def _set_numeric(self, field: str, row: int, value: float) -> None:
+        column = self._numeric.get(field)
+        if column is None or row >= len(column):
+            capacity = max(1024, 2 * row + 2)
+            grown = np.full(capacity, np.nan)
+            if column is not None:
+                grown[:len(column)] = column
+            column = self._numeric[field] = grown
+        column[row] = value
+
+    def match(self, filter: Filter, size: Optional[int] = None) -> np.ndarray:
+        """Boolean mask over the first `size` rows of the entries matching `filter`."""
+        size = self.size if size is None else size
+        mask = np.ones(size, dtype=bool)
+        for field, condition in filter.items():
+            if field == "$and":
+                for clause in condition:
+                    mask &= self.match(clause, size)
+            elif field == "$or":
+                union = np.zeros(size, dtype=bool)
+                for clause in condition:
+                    union |= self.match(clause, size)
+                mask &= union
+            elif field.startswith("$"):
+                raise ValueError(f"Unknown filter operator: {field}")
+            elif isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+                for operator, operand in condition.items():
+                    mask &= self._condition(field, operator, operand, size)
+            else:
+                mask &= self._condition(field, "$eq", condition, size)
+        return mask
+
+    def _rows(self, ids: np.ndarray, size: int) -> np.ndarray:
+        mask = np.zeros(size, dtype=bool)
+        # Postings are ascending, so rows added after `size` sit at the tail
+        mask[ids[:np.searchsorted(ids, size)]] = True
+        return mask
+
+    def _values(self, field: str, values: List[Any], size: int) -> np.ndarray:
+        postings = self._postings.get(field, {})
+        mask = np.zeros(size, dtype=bool)
+        for value in values:
+            try:
+                found = postings.get(_key(value))
+            except TypeError:
+                raise ValueError(f"Cannot filter {field!r} on unhashable value {value!r}")
+            if found is not None:
+                mask |= self._rows(found.array(), size)
+        return mask
+
+    def _condition(self, field: str, operator: str, operand: Any, size: int) -> np.ndarray:
+        if operator not in _OPERATORS:
+            raise ValueError(f"Unknown filter operator: {operator}")
+        if operator == "$eq":
+            return self._values(field, [operand], size)
+        if operator == "$ne":
+            return ~self._values(field, [operand], size)
+        if operator in ("$in", "$nin"):
+            if not isinstance(operand, (list, tuple, set)):
+                raise ValueError(f"{operator} expects a list, got {operand!r}")
+            mask = self._values(field, list(operand), size)
+            return mask if operator == "$in" else ~mask
+        if operator == "$exists":
+            present = self._present.get(field)
+            mask = self._rows(present.array(), size) if present else np.zeros(size, dtype=bool)
+            return mask if operand else ~mask
+        if not _is_number(operand):
+            raise ValueError(f"{operator} on {field!r} expects a number, got {operand!r}")
+        column = self._numeric.get(field)
+        if column is None:
+            return np.zeros(size, dtype=bool)
+        values = column[:size]
+        mask = np.zeros(size, dtype=bool)
+        # NaN (missing or non-numeric) compares false, so those rows never match
+        with np.errstate(invalid="ignore"):
+            mask[:len(values)] = _RANGE_OPERATORS[operator](values, operand)
+        return mask
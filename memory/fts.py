@@ -0,0 +1,144 @@
+import re
+import sqlite3
+from typing import List, Tuple
+
+def _probe_fts5() -> bool:
+    try:
+        with sqlite3.connect(":memory:") as conn:
+            conn.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+# Some SQLite builds ship without FTS5; callers fall back to LIKE scans
+FTS5_AVAILABLE = _probe_fts5()
+
+_TERM = re.compile(r"\w+")
+
+def _terms(text: str) -> List[str]:
+    return list(dict.fromkeys(term.lower() for term in _TERM.findall(text)))
+
+def _phrase(term: str, prefix: bool) -> str:
+    # Quoted, so FTS5 operators and punctuation in the input are inert
+    return f'"{term}"*' if prefix else f'"{term}"'
+
+def search(
+    conn: sqlite3.Connection,
+    table: str,
+    text: str,
+    k: int,
+    prefix: bool = True,
+    max_df: float = 0.05,
+    min_rows: int = 5000
+) -> List[Tuple[int, float]]:
+    """
+    (rowid, score) of the k best matches for free text in `<table>_fts`,
+    best first; scores are negated BM25, so higher is better.
+    BM25 has to score every matching row, and a term found in many rows
+    carries little weight anyway, so words matching more than `max_df` of
+    the table are treated as stopwords: they are dropped from ranking, and
+    a query made only of them returns its most recent matches. Words are
+    matched as prefixes unless that alone would cross the same limit.
+    Tables under `min_rows` are cheap to score in full, so there every word
+    is ranked by BM25 (as a prefix with `prefix`).
+    Rows containing every remaining word are ranked first; rows with any
+    of them fill up the rest.
+    """
+    fts = f"{table}_fts"
+    terms = _terms(text)
+    if not terms or k <= 0:
+        return []
+    # Rows in the index itself (max(rowid) overcounts once rows are deleted)
+    total = conn.execute(f"SELECT count(*) FROM {fts}_docsize").fetchone()[0]
+    if total < min_rows:
+        phrases = [_phrase(term, prefix) for term in terms]
+    else:
+        cap = max(k, int(max_df * total))
+        # Exact phrases are read incrementally, so counting up to the cap stays cheap;
+        # prefix phrases are expanded in full, so they are only probed for rare words
+        probe = f"SELECT count(*) FROM (SELECT 1 FROM {fts} WHERE {fts} MATCH ? LIMIT ?)"
+        phrases = []
+        for term in terms:
+            if conn.execute(probe, (_phrase(term, False), cap + 1)).fetchone()[0] > cap:
+                continue
+            as_prefix = prefix and conn.execute(probe, (_phrase(term, True), cap + 1)).fetchone()[0] <= cap
+            phrases.append(_phrase(term, as_prefix))
+    if not phrases:
+        rows = conn.execute(
+            f"SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY rowid DESC LIMIT ?",
+            (" AND ".join(_phrase(term, False) for term in terms), k)
+        ).fetchall()
+        return [(row[0], 0.0) for row in rows]
+
+    ranked = f"SELECT rowid, -rank FROM {fts} WHERE {fts} MATCH ? ORDER BY rank LIMIT ?"
+    results = conn.execute(ranked, (" AND ".join(phrases), k)).fetchall()
+    if len(results) < k and len(phrases) > 1:
+        seen = {row[0] for row in results}
+        for row in conn.execute(ranked, (" OR ".join(phrases), k + len(results))):
+            if row[0] not in seen and len(results) < k:
+                results.append(row)
+    return [(row[0], row[1]) for row in results]
+
+def search_rows(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: List[str],
+    text: str,
+    k: int,
+    rowid: str = "rowid"
+) -> List[tuple]:
+    """`search`, returning each match's `columns` with its score appended."""
+    matches = search(conn, table, text, k)
+    if not matches:
+        return []
+    rows = {
+        row[0]: row[1:]
+        for row in conn.execute(
+            f"SELECT {rowid}, {', '.join(columns)} FROM {table} WHERE {rowid} IN ({','.join('?' * len(matches))})",
+            [match for match, _ in matches]
+        )
+    }
+    return [rows[match] + (score,) for match, score in matches if match in rows]
+
+def ensure_fts_index(conn: sqlite3.Connection, table: str, columns: List[str], rowid: str = "rowid") -> bool:
+    """
+    Create `<table>_fts`, an external-content FTS5 index over `columns`,
+    with triggers keeping it in sync with inserts, updates and deletes.
+    A database created before the index existed is migrated by rebuilding
+    the index from the table once. Returns False when FTS5 is unavailable.
+    """
+    if not FTS5_AVAILABLE:
+        return False
+    fts = f"{table}_fts"
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)).fetchone()
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+        USING fts5({names}, content='{table}', content_rowid='{rowid}', prefix='2 3')
+    """)
+    # REPLACE conflict resolution deletes rows without firing delete triggers,
+    # so writers must upsert (ON CONFLICT ... DO UPDATE) to keep the index in sync
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {names}) VALUES (new.{rowid}, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.{rowid}, {old_values});
+        END
+    """)
+    # Only updates of indexed columns reindex the row (not access bookkeeping);
+    # recreated so databases with the older, unconditional trigger pick this up
+    conn.execute(f"DROP TRIGGER IF EXISTS {fts}_update")
+    conn.execute(f"""
+        CREATE TRIGGER {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.{rowid}, {old_values});
+            INSERT INTO {fts}(rowid, {names}) VALUES (new.{rowid}, {new_values});
+        END
+    """)
+    if not exists:
+        conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    return True
@@ -1,64 +1,138 @@
 import sqlite3
 import json
-from typing import Any, List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 from .base import BaseMemory
+from .fts import ensure_fts_index, search_rows
+from .retention import RetentionPolicy, digest, evict_rows, merge_duplicate_rows
+from storage.sqlite import ensure_columns, get_database
+
+# The FTS index maps to facts by id, so it needs a declared key that VACUUM cannot renumber
+FACTS_TABLE = """
+    CREATE TABLE {if_not_exists} facts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        key TEXT UNIQUE,
+        value TEXT,
+        metadata TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        access_count INTEGER DEFAULT 0,
+        last_access DATETIME,
+        digest TEXT
+    )
+"""
 
 class LongTermMemory(BaseMemory):
     """
     Persistent key-value store using SQLite.
+    Facts are searched by relevance through an FTS5 index over key and value
+    (BM25, prefix matching), falling back to substring scans without FTS5.
+    Retrievals count accesses per fact, which retention uses to evict the
+    least used facts first.
     """
-    
+
     def __init__(self, db_path: str = "agent_memory.db"):
         self.db_path = db_path
-        self._init_db()
-        
-    def _init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS facts (
-                    key TEXT PRIMARY KEY,
-                    value TEXT,
-                    metadata TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS experiences (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    task TEXT,
-                    outcome TEXT,
-                    details TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-    async def store(self, key: str, value: Any, metadata: Optional[Dict] = None) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO facts (key, value, metadata) VALUES (?, ?, ?)",
-                (key, json.dumps(value), json.dumps(metadata or {}))
+        self.db = get_database(db_path)
+        self.fts_enabled = self.db.write_sync(self._init_db)
+
+    def _init_db(self, conn: sqlite3.Connection) -> bool:
+        conn.execute(FACTS_TABLE.format(if_not_exists="IF NOT EXISTS"))
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS experiences (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT,
+                outcome TEXT,
+                details TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
             )
-            
+        """)
+        ensure_columns(conn, "facts", {"access_count": "INTEGER DEFAULT 0", "last_access": "DATETIME", "digest": "TEXT"})
+        self._migrate_fact_ids(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_timestamp ON facts(timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_access ON facts(access_count, last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_digest ON facts(digest)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_experiences_timestamp ON experiences(timestamp)")
+        return ensure_fts_index(conn, "facts", ["key", "value"], rowid="id")
+
+    def _migrate_fact_ids(self, conn: sqlite3.Connection) -> None:
+        """
+        Rebuild a facts table keyed only by `key` (whose implicit rowids VACUUM
+        may renumber) with an explicit id, keeping each fact's current rowid.
+        The FTS index over the old rowids is dropped and rebuilt.
+        """
+        if "id" in {row[1] for row in conn.execute("PRAGMA table_info(facts)")}:
+            return
+        columns = "key, value, metadata, timestamp, access_count, last_access, digest"
+        conn.execute("ALTER TABLE facts RENAME TO facts_unkeyed")
+        conn.execute("DROP TABLE IF EXISTS facts_fts")
+        conn.execute(FACTS_TABLE.format(if_not_exists=""))
+        conn.execute(f"INSERT INTO facts (id, {columns}) SELECT rowid, {columns} FROM facts_unkeyed")
+        conn.execute("DROP TABLE facts_unkeyed")
+
+    async def store(self, key: str, value: Any, metadata: Optional[Dict] = None) -> None:
+        await self.db.execute(
+            """
+            INSERT INTO facts (key, value, metadata, digest) VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value,
+                metadata = excluded.metadata,
+                digest = excluded.digest,
+                timestamp = CURRENT_TIMESTAMP
+            """,
+            (key, json.dumps(value), json.dumps(metadata or {}), digest(key, value))
+        )
+
     async def retrieve(self, query: str, k: int = 5) -> List[Dict]:
-        """Simple prefix/exact match retrieval for key-value facts."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT key, value, metadata FROM facts WHERE key LIKE ? LIMIT ?",
+        """Facts matching the query's words (as prefixes), most relevant first."""
+        facts = await self.db.read(lambda conn: self._retrieve(conn, query, k))
+        if facts:
+            keys = [(fact["key"],) for fact in facts]
+            self.db.write_nowait(lambda conn: conn.executemany(
+                "UPDATE facts SET access_count = access_count + 1, last_access = CURRENT_TIMESTAMP WHERE key = ?", keys
+            ))
+        return facts
+
+    def _retrieve(self, conn: sqlite3.Connection, query: str, k: int) -> List[Dict]:
+        if self.fts_enabled:
+            found = search_rows(conn, "facts", ["key", "value", "metadata"], query, k, rowid="id")
+        else:
+            found = conn.execute(
+                "SELECT key, value, metadata, 0.0 FROM facts WHERE key LIKE ? LIMIT ?",
                 (f"%{query}%", k)
-            )
-            return [
-                {"key": row[0], "value": json.loads(row[1]), "metadata": json.loads(row[2])}
-                for row in cursor.fetchall()
-            ]
-            
+            ).fetchall()
+        return [
+            {"key": row[0], "value": json.loads(row[1]), "metadata": json.loads(row[2]), "score": row[3]}
+            for row in found
+        ]
+
     async def store_experience(self, task: str, outcome: str, details: Dict) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT INTO experiences (task, outcome, details) VALUES (?, ?, ?)",
-                (task, outcome, json.dumps(details))
-            )
-            
+        await self.db.execute(
+            "INSERT INTO experiences (task, outcome, details) VALUES (?, ?, ?)",
+            (task, outcome, json.dumps(details))
+        )
+
+    async def evict(self, policy: RetentionPolicy, limit: int = 500) -> int:
+        """Delete up to `limit` facts breaking `policy`, least accessed (then least recently) first."""
+        return await self.db.write(lambda conn: evict_rows(
+            conn, "facts", policy, limit, least_used="access_count, last_access, timestamp", rowid="id"
+        ))
+
+    async def evict_experiences(self, policy: RetentionPolicy, limit: int = 500) -> int:
+        """Delete up to `limit` experiences breaking `policy`, oldest first."""
+        return await self.db.write(lambda conn: evict_rows(conn, "experiences", policy, limit, least_used="id", rowid="id"))
+
+    async def merge_duplicates(self, after: int = 0, limit: int = 500) -> Tuple[int, int]:
+        """
+        Merge facts whose key and value are equal up to case, whitespace and
+        separators, keeping the most accessed (then most recent) one.
+        Scans `limit` facts past the `after` cursor; returns (next cursor, merged).
+        """
+        return await self.db.write(lambda conn: merge_duplicate_rows(
+            conn, "facts", ["key", "value"], lambda row: digest(row[0], json.loads(row[1])),
+            after, limit, keep="access_count DESC, timestamp DESC, id DESC", rowid="id"
+        ))
+
     async def clear(self) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        def clear(conn: sqlite3.Connection) -> None:
             conn.execute("DELETE FROM facts")
             conn.execute("DELETE FROM experiences")
+        await self.db.write(clear)
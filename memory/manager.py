@@ -1,20 +1,68 @@
-from typing import Any, List, Dict, Optional
+import asyncio
+import time
+from typing import Any, Awaitable, List, Dict, Optional
 from .short_term import ShortTermMemory
 from .long_term import LongTermMemory
 from .episodic import Episode
 from .vector_store import VectorStoreMemory
+from .segment_store import SegmentVectorStore
+from .embedding_pipeline import EmbeddingCache, EmbeddingPipeline
+from .consolidation import MemoryConsolidator, Summarizer
+from .retention import RetentionPolicy
+from llm.embeddings import EmbeddingProvider
+
+DEFAULT_RECALL_TIMEOUT = 2.0  # seconds per tier
 
 class MemoryManager:
     """
     Central memory coordinator.
     Routes queries to appropriate memory types and manages consolidation.
+    `recall` queries every tier concurrently, each under its own timeout, and
+    fuses their rankings with weighted reciprocal rank fusion (RRF).
+    `start_consolidation` runs a MemoryConsolidator in the background, which
+    summarizes, deduplicates and applies the `retention` policies. With a
+    persistent `vector_store_path`, vectors are never deduplicated or
+    evicted, so a "vectors" retention policy is rejected.
     """
+
+    RRF_K = 60  # damps the advantage of top ranks; 60 is the usual RRF constant
     
-    def __init__(self, db_path: str = "agent_memory.db"):
+    def __init__(
+        self,
+        db_path: str = "agent_memory.db",
+        vector_store_path: Optional[str] = None,
+        embedder: Optional[EmbeddingProvider] = None,
+        embedding_batch_size: int = 64,
+        embedding_max_delay: float = 0.02,
+        recall_weights: Optional[Dict[str, float]] = None,
+        recall_timeouts: Optional[Dict[str, float]] = None,
+        retention: Optional[Dict[str, RetentionPolicy]] = None,
+        consolidation_interval: float = 60.0,
+        summarizer: Optional[Summarizer] = None
+    ):
+        if vector_store_path and retention and "vectors" in retention:
+            # Segments are append-only: nothing there could enforce the policy
+            raise ValueError("Vector retention needs the in-memory vector store; it is not supported with vector_store_path")
         self.short_term = ShortTermMemory()
         self.long_term = LongTermMemory(db_path)
         self.episodic = Episode(db_path)
-        self.vector_store = VectorStoreMemory()
+        # With a path, vectors persist in memory-mapped segments across restarts
+        self.vector_store = SegmentVectorStore(vector_store_path) if vector_store_path else VectorStoreMemory()
+        # With an embedder, remembered text is also indexed in the vector store, in the background
+        self.embeddings = EmbeddingPipeline(
+            embedder,
+            cache=EmbeddingCache(db_path),
+            batch_size=embedding_batch_size,
+            max_delay=embedding_max_delay
+        ) if embedder else None
+        self.recall_weights = recall_weights or {}
+        self.recall_timeouts = recall_timeouts or {}
+        self.consolidator = MemoryConsolidator(
+            self,
+            retention=retention,
+            interval=consolidation_interval,
+            summarizer=summarizer
+        )
         
     async def remember(
         self,
@@ -32,6 +80,23 @@ class MemoryManager:
         if memory_type == "long_term" or memory_type == "auto":
             if isinstance(content, dict) and "key" in content:
                 await self.long_term.store(content["key"], content["value"], metadata)
+
+        if self.embeddings and memory_type in ("vector", "auto"):
+            text = self._text(content)
+            if text:
+                # Write-behind: embedding latency stays off the agent loop
+                self.embeddings.submit(text, self.vector_store, metadata)
+
+    @staticmethod
+    def _text(content: Any) -> str:
+        if isinstance(content, dict) and "key" in content:
+            return f"{content['key']}: {content['value']}"
+        return content if isinstance(content, str) else ""
+
+    async def flush(self) -> None:
+        """Wait until every pending embedding has reached the vector store."""
+        if self.embeddings:
+            await self.embeddings.drain()
                 
     async def add_episode(
         self,
@@ -47,25 +112,88 @@ class MemoryManager:
         self,
         query: str,
         memory_types: List[str] = ["short_term", "long_term", "episodic", "vector"],
-        k: int = 5
+        k: int = 5,
+        query_embedding: Optional[Any] = None,
+        weights: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
-        results = {}
-        
-        if "short_term" in memory_types:
-            results["short_term"] = await self.short_term.retrieve(query, k)
-            
-        if "long_term" in memory_types:
-            results["long_term"] = await self.long_term.retrieve(query, k)
-            
-        if "episodic" in memory_types:
-            results["episodic"] = await self.episodic.retrieve(query, k)
+        """
+        Per-tier results under each tier's name, plus:
+          "fused":   one list ranked by weighted RRF across tiers
+          "latency": seconds each tier took (up to its timeout)
+          "errors":  tiers that timed out or failed, with the reason
+        The query is embedded at most once, only for the vector tier;
+        pass `query_embedding` to skip that.
+        """
+        lookups = {
+            "short_term": lambda: self.short_term.retrieve(query, k),
+            "long_term": lambda: self.long_term.retrieve(query, k),
+            "episodic": lambda: self.episodic.retrieve(query, k),
+            "vector": lambda: self._vector_recall(query, query_embedding, k)
+        }
+        tiers = [tier for tier in memory_types if tier in lookups]
+        outcomes = await asyncio.gather(*(self._timed(tier, lookups[tier]()) for tier in tiers))
 
-        if "vector" in memory_types:
-            results["vector"] = await self.vector_store.retrieve(query, k)
-            
+        results: Dict[str, Any] = {"latency": {}, "errors": {}}
+        for tier, (items, latency, error) in zip(tiers, outcomes):
+            results[tier] = items
+            results["latency"][tier] = latency
+            if error:
+                results["errors"][tier] = error
+        results["fused"] = self._fuse({tier: results[tier] for tier in tiers}, {**self.recall_weights, **(weights or {})}, k)
         return results
 
+    async def _vector_recall(self, query: Any, query_embedding: Optional[Any], k: int) -> List[Dict]:
+        if query_embedding is None:
+            if not (self.embeddings and isinstance(query, str)):
+                return await self.vector_store.retrieve(query, k)
+            query_embedding = await self.embeddings.embed(query, urgent=True)
+        return await self.vector_store.retrieve(query_embedding, k)
+
+    async def _timed(self, tier: str, lookup: Awaitable[List[Dict]]):
+        """(results, seconds, error) for one tier; a slow or failing tier yields no results."""
+        start = time.perf_counter()
+        try:
+            items = await asyncio.wait_for(lookup, self.recall_timeouts.get(tier, DEFAULT_RECALL_TIMEOUT))
+            return items, time.perf_counter() - start, None
+        except asyncio.TimeoutError:
+            return [], time.perf_counter() - start, "timeout"
+        except Exception as e:
+            return [], time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+    @staticmethod
+    def _recall_text(tier: str, item: Dict) -> str:
+        """What an item says, so the same memory found by several tiers fuses into one entry."""
+        if tier == "long_term":
+            return f"{item['key']}: {item['value']}"
+        if tier == "episodic":
+            return item["task"]
+        return str(item.get("content", ""))
+
+    def _fuse(self, ranked: Dict[str, List[Dict]], weights: Dict[str, float], k: int) -> List[Dict]:
+        fused: Dict[str, Dict] = {}
+        for tier, items in ranked.items():
+            weight = weights.get(tier, 1.0)
+            # Short-term memory returns the window oldest first; the newest message ranks first
+            ordered = list(reversed(items)) if tier == "short_term" else items
+            for rank, item in enumerate(ordered, start=1):
+                text = self._recall_text(tier, item)
+                entry = fused.setdefault(text, {"content": text, "score": 0.0, "sources": {}, "item": item})
+                entry["score"] += weight / (self.RRF_K + rank)
+                entry["sources"][tier] = rank
+        return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)[:k]
+
+    async def consolidate(self) -> Dict[str, int]:
+        """Run one consolidation pass now."""
+        return await self.consolidator.run_once()
+
+    def start_consolidation(self) -> None:
+        self.consolidator.start()
+
+    async def stop_consolidation(self) -> None:
+        await self.consolidator.stop()
+
     async def clear_all(self) -> None:
+        await self.flush()
         await self.short_term.clear()
         await self.long_term.clear()
         await self.episodic.clear()
@@ -0,0 +1,96 @@
+import json
+import struct
+from typing import Any, List, Tuple
+import numpy as np
+from pydantic import BaseModel
+
+# Frame: body length, request id, opcode (requests) or status (responses)
+HEADER = struct.Struct("!IIB")
+# Body: array count, each array (dtype code, ndim, dims, raw data), then the JSON document
+ARRAY_COUNT = struct.Struct("!H")
+ARRAY_HEADER = struct.Struct("!BB")
+MAX_FRAME = 256 * 2**20
+
+CALL = 1   # [target, method, args, kwargs] -> result
+BATCH = 2  # [[target, method, args, kwargs], ...] -> [[ok, result or error], ...]
+
+OK = 0
+ERROR = 1
+
+DTYPES = {1: np.dtype(np.float32), 2: np.dtype(np.float64), 3: np.dtype(np.int64)}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+class ProtocolError(Exception):
+    pass
+
+def encode(value: Any) -> bytes:
+    """
+    Serialize a JSON-like value. numpy arrays travel as raw binary blocks
+    (referenced from the JSON as {"$array": i}); numpy scalars and pydantic
+    models become plain JSON values.
+    """
+    arrays: List[np.ndarray] = []
+
+    def default(obj: Any) -> Any:
+        if isinstance(obj, np.ndarray):
+            if obj.dtype not in DTYPE_CODES:
+                obj = obj.astype(np.float64 if obj.dtype.kind == "f" else np.int64)
+            arrays.append(obj)
+            return {"$array": len(arrays) - 1}
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, BaseModel):
+            return obj.model_dump()
+        if isinstance(obj, (set, tuple)):
+            return list(obj)
+        raise TypeError(f"Cannot send {type(obj).__name__} to the memory server")
+
+    document = json.dumps(value, default=default, separators=(",", ":")).encode()
+    parts = [ARRAY_COUNT.pack(len(arrays))]
+    for array in arrays:
+        parts.append(ARRAY_HEADER.pack(DTYPE_CODES[array.dtype], array.ndim))
+        parts.append(struct.pack(f"!{array.ndim}I", *array.shape))
+        parts.append(np.ascontiguousarray(array).tobytes())
+    parts.append(document)
+    return b"".join(parts)
+
+def decode(body: bytes) -> Any:
+    """Inverse of `encode`; a malformed body raises ProtocolError."""
+    try:
+        return _decode(body)
+    except (struct.error, KeyError, IndexError, TypeError, ValueError) as e:
+        # ValueError covers bad JSON, bad UTF-8 and arrays cut short
+        raise ProtocolError(f"Malformed frame body: {type(e).__name__}: {e}") from e
+
+def _decode(body: bytes) -> Any:
+    view = memoryview(body)
+    (count,), offset = ARRAY_COUNT.unpack_from(view), ARRAY_COUNT.size
+    arrays = []
+    for _ in range(count):
+        code, ndim = ARRAY_HEADER.unpack_from(view, offset)
+        offset += ARRAY_HEADER.size
+        shape = struct.unpack_from(f"!{ndim}I", view, offset)
+        offset += 4 * ndim
+        dtype = DTYPES[code]
+        size = int(np.prod(shape)) * dtype.itemsize
+        # Views into the frame, no copy (read-only)
+        arrays.append(np.frombuffer(view[offset:offset + size], dtype=dtype).reshape(shape))
+        offset += size
+
+    def hook(obj: dict) -> Any:
+        if len(obj) == 1 and "$array" in obj:
+            return arrays[obj["$array"]]
+        return obj
+
+    return json.loads(bytes(view[offset:]), object_hook=hook)
+
+def frame(request_id: int, code: int, value: Any) -> bytes:
+    body = encode(value)
+    return HEADER.pack(len(body), request_id, code) + body
+
+async def read_frame(reader) -> Tuple[int, int, Any]:
+    """(request id, opcode or status, value) of the next frame on an asyncio StreamReader."""
+    length, request_id, code = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame of {length} bytes exceeds the {MAX_FRAME} byte limit")
+    return request_id, code, decode(await reader.readexactly(length))
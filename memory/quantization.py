@@ -0,0 +1,176 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+import numpy as np
+
+class Quantizer(ABC):
+    """
+    Compressed representation for unit vectors.
+    Vectors are buffered at full precision until `train_size` have been seen,
+    then the quantizer is trained and only codes are kept in memory. Scores
+    use asymmetric distance computation (ADC): the query stays float32 and is
+    compared with the codes directly, without decompressing the store.
+    """
+
+    def __init__(self, train_size: int):
+        self.train_size = train_size
+        self.is_trained = False
+
+    @abstractmethod
+    def train(self, vectors: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, dim) float32 -> (n, code_size) uint8."""
+        pass
+
+    @abstractmethod
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Approximate inner products between a float32 query and every code row."""
+        pass
+
+    @property
+    @abstractmethod
+    def code_size(self) -> int:
+        """Bytes per encoded vector."""
+        pass
+
+class ScalarQuantizer(Quantizer):
+    """
+    8-bit scalar quantization with a per-dimension range: 4x smaller than float32.
+    ADC folds the per-dimension scale into the query, so scoring is one
+    (blocked) product between the uint8 codes and a float32 vector.
+    """
+
+    BLOCK = 2048  # rows converted to float32 at a time; small enough to stay in cache
+
+    def __init__(self, train_size: int = 1000):
+        super().__init__(train_size)
+        self.low: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+
+    def train(self, vectors: np.ndarray) -> None:
+        self.low = vectors.min(axis=0).astype(np.float32)
+        high = vectors.max(axis=0).astype(np.float32)
+        self.scale = np.maximum(high - self.low, 1e-12) / 255.0
+        self.is_trained = True
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.low + codes.astype(np.float32) * self.scale
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        weights = (query * self.scale).astype(np.float32)
+        offset = float(query @ self.low)
+        scores = np.empty(len(codes), dtype=np.float32)
+        buffer = np.empty((min(self.BLOCK, len(codes)), codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(codes), self.BLOCK):
+            block = codes[start:start + self.BLOCK]
+            np.copyto(buffer[:len(block)], block)
+            scores[start:start + len(block)] = buffer[:len(block)] @ weights
+        return scores + offset
+
+    @property
+    def code_size(self) -> int:
+        return len(self.low) if self.low is not None else 0
+
+class ProductQuantizer(Quantizer):
+    """
+    Product quantization: each vector is split into `m` sub-vectors, and each
+    sub-vector is replaced by the id of its nearest of 256 trained centroids,
+    so a vector costs `m` bytes. ADC builds an (m, 256) table of query /
+    centroid inner products and sums table lookups per code row.
+    """
+
+    def __init__(
+        self,
+        m: Optional[int] = None,
+        train_size: int = 8192,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        super().__init__(train_size)
+        self.m = m
+        self.ksub = 256
+        self.iterations = iterations
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None  # (m, ksub, dsub)
+
+    @staticmethod
+    def _default_m(dim: int) -> int:
+        # ~16 dimensions per byte, and m must divide the dimension
+        m = max(1, dim // 16)
+        while dim % m:
+            m -= 1
+        return m
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.reshape(len(vectors), self.m, -1)
+
+    def train(self, vectors: np.ndarray) -> None:
+        dim = vectors.shape[1]
+        self.m = self.m or self._default_m(dim)
+        if dim % self.m:
+            raise ValueError(f"Dimension {dim} is not divisible into {self.m} sub-vectors")
+        rng = np.random.default_rng(self.seed)
+        ksub = min(self.ksub, len(vectors))
+        sub_vectors = self._split(vectors.astype(np.float32))
+
+        # All subspaces are trained together as one batch of k-means problems
+        data = np.ascontiguousarray(sub_vectors.transpose(1, 0, 2))  # (m, n, dsub)
+        centroids = np.stack([data[j, rng.choice(len(vectors), ksub, replace=False)] for j in range(self.m)])
+        # Flat (subspace, centroid) bucket ids let bincount sum every subspace at once
+        bucket_base = (np.arange(self.m) * ksub)[:, None]
+        for _ in range(self.iterations):
+            buckets = (self._nearest(data, centroids) + bucket_base).ravel()
+            counts = np.bincount(buckets, minlength=self.m * ksub).reshape(self.m, ksub)
+            sums = np.stack([
+                np.bincount(buckets, weights=data[:, :, d].ravel(), minlength=self.m * ksub)
+                for d in range(data.shape[2])
+            ], axis=1).reshape(self.m, ksub, -1)
+            filled = counts > 0
+            # Empty clusters keep their previous centroid
+            centroids[filled] = (sums[filled] / counts[filled][:, None]).astype(np.float32)
+
+        codebooks = np.zeros((self.m, self.ksub, dim // self.m), dtype=np.float32)
+        codebooks[:, :ksub] = centroids
+        # Unused code slots duplicate a real centroid so they are never closer
+        codebooks[:, ksub:] = centroids[:, :1]
+        self.codebooks = codebooks
+        self.is_trained = True
+
+    @staticmethod
+    def _nearest(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Nearest centroid per subspace: (m, n, dsub) x (m, ksub, dsub) -> (m, n)."""
+        # argmin |x - c|^2 == argmax (x.c - |c|^2 / 2)
+        half_norms = 0.5 * np.sum(centroids ** 2, axis=2)[:, None, :]
+        return np.argmax(data @ centroids.transpose(0, 2, 1) - half_norms, axis=2)
+
+    def encode(self, vectors: np.ndarray, block: int = 1024) -> np.ndarray:
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for start in range(0, len(vectors), block):
+            sub_vectors = self._split(vectors[start:start + block].astype(np.float32)).transpose(1, 0, 2)
+            codes[start:start + block] = self._nearest(sub_vectors, self.codebooks).T
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.codebooks[np.arange(self.m), codes].reshape(len(codes), -1)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # (m, ksub) lookup table of query . centroid for every subspace
+        table = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.m, -1).astype(np.float32))
+        scores = np.zeros(len(codes), dtype=np.float32)
+        for j in range(self.m):
+            scores += table[j][codes[:, j]]
+        return scores
+
+    @property
+    def code_size(self) -> int:
+        return self.m or 0
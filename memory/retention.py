@@ -0,0 +1,91 @@
+import hashlib
+import sqlite3
+from typing import Any, Callable, Optional, Sequence, Tuple
+from pydantic import BaseModel
+
+class RetentionPolicy(BaseModel):
+    """How long the rows of one memory tier live, and how many are kept."""
+    ttl: Optional[float] = None     # seconds since a row was last written
+    max_rows: Optional[int] = None  # past this, the least used rows are evicted
+
+def normalize(value: Any) -> str:
+    """Case-, whitespace- and separator-insensitive form of a value, for duplicate detection."""
+    return " ".join(str(value).lower().replace("_", " ").replace("-", " ").split())
+
+def digest(*parts: Any) -> str:
+    """Short hash identifying near-identical rows (equal once normalized)."""
+    return hashlib.sha1("\0".join(normalize(part) for part in parts).encode()).hexdigest()[:16]
+
+def evict_rows(
+    conn: sqlite3.Connection,
+    table: str,
+    policy: RetentionPolicy,
+    limit: int,
+    least_used: str,
+    rowid: str = "rowid"
+) -> int:
+    """
+    Delete up to `limit` rows of `table` that break `policy`: expired rows
+    first, then, while the table is over `max_rows`, rows in `least_used`
+    order (an ORDER BY clause). Returns how many were deleted.
+    """
+    deleted = 0
+    if policy.ttl is not None:
+        deleted += conn.execute(
+            f"""DELETE FROM {table} WHERE {rowid} IN (
+                SELECT {rowid} FROM {table} WHERE timestamp < datetime('now', ?) LIMIT ?
+            )""",
+            (f"-{policy.ttl} seconds", limit)
+        ).rowcount
+    if policy.max_rows is not None and deleted < limit:
+        excess = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] - policy.max_rows
+        if excess > 0:
+            deleted += conn.execute(
+                f"DELETE FROM {table} WHERE {rowid} IN (SELECT {rowid} FROM {table} ORDER BY {least_used} LIMIT ?)",
+                (min(excess, limit - deleted),)
+            ).rowcount
+    return deleted
+
+def merge_duplicate_rows(
+    conn: sqlite3.Connection,
+    table: str,
+    sources: Sequence[str],
+    digest_of: Callable[[tuple], str],
+    after: int,
+    limit: int,
+    keep: str,
+    rowid: str = "rowid"
+) -> Tuple[int, int]:
+    """
+    Merge rows sharing a `digest` column value, scanning `limit` rows past
+    `after` (a rowid cursor). Missing digests are backfilled from the
+    `sources` columns with `digest_of`. In each group, the first row in
+    `keep` order (an ORDER BY clause) survives and inherits the group's
+    access_count; the others are deleted.
+    Returns (cursor for the next call, 0 once the table is done; rows merged away).
+    """
+    rows = conn.execute(
+        f"SELECT {rowid}, digest, {', '.join(sources)} FROM {table} WHERE {rowid} > ? ORDER BY {rowid} LIMIT ?",
+        (after, limit)
+    ).fetchall()
+    if not rows:
+        return 0, 0
+    missing = [(digest_of(row[2:]), row[0]) for row in rows if row[1] is None]
+    conn.executemany(f"UPDATE {table} SET digest = ? WHERE {rowid} = ?", missing)
+    digests = {row[1] for row in rows if row[1] is not None} | {value for value, _ in missing}
+    duplicated = conn.execute(
+        f"SELECT digest FROM {table} WHERE digest IN ({','.join('?' * len(digests))}) GROUP BY digest HAVING COUNT(*) > 1",
+        list(digests)
+    ).fetchall()
+    merged = 0
+    for (value,) in duplicated:
+        group = conn.execute(
+            f"SELECT {rowid}, access_count FROM {table} WHERE digest = ? ORDER BY {keep}", (value,)
+        ).fetchall()
+        conn.execute(
+            f"UPDATE {table} SET access_count = ? WHERE {rowid} = ?",
+            (sum(count or 0 for _, count in group), group[0][0])
+        )
+        conn.executemany(f"DELETE FROM {table} WHERE {rowid} = ?", [(row,) for row, _ in group[1:]])
+        merged += len(group) - 1
+    return (rows[-1][0] if len(rows) == limit else 0), merged
@@ -0,0 +1,552 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from .base import BaseMemory
+from .filters import Filter
+from .vector_store import Embedding
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+class _Segment:
+    """
+    One segment on disk:
+      <name>.f32    unit vectors, float32, row-major (count, dim)
+      <name>.norms  original vector lengths, float32
+      <name>.meta   one JSON line per record: {"c": content, "m": metadata}
+      <name>.idx    int64 byte offset of each record in .meta
+    Sealed segments are immutable and memory-mapped read-only (all four
+    files), so every process that opens the store shares the same pages of
+    the OS cache, and open maps stay readable after a merge unlinks them.
+    `readers` counts searches in progress; a retired segment is only closed
+    once it drops to zero.
+    """
+
+    EXTENSIONS = (".f32", ".norms", ".meta", ".idx")
+
+    def __init__(self, directory: str, name: str, dim: int):
+        self.directory = directory
+        self.name = name
+        self.dim = dim
+        self.count = 0
+        self.vectors: np.ndarray = np.empty((0, dim), dtype=np.float32)
+        self.norms: np.ndarray = np.empty(0, dtype=np.float32)
+        self.offsets: np.ndarray = np.empty(0, dtype=np.int64)
+        self.readers = 0
+        self._meta: Optional[mmap.mmap] = None
+
+    def path(self, extension: str) -> str:
+        return os.path.join(self.directory, self.name + extension)
+
+    def _rows_on_disk(self) -> int:
+        """Complete records on disk; a torn append at the tail is ignored."""
+        sizes = [os.path.getsize(self.path(ext)) if os.path.exists(self.path(ext)) else 0 for ext in (".f32", ".norms", ".idx")]
+        return min(sizes[0] // (4 * self.dim), sizes[1] // 4, sizes[2] // 8)
+
+    def open_mapped(self) -> "_Segment":
+        self.count = self._rows_on_disk()
+        if self.count:
+            self.vectors = np.memmap(self.path(".f32"), dtype=np.float32, mode="r", shape=(self.count, self.dim))
+            self.norms = np.memmap(self.path(".norms"), dtype=np.float32, mode="r", shape=(self.count,))
+            self.offsets = np.memmap(self.path(".idx"), dtype=np.int64, mode="r", shape=(self.count,))
+            with open(self.path(".meta"), "rb") as f:
+                self._meta = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def record(self, row: int) -> Tuple[str, Dict[str, Any]]:
+        start = int(self.offsets[row])
+        record = json.loads(self._meta[start:self._meta.find(b"\n", start)])
+        return record["c"], record["m"]
+
+    def close(self) -> None:
+        if self._meta is not None:
+            self._meta.close()
+            self._meta = None
+        # Dropping the references unmaps the files
+        self.vectors = self.vectors[:0]
+        self.norms = self.norms[:0]
+        self.offsets = self.offsets[:0]
+
+    def remove_files(self) -> None:
+        self.close()
+        for extension in self.EXTENSIONS:
+            if os.path.exists(self.path(extension)):
+                os.remove(self.path(extension))
+
+class _ActiveSegment(_Segment):
+    """
+    The segment currently receiving appends. Rows are written through to the
+    segment files and mirrored in growable in-memory arrays for searching.
+    Sealing only records it as sealed in the manifest: the files are already
+    in their final format.
+    """
+
+    def open_for_append(self) -> "_ActiveSegment":
+        count = self._rows_on_disk()
+        vectors = np.fromfile(self.path(".f32"), dtype=np.float32, count=count * self.dim) if count else np.empty(0, np.float32)
+        norms = np.fromfile(self.path(".norms"), dtype=np.float32, count=count) if count else np.empty(0, np.float32)
+        offsets = np.fromfile(self.path(".idx"), dtype=np.int64, count=count) if count else np.empty(0, np.int64)
+        meta_size = int(offsets[-1]) if count else 0
+        if count:
+            with open(self.path(".meta"), "rb") as f:
+                f.seek(meta_size)
+                meta_size += len(f.readline())
+
+        # Cut any torn tail so all four files agree on the row count
+        for extension, size in ((".f32", count * self.dim * 4), (".norms", count * 4), (".idx", count * 8), (".meta", meta_size)):
+            with open(self.path(extension), "ab") as f:
+                f.truncate(size)
+
+        capacity = max(1024, count)
+        self._vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        self._vectors[:count] = vectors.reshape(count, self.dim)
+        self._norms = np.zeros(capacity, dtype=np.float32)
+        self._norms[:count] = norms
+        self._offsets = np.zeros(capacity, dtype=np.int64)
+        self._offsets[:count] = offsets
+        self.count = count
+        self._meta_size = meta_size
+        self._meta_file = None
+        self._files = {extension: open(self.path(extension), "ab") for extension in self.EXTENSIONS}
+        self._sync_views()
+        return self
+
+    def _sync_views(self) -> None:
+        self.vectors = self._vectors[:self.count]
+        self.norms = self._norms[:self.count]
+        self.offsets = self._offsets[:self.count]
+
+    def append(self, unit: np.ndarray, norm: float, content: str, metadata: Dict[str, Any]) -> None:
+        if self.count == len(self._vectors):
+            capacity = 2 * len(self._vectors)
+            for attribute in ("_vectors", "_norms", "_offsets"):
+                old = getattr(self, attribute)
+                grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+                grown[:self.count] = old[:self.count]
+                setattr(self, attribute, grown)
+
+        line = (json.dumps({"c": content, "m": metadata}) + "\n").encode("utf-8")
+        offset = self._meta_size
+        # Sidecar first: a row only counts once its vector (written last) is complete
+        self._files[".meta"].write(line)
+        self._files[".idx"].write(np.int64(offset).tobytes())
+        self._files[".norms"].write(np.float32(norm).tobytes())
+        self._files[".f32"].write(unit.tobytes())
+        for f in self._files.values():
+            f.flush()
+
+        self._vectors[self.count] = unit
+        self._norms[self.count] = norm
+        self._offsets[self.count] = offset
+        self._meta_size += len(line)
+        self.count += 1
+        self._sync_views()
+
+    def record(self, row: int) -> Tuple[str, Dict[str, Any]]:
+        # The sidecar keeps growing, so it is read through a file rather than a fixed-size map
+        if self._meta_file is None:
+            self._meta_file = open(self.path(".meta"), "rb")
+        self._meta_file.seek(int(self.offsets[row]))
+        record = json.loads(self._meta_file.readline())
+        return record["c"], record["m"]
+
+    def sync(self) -> None:
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self) -> None:
+        for f in getattr(self, "_files", {}).values():
+            f.close()
+        self._files = {}
+        if getattr(self, "_meta_file", None) is not None:
+            self._meta_file.close()
+        self._meta_file = None
+        super().close()
+
+class SegmentVectorStore(BaseMemory):
+    """
+    Persistent vector store: memory-mapped float32 segments plus a compact
+    JSON-lines sidecar for content and metadata.
+    Appends go to an active segment that is sealed every `segment_size`
+    rows; a background thread merges the smallest sealed segments once there
+    are more than `max_segments`. Opening a store only reads the manifest and
+    maps the segment files, so even multi-GB stores open in milliseconds and
+    pages are loaded (and shared between processes) as queries touch them.
+    One process writes; any number may open the store with read_only=True
+    and call `refresh()` to pick up newly sealed segments.
+    Seals (with their fsyncs and any inline merge) and `clear` run in worker
+    threads, so the event loop never waits on the disk.
+    Unlike VectorStoreMemory, rows cannot be deleted (so there is no
+    deduplication, eviction or compaction) and metadata filters are refused.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dim: Optional[int] = None,
+        segment_size: int = 65536,
+        max_segments: int = 8,
+        merge_factor: int = 4,
+        read_only: bool = False,
+        background_merge: bool = True
+    ):
+        self.path = path
+        self.dim = dim
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.merge_factor = merge_factor
+        self.read_only = read_only
+        self.background_merge = background_merge and not read_only
+        self._lock = threading.RLock()  # guards the manifest and segment list
+        self._merge_lock = threading.Lock()  # one merge (or clear) at a time
+        self._merge_wanted = threading.Event()
+        self._closed = False
+        self._merge_thread: Optional[threading.Thread] = None
+        # Segments dropped from the store but possibly still being searched: (segment, remove its files)
+        self._retired: List[Tuple[_Segment, bool]] = []
+        self.stats: Dict[str, float] = {"merges": 0, "merged_rows": 0, "seals": 0}
+
+        os.makedirs(path, exist_ok=True)
+        self._sealed: List[_Segment] = []
+        self._active: Optional[_Segment] = None
+        self._next_segment = 0
+        self.refresh()
+
+        if self.background_merge:
+            self._merge_thread = threading.Thread(target=self._merge_loop, name=f"segment-merge:{path}", daemon=True)
+            self._merge_thread.start()
+
+    # Manifest ------------------------------------------------------------
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST)
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "version": FORMAT_VERSION,
+            "dim": self.dim,
+            "segments": [{"name": s.name, "count": s.count} for s in self._sealed],
+            "active": self._active.name if self._active else None,
+            "next_segment": self._next_segment
+        }
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path())
+
+    def refresh(self) -> None:
+        """(Re)load the manifest; readers call this to see newly sealed segments."""
+        for attempt in range(3):
+            try:
+                return self._load_manifest()
+            except FileNotFoundError:
+                # A concurrent merge removed a segment between reading the manifest and mapping it
+                if attempt == 2:
+                    raise
+
+    def _load_manifest(self) -> None:
+        with self._lock:
+            manifest: Dict[str, Any] = {}
+            if os.path.exists(self._manifest_path()):
+                with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                if manifest.get("version") != FORMAT_VERSION:
+                    raise ValueError(f"Unsupported vector store format: {manifest.get('version')}")
+                self.dim = manifest["dim"] or self.dim
+            self._next_segment = manifest.get("next_segment", 0)
+
+            known = {s.name: s for s in self._sealed}
+            self._sealed = [
+                known.get(entry["name"]) or _Segment(self.path, entry["name"], self.dim).open_mapped()
+                for entry in manifest.get("segments", [])
+            ]
+            # Merged away by the writer, which owns (and removes) the files
+            current = {s.name for s in self._sealed}
+            self._retire([s for name, s in known.items() if name not in current], remove=False)
+
+            active_name = manifest.get("active")
+            if self.read_only:
+                # Readers map whatever the writer has flushed to the active segment so far
+                if self._active is not None:
+                    self._retire([self._active], remove=False)
+                self._active = _Segment(self.path, active_name, self.dim).open_mapped() if active_name and self.dim else None
+            elif self._active is None and active_name and self.dim:
+                self._active = _ActiveSegment(self.path, active_name, self.dim).open_for_append()
+
+    def _new_segment_name(self) -> str:
+        name = f"seg-{self._next_segment:06d}"
+        self._next_segment += 1
+        return name
+
+    # Writes --------------------------------------------------------------
+
+    async def store(self, content: str, embedding: Embedding, metadata: Optional[Dict] = None) -> None:
+        if self.read_only:
+            raise PermissionError("Vector store was opened read-only")
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        # A plain append only writes to the page cache and runs inline. Opening or
+        # sealing a segment fsyncs (and may merge), and the lock may be held by a
+        # thread doing so: those go to a worker thread
+        if self._lock.acquire(blocking=False):
+            try:
+                if self._active is not None and self._active.count + 1 < self.segment_size:
+                    self._append(vector, content, metadata or {})
+                    return
+            finally:
+                self._lock.release()
+        await asyncio.to_thread(self._append, vector, content, metadata or {})
+
+    def _append(self, vector: np.ndarray, content: str, metadata: Dict[str, Any]) -> None:
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(vector)
+            elif len(vector) != self.dim:
+                raise ValueError(f"Embedding has dimension {len(vector)}, store expects {self.dim}")
+            if self._active is None:
+                self._active = _ActiveSegment(self.path, self._new_segment_name(), self.dim).open_for_append()
+                self._write_manifest()
+
+            norm = float(np.linalg.norm(vector))
+            self._active.append(vector / norm if norm > 0 else vector, norm, content, metadata)
+            if self._active.count < self.segment_size or not self._seal():
+                return
+        self._schedule_merge()
+
+    def seal(self) -> None:
+        """Make the active segment immutable and start a new one on the next write."""
+        with self._lock:
+            if not self._seal():
+                return
+        self._schedule_merge()
+
+    def _seal(self) -> bool:
+        """Seal the active segment, if it has rows; call with the lock held."""
+        if self._active is None or not self._active.count:
+            return False
+        self._active.sync()
+        self._active.close()
+        self._sealed.append(_Segment(self.path, self._active.name, self.dim).open_mapped())
+        self._active = None
+        self._write_manifest()
+        self.stats["seals"] += 1
+        return True
+
+    def _schedule_merge(self) -> None:
+        # Never with the lock held: an inline merge copies whole segments
+        if len(self._sealed) > self.max_segments:
+            if self.background_merge:
+                self._merge_wanted.set()
+            else:
+                self.merge()
+
+    def flush(self) -> None:
+        """fsync the active segment (appends are already visible to readers)."""
+        with self._lock:
+            if isinstance(self._active, _ActiveSegment):
+                self._active.sync()
+
+    # Merging -------------------------------------------------------------
+
+    def _merge_loop(self) -> None:
+        while True:
+            self._merge_wanted.wait()
+            self._merge_wanted.clear()
+            if self._closed:
+                return
+            try:
+                while not self._closed and len(self._sealed) > self.max_segments:
+                    self.merge()
+            except Exception as e:
+                logging.error(f"Segment merge failed in {self.path}: {e}")
+
+    def merge(self) -> Optional[str]:
+        """Merge the `merge_factor` smallest sealed segments into one. Returns its name."""
+        with self._merge_lock:
+            return self._merge()
+
+    def _merge(self) -> Optional[str]:
+        with self._lock:
+            if len(self._sealed) < 2:
+                return None
+            victims = sorted(self._sealed, key=lambda s: s.count)[:self.merge_factor]
+            merged = _Segment(self.path, self._new_segment_name(), self.dim)
+            # Reserve the name before releasing the lock
+            self._write_manifest()
+
+        # The heavy copy runs without the lock: sealed segments never change
+        meta_offset = 0
+        with open(merged.path(".f32"), "wb") as f32, open(merged.path(".norms"), "wb") as norms, \
+                open(merged.path(".meta"), "wb") as meta, open(merged.path(".idx"), "wb") as idx:
+            for segment in victims:
+                f32.write(np.ascontiguousarray(segment.vectors).tobytes())
+                norms.write(np.ascontiguousarray(segment.norms).tobytes())
+                idx.write((np.asarray(segment.offsets) + meta_offset).astype(np.int64).tobytes())
+                with open(segment.path(".meta"), "rb") as source:
+                    data = source.read()
+                meta.write(data)
+                meta_offset += len(data)
+            for f in (f32, norms, meta, idx):
+                f.flush()
+                os.fsync(f.fileno())
+
+        with self._lock:
+            merged.open_mapped()
+            victim_names = {s.name for s in victims}
+            self._sealed = [s for s in self._sealed if s.name not in victim_names] + [merged]
+            self._write_manifest()
+            self.stats["merges"] += 1
+            self.stats["merged_rows"] += merged.count
+            # Searches still holding the victims keep them until they finish;
+            # maps in other processes stay valid after the unlink
+            self._retire(victims, remove=True)
+        return merged.name
+
+    # Reads ---------------------------------------------------------------
+
+    def __len__(self) -> int:
+        segments = self._segments()
+        return sum(s.count for s in segments)
+
+    def _segments(self) -> List[_Segment]:
+        with self._lock:
+            segments = list(self._sealed)
+            if self._active is not None and self._active.count:
+                segments.append(self._active)
+            return segments
+
+    @contextmanager
+    def _reading(self) -> Iterator[List[_Segment]]:
+        """The current segments, held open (even if merged away meanwhile) until the block exits."""
+        with self._lock:
+            segments = self._segments()
+            for segment in segments:
+                segment.readers += 1
+        try:
+            yield segments
+        finally:
+            with self._lock:
+                for segment in segments:
+                    segment.readers -= 1
+                self._release_retired()
+
+    def _retire(self, segments: List[_Segment], remove: bool) -> None:
+        """Close (and with `remove`, delete) segments once no search holds them. Call with the lock held."""
+        self._retired.extend((segment, remove) for segment in segments)
+        self._release_retired()
+
+    def _release_retired(self) -> None:
+        held = []
+        for segment, remove in self._retired:
+            if segment.readers:
+                held.append((segment, remove))
+            elif remove:
+                segment.remove_files()
+            else:
+                segment.close()
+        self._retired = held
+
+    async def retrieve(
+        self,
+        query_embedding: Embedding,
+        k: int = 5,
+        include_embeddings: bool = False,
+        filter: Optional[Filter] = None
+    ) -> List[Dict]:
+        """
+        Top k by cosine similarity across all segments.
+        Stored embeddings are only copied out when `include_embeddings` is set.
+        Metadata stays on disk, unindexed, so a `filter` is refused.
+        """
+        if filter:
+            raise NotImplementedError("SegmentVectorStore does not support metadata filters")
+        if k <= 0 or isinstance(query_embedding, str) or self.dim is None:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if len(query) != self.dim:
+            raise ValueError(f"Embedding has dimension {len(query)}, store expects {self.dim}")
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return []
+        query = query / norm
+
+        with self._reading() as segments:
+            # Per-segment top k, then a merge of at most k * segments candidates
+            candidates: List[Tuple[float, _Segment, int]] = []
+            for segment in segments:
+                scores = segment.vectors @ query
+                if k < len(scores):
+                    rows = np.argpartition(-scores, k - 1)[:k]
+                else:
+                    rows = np.arange(len(scores))
+                candidates.extend((float(scores[row]), segment, int(row)) for row in rows)
+            candidates.sort(key=lambda c: -c[0])
+
+            results = []
+            for score, segment, row in candidates[:k]:
+                content, metadata = segment.record(row)
+                result = {"content": content, "metadata": metadata, "similarity": score}
+                if include_embeddings:
+                    result["embedding"] = (segment.vectors[row] * segment.norms[row]).tolist()
+                results.append(result)
+        return results
+
+    async def retrieve_batch(
+        self,
+        query_matrix: Union[Sequence[Embedding], np.ndarray],
+        k: int = 5,
+        include_embeddings: bool = False,
+        filter: Optional[Filter] = None
+    ) -> List[List[Dict]]:
+        """Top k for every row of `query_matrix`, in the same format as `retrieve`."""
+        queries = np.asarray(query_matrix, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        return [await self.retrieve(query, k, include_embeddings, filter) for query in queries]
+
+    def get_stats(self) -> Dict[str, Any]:
+        segments = self._segments()
+        return {
+            **self.stats,
+            "segments": len(segments),
+            "rows": sum(s.count for s in segments),
+            "bytes": sum(os.path.getsize(s.path(ext)) for s in segments for ext in _Segment.EXTENSIONS if os.path.exists(s.path(ext)))
+        }
+
+    # Lifecycle -----------------------------------------------------------
+
+    def close(self) -> None:
+        self._closed = True
+        self._merge_wanted.set()
+        if self._merge_thread is not None:
+            self._merge_thread.join()
+        with self._lock:
+            if isinstance(self._active, _ActiveSegment):
+                self._active.sync()
+            for segment in self._segments() + [segment for segment, _ in self._retired]:
+                segment.close()
+            self._retired = []
+
+    async def clear(self) -> None:
+        if self.read_only:
+            raise PermissionError("Vector store was opened read-only")
+        # Waits for a merge in progress, so it runs in a worker thread
+        await asyncio.to_thread(self._clear)
+
+    def _clear(self) -> None:
+        with self._merge_lock, self._lock:
+            if isinstance(self._active, _ActiveSegment):
+                # Stop appending now; searches in progress may still read it
+                self._active.sync()
+            self._retire(self._segments(), remove=True)
+            self._sealed = []
+            self._active = None
+            self._write_manifest()
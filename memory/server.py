@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import inspect
+import logging
+import os
+import socket
+import stat
+from typing import Any, Dict, List, Optional, Set
+from .manager import MemoryManager
+from .protocol import BATCH, CALL, ERROR, OK, ProtocolError, frame, read_frame
+
+DEFAULT_SOCKET = "/tmp/nexus-memory.sock"
+
+# What clients may call, per target: the BaseMemory interface of each tier,
+# the tier-specific operations the framework uses, and the manager itself
+EXPOSED: Dict[str, Set[str]] = {
+    "manager": {"remember", "recall", "add_episode", "flush", "clear_all", "consolidate"},
+    "short_term": {"store", "retrieve", "clear", "add_message", "get_all", "token_count", "get_stats"},
+    "long_term": {"store", "retrieve", "clear", "store_experience"},
+    "episodic": {"store", "retrieve", "clear", "store_episode", "get_steps", "list_episodes", "find_successful"},
+    "vector_store": {"store", "retrieve", "retrieve_batch", "clear", "get_stats"}
+}
+
+class MemoryServer:
+    """
+    Serves one MemoryManager to every process on the machine over a Unix
+    domain socket, so agents on different workers share short-term, vector,
+    long-term and episodic memory.
+    Frames are length-prefixed and tagged with a request id (see
+    memory.protocol), so clients pipeline: they send without waiting for
+    replies. Each connection's requests are handled in order; responses
+    produced in the same event loop turn go out in one write.
+    The socket is created with permissions `mode` (owner only by default),
+    and a path still served by a live server is never taken over.
+    `serve_forever` also runs the manager's consolidation, so retention is
+    applied once for every client.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_SOCKET,
+        manager: Optional[MemoryManager] = None,
+        mode: int = 0o600,
+        **manager_kwargs
+    ):
+        self.path = path
+        self.mode = mode
+        self.manager = manager or MemoryManager(**manager_kwargs)
+        self._targets = {
+            "manager": self.manager,
+            "short_term": self.manager.short_term,
+            "long_term": self.manager.long_term,
+            "episodic": self.manager.episodic,
+            "vector_store": self.manager.vector_store
+        }
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.stats = {"connections": 0, "requests": 0, "batched_calls": 0, "errors": 0}
+
+    async def start(self) -> None:
+        if os.path.lexists(self.path):
+            await self._remove_stale_socket()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self.path)
+            # Not listening yet, so nobody connects before the permissions apply
+            os.chmod(self.path, self.mode)
+        except OSError:
+            sock.close()
+            raise
+        self._server = await asyncio.start_unix_server(self._handle, sock=sock)
+
+    async def _remove_stale_socket(self) -> None:
+        if not stat.S_ISSOCK(os.lstat(self.path).st_mode):
+            raise RuntimeError(f"{self.path} exists and is not a socket")
+        try:
+            _, writer = await asyncio.open_unix_connection(self.path)
+        except ConnectionRefusedError:
+            # Left behind by a server that exited without cleaning up
+            os.unlink(self.path)
+            return
+        except FileNotFoundError:
+            return
+        writer.close()
+        raise RuntimeError(f"A memory server is already listening on {self.path}")
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        self.manager.start_consolidation()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        await self.manager.stop_consolidation()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            # Only a socket this server bound; after a failed start it belongs to another server
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    async def _call(self, target: str, method: str, args: List[Any], kwargs: Dict[str, Any]) -> Any:
+        if method not in EXPOSED.get(target, ()):
+            raise AttributeError(f"{target}.{method} is not available over the memory server")
+        result = getattr(self._targets[target], method)(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        outbox: List[bytes] = []
+        loop = asyncio.get_running_loop()
+
+        def flush() -> None:
+            if outbox and not writer.is_closing():
+                writer.write(b"".join(outbox))
+            outbox.clear()
+
+        try:
+            while True:
+                request_id, opcode, payload = await read_frame(reader)
+                self.stats["requests"] += 1
+                try:
+                    if opcode == CALL:
+                        result = await self._call(*payload)
+                    elif opcode == BATCH:
+                        self.stats["batched_calls"] += len(payload)
+                        result = []
+                        for call in payload:
+                            try:
+                                result.append([True, await self._call(*call)])
+                            except Exception as e:
+                                self.stats["errors"] += 1
+                                result.append([False, [type(e).__name__, str(e)]])
+                    else:
+                        raise ProtocolError(f"Unknown opcode {opcode}")
+                    response = frame(request_id, OK, result)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    response = frame(request_id, ERROR, [type(e).__name__, str(e)])
+                if not outbox:
+                    loop.call_soon(flush)
+                outbox.append(response)
+                if writer.transport.get_write_buffer_size() > 2**20:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ProtocolError as e:
+            logging.error(f"Memory server closing a connection after a malformed frame: {e}")
+        finally:
+            flush()
+            writer.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+def run_server(path: str = DEFAULT_SOCKET, **manager_kwargs) -> None:
+    """Run a memory server until interrupted (for a dedicated process)."""
+    async def serve() -> None:
+        server = MemoryServer(path, **manager_kwargs)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+    asyncio.run(serve())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared memory server for Nexus agents")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--db", default="agent_memory.db")
+    parser.add_argument("--vectors", default=None, help="Directory for a persistent segment vector store")
+    options = parser.parse_args()
+    run_server(options.socket, db_path=options.db, vector_store_path=options.vectors)
@@ -1,35 +1,110 @@
-from typing import Any, List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 from collections import deque
 from .base import BaseMemory
 from llm.provider import Message
+from llm.tokenizer import TOKENS_PER_REPLY, TokenCounter, get_token_counter
 
 class ShortTermMemory(BaseMemory):
     """
-    Conversation buffer with sliding window.
+    Conversation buffer with a token-budgeted sliding window.
+    Every message is counted once, on insert, and the window keeps a running
+    total: whenever it would exceed `max_tokens` (reply priming included) or
+    `max_messages`, the oldest turns are evicted. System messages are pinned:
+    they are never evicted and come first in the window. The newest turn is
+    always kept, even if it alone exceeds the budget.
+    Messages are serialized once, on insert; reads return lists shared until
+    the window next changes, so treat them as read-only.
     """
-    
-    def __init__(self, max_messages: int = 50, max_tokens: int = 4000):
-        self.messages = deque(maxlen=max_messages)
+
+    def __init__(
+        self,
+        max_messages: int = 50,
+        max_tokens: int = 4000,
+        token_counter: Optional[TokenCounter] = None,
+        pin_system: bool = True
+    ):
+        self.max_messages = max_messages
         self.max_tokens = max_tokens
-        
+        self.token_counter = token_counter or get_token_counter()
+        self.pin_system = pin_system
+        # (message, tokens, serialized) entries
+        self._pinned: List[Tuple[Message, int, Dict]] = []
+        self._turns: "deque[Tuple[Message, int, Dict]]" = deque()
+        self._tokens = 0
+        self._views: Optional[Tuple[List[Message], List[Dict]]] = None
+        self.evicted = 0
+
     async def add_message(self, content: str, role: str = "user", metadata: Optional[Dict] = None):
         """Standard method for adding messages."""
-        self.messages.append(Message(role=role, content=content))
-        
+        message = Message(role=role, content=content, metadata=metadata)
+        entry = (message, self.token_counter.count_message(message), message.model_dump())
+        if self.pin_system and role == "system":
+            self._pinned.append(entry)
+        else:
+            self._turns.append(entry)
+        self._tokens += entry[1]
+        self._views = None
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._turns) > 1 and (
+            self._tokens + TOKENS_PER_REPLY > self.max_tokens or len(self) > self.max_messages
+        ):
+            self._tokens -= self._turns.popleft()[1]
+            self.evicted += 1
+
     async def store(self, role: str, content: str, metadata: Optional[Dict] = None) -> None:
         """Alias for add_message to satisfy BaseMemory interface."""
         await self.add_message(content, role, metadata)
-        
+
+    def _view(self) -> Tuple[List[Message], List[Dict]]:
+        if self._views is None:
+            entries = self._pinned + list(self._turns)
+            self._views = [entry[0] for entry in entries], [entry[2] for entry in entries]
+        return self._views
+
+    @property
+    def messages(self) -> List[Message]:
+        """The window, pinned system messages first."""
+        return self._view()[0]
+
+    def __len__(self) -> int:
+        return len(self._pinned) + len(self._turns)
+
     async def retrieve(self, query: str, k: int = 5) -> List[Dict]:
         # Simple retrieval: return last k messages
-        return [m.model_dump() for m in list(self.messages)[-k:]]
-        
+        return self._view()[1][-k:] if k > 0 else []
+
     async def get_messages(self) -> List[Message]:
         """Returns all messages as Message objects."""
-        return list(self.messages)
-        
+        return self._view()[0]
+
     async def get_all(self) -> List[Dict]:
-        return [m.model_dump() for m in list(self.messages)]
-        
+        return self._view()[1]
+
+    def token_count(self) -> int:
+        """Tokens the window takes in a prompt (a running total; nothing is recounted)."""
+        return self._tokens + TOKENS_PER_REPLY
+
+    def discard(self, messages: List[Message]) -> None:
+        """Remove these messages (compared by identity) from the window."""
+        ids = {id(message) for message in messages}
+        self._pinned = [entry for entry in self._pinned if id(entry[0]) not in ids]
+        self._turns = deque(entry for entry in self._turns if id(entry[0]) not in ids)
+        self._tokens = sum(entry[1] for entry in self._pinned) + sum(entry[1] for entry in self._turns)
+        self._views = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "messages": len(self),
+            "pinned": len(self._pinned),
+            "tokens": self.token_count(),
+            "max_tokens": self.max_tokens,
+            "evicted": self.evicted
+        }
+
     async def clear(self) -> None:
-        self.messages.clear()
+        self._pinned = []
+        self._turns.clear()
+        self._tokens = 0
+        self._views = None
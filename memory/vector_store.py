@@ -1,54 +1,687 @@
+import asyncio
+import logging
 import math
-from typing import Any, List, Dict, Optional
+import os
+import tempfile
+import time
+from typing import Any, List, Dict, Optional, Sequence, Union
+import numpy as np
 from .base import BaseMemory
+from .ann import IVFFlatIndex
+from .quantization import Quantizer
+from .filters import Filter, MetadataIndex
+from .retention import RetentionPolicy
+
+Embedding = Union[Sequence[float], np.ndarray]
+
+def _grow(array: np.ndarray, size: int, needed: int) -> np.ndarray:
+    """Return `array` with room for `needed` rows, doubling its capacity if required."""
+    capacity = len(array)
+    if needed <= capacity:
+        return array
+    while capacity < needed:
+        capacity *= 2
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:size] = array[:size]
+    return grown
+
+class _VectorFile:
+    """Append-only file of full-precision unit vectors, read back through a memory map."""
+
+    def __init__(self, dim: int, path: Optional[str] = None):
+        self.dim = dim
+        # Without a path the file is anonymous and disappears with the store
+        self.file = open(path, "w+b") if path else tempfile.TemporaryFile()
+        self.count = 0
+        self._map: Optional[np.ndarray] = None
+
+    def append(self, vectors: np.ndarray) -> None:
+        vectors = vectors.reshape(-1, self.dim)
+        self.file.seek(0, 2)
+        self.file.write(vectors.astype(np.float32).tobytes())
+        self.count += len(vectors)
+
+    def rows(self, ids: np.ndarray) -> np.ndarray:
+        if self._map is None or len(self._map) != self.count:
+            self.file.flush()
+            self._map = np.memmap(self.file, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        return self._map[ids]
+
+    def truncate(self) -> None:
+        self._map = None
+        self.file.truncate(0)
+        self.count = 0
+
+    def copy(self, ids: np.ndarray, count: int, path: Optional[str] = None, block: int = 65536) -> "_VectorFile":
+        """
+        A new file with rows `ids` (sorted) of the first `count`. Reads with
+        positioned reads rather than the shared map, so it can run in a worker
+        thread while this file is appended to (flush first) or even truncated.
+        """
+        copy = _VectorFile(self.dim, path)
+        row_bytes = self.dim * 4
+        for first in range(0, count, block):
+            last = min(first + block, count)
+            data = os.pread(self.file.fileno(), (last - first) * row_bytes, first * row_bytes)
+            if len(data) < (last - first) * row_bytes:
+                break  # truncated meanwhile; the caller discards the copy
+            rows = np.frombuffer(data, dtype=np.float32).reshape(-1, self.dim)
+            wanted = ids[(ids >= first) & (ids < last)]
+            copy.append(rows[wanted - first])
+        return copy
+
+    def close(self) -> None:
+        self._map = None
+        self.file.close()
 
 class VectorStoreMemory(BaseMemory):
     """
-    Lightweight Vector Store Memory implementing cosine similarity from first principles.
-    In a real implementation, this would use ChromaDB, Pinecone, or FAISS.
+    In-process vector store with cosine similarity.
+    Embeddings live in one contiguous float32 matrix, normalized on insert, so a
+    query is a single matrix-vector product followed by an argpartition top-k.
+    Capacity doubles when full, keeping appends amortized O(dim).
+    With an ANN `index`, stores of at least `exact_threshold` vectors are
+    searched approximately. The first such query starts training the index
+    in a worker thread, and it is rebuilt the same way once the store grows
+    `rebuild_factor` times past it; searches stay exact (or use the previous
+    index) until the new one swaps in. `build_index` trains it up front.
+    With a `quantizer`, only compressed codes stay in RAM once it is trained;
+    full-precision vectors go to `vector_path` (an anonymous temp file by
+    default) and are read back to re-rank the top `rerank` candidates.
+    Training starts in a worker thread once `train_size` vectors are stored,
+    and searches use the full-precision rows until the codes swap in;
+    `quantize` trains up front.
+    `retrieve` takes a metadata `filter` (see MetadataIndex). Filters matching
+    at most `prefilter_ratio` of the store are applied first and only the
+    matching rows are scored; broader ones score everything and mask after.
+    `retrieve_batch` answers many queries with blocked matrix-matrix products.
+    `delete` only marks rows (tombstones), which searches skip; `compact`
+    drops them for good. Every returned row has its access count bumped,
+    for retention (`evict`).
     """
-    
-    def __init__(self):
-        self.vectors = [] # List of (embedding, content, metadata)
-        
-    async def store(self, content: str, embedding: List[float], metadata: Optional[Dict] = None) -> None:
-        self.vectors.append({
-            "content": content,
-            "embedding": embedding,
-            "metadata": metadata or {}
-        })
-        
-    def _cosine_similarity(self, v1: List[float], v2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        if not v1 or not v2 or len(v1) != len(v2):
-            return 0.0
-        
-        dot_product = sum(a * b for a, b in zip(v1, v2))
-        magnitude_v1 = math.sqrt(sum(a * a for a in v1))
-        magnitude_v2 = math.sqrt(sum(b * b for b in v2))
-        
-        if magnitude_v1 == 0 or magnitude_v2 == 0:
-            return 0.0
-            
-        return dot_product / (magnitude_v1 * magnitude_v2)
-        
-    async def retrieve(self, query_embedding: List[float], k: int = 5) -> List[Dict]:
+
+    QUERY_BLOCK = 1024  # queries scored together by retrieve_batch
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        initial_capacity: int = 1024,
+        index: Optional[IVFFlatIndex] = None,
+        exact_threshold: int = 10000,
+        rebuild_factor: float = 4.0,
+        quantizer: Optional[Quantizer] = None,
+        rerank: int = 0,
+        vector_path: Optional[str] = None,
+        prefilter_ratio: float = 0.25,
+        batch_block_bytes: int = 32 * 2**20
+    ):
+        if index is not None and quantizer is not None:
+            raise ValueError("An ANN index and a quantizer cannot be combined")
+        self.dim = dim
+        self.initial_capacity = initial_capacity
+        self.index = index
+        self.exact_threshold = exact_threshold
+        self.rebuild_factor = rebuild_factor
+        self.quantizer = quantizer
+        self.rerank = rerank
+        self.vector_path = vector_path
+        self.prefilter_ratio = prefilter_ratio
+        self.batch_block_bytes = batch_block_bytes
+        self.metadata_index = MetadataIndex()
+        self._full_precision: Optional[_VectorFile] = None
+        self._training: Optional[asyncio.Task] = None
+        self._quantizing: Optional[asyncio.Task] = None
+        self._compacting = False
+        self.generation = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._size = 0
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim) unit rows
+        self._codes: Optional[np.ndarray] = None   # (capacity, code_size) once quantized
+        self._norms: Optional[np.ndarray] = None   # original lengths, to rebuild embeddings on demand
+        self._deleted: Optional[np.ndarray] = None  # tombstones
+        self._hits: Optional[np.ndarray] = None     # times each row was returned
+        self._stored_at: Optional[np.ndarray] = None
+        self._tombstones = 0
+        # Row ids change on reset and compaction; holders of row ids compare generations
+        self.generation += 1
+        self._contents: List[str] = []
+        self._metadata: List[Dict] = []
+        self.metadata_index.reset()
+        if self.index is not None:
+            self.index.reset()
+        if self._full_precision is not None:
+            self._full_precision.truncate()
+
+    @property
+    def is_quantized(self) -> bool:
+        return self.quantizer is not None and self.quantizer.is_trained
+
+    def __len__(self) -> int:
+        return self._size - self._tombstones
+
+    @property
+    def row_count(self) -> int:
+        """Rows including tombstones; row ids run from 0 to row_count - 1."""
+        return self._size
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if self._norms is None:
+            capacity = max(self.initial_capacity, needed)
+            self._norms = np.zeros(capacity, dtype=np.float32)
+            self._deleted = np.zeros(capacity, dtype=bool)
+            self._hits = np.zeros(capacity, dtype=np.int64)
+            self._stored_at = np.zeros(capacity, dtype=np.float64)
+            if self.is_quantized:
+                self._codes = np.zeros((capacity, self.quantizer.code_size), dtype=np.uint8)
+            else:
+                self._matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            return
+        self._norms = _grow(self._norms, self._size, needed)
+        self._deleted = _grow(self._deleted, self._size, needed)
+        self._hits = _grow(self._hits, self._size, needed)
+        self._stored_at = _grow(self._stored_at, self._size, needed)
+        if self._codes is not None:
+            self._codes = _grow(self._codes, self._size, needed)
+        else:
+            self._matrix = _grow(self._matrix, self._size, needed)
+
+    def _start_quantizing(self) -> asyncio.Task:
+        if self._quantizing is None:
+            self._quantizing = asyncio.get_running_loop().create_task(
+                self._quantize(self._matrix, self._size, self.generation)
+            )
+        return self._quantizing
+
+    def _train_quantizer(self, vectors: np.ndarray) -> np.ndarray:
+        self.quantizer.train(vectors)
+        return self.quantizer.encode(vectors)
+
+    async def _quantize(self, matrix: np.ndarray, size: int, generation: int) -> None:
+        """Train the quantizer on the first `size` rows in a worker thread, then swap the float matrix for codes."""
+        try:
+            encoded = await asyncio.to_thread(self._train_quantizer, matrix[:size])
+            # Cleared or compacted meanwhile: the rows it encoded are gone
+            if generation != self.generation or self._matrix is None:
+                return
+            codes = np.zeros((len(self._matrix), self.quantizer.code_size), dtype=np.uint8)
+            codes[:size] = encoded
+            if self._size > size:
+                # Rows stored during training
+                codes[size:self._size] = self.quantizer.encode(self._matrix[size:self._size])
+            self._codes = codes
+            self._matrix = None
+        except Exception as e:
+            logging.error(f"Vector quantizer training failed: {e}")
+        finally:
+            self._quantizing = None
+
+    async def quantize(self) -> None:
+        """Train the quantizer on the vectors stored so far, if not yet trained, and wait until codes serve searches."""
+        if self.quantizer is not None and self._codes is None and self._size:
+            await self._start_quantizing()
+
+    def _as_vector(self, embedding: Embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if self.dim is None:
+            self.dim = len(vector)
+        elif len(vector) != self.dim:
+            raise ValueError(f"Embedding has dimension {len(vector)}, store expects {self.dim}")
+        return vector
+
+    async def store(self, content: str, embedding: Embedding, metadata: Optional[Dict] = None) -> None:
+        vector = self._as_vector(embedding)
+        self._ensure_capacity(self._size + 1)
+        norm = float(np.linalg.norm(vector))
+        # Zero vectors stay zero rows and score 0 against everything
+        unit = vector / norm if norm > 0 else vector
+        if self._codes is not None:
+            self._codes[self._size] = self.quantizer.encode(unit[None, :])[0]
+        else:
+            self._matrix[self._size] = unit
+        if self.quantizer is not None:
+            if self._full_precision is None:
+                self._full_precision = _VectorFile(self.dim, self.vector_path)
+            self._full_precision.append(unit)
+        self._norms[self._size] = norm
+        self._stored_at[self._size] = time.time()
+        self._contents.append(content)
+        self._metadata.append(metadata or {})
+        self.metadata_index.add(self._size, self._metadata[-1])
+        if self.index is not None and self.index.is_trained:
+            self.index.add(np.array([self._size]), self._matrix[self._size:self._size + 1])
+        self._size += 1
+        if self._codes is None and self.quantizer is not None and self._size >= self.quantizer.train_size:
+            self._start_quantizing()
+
+    def _embedding(self, index: int) -> List[float]:
+        if self._matrix is None:
+            return (self._full_precision.rows(np.array([index]))[0] * self._norms[index]).tolist()
+        return (self._matrix[index] * self._norms[index]).tolist()
+
+    @property
+    def vectors(self) -> List[Dict[str, Any]]:
+        """All entries as dicts (copies every embedding; prefer `retrieve`)."""
+        return [
+            {"content": self._contents[i], "embedding": self._embedding(i), "metadata": self._metadata[i]}
+            for i in range(self._size)
+            if not self._deleted[i]
+        ]
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k best scores, best first, without a full sort."""
+        if k >= len(scores):
+            return np.argsort(-scores, kind="stable")
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def _use_index(self) -> bool:
+        if self.index is None or self._size < self.exact_threshold:
+            return False
+        if not self.index.is_trained or self._size > self.rebuild_factor * self.index.trained_size:
+            self._start_training()
+        # Exact search until the first index is ready; a stale one keeps serving during a rebuild
+        return self.index.is_trained
+
+    def _start_training(self) -> asyncio.Task:
+        if self._training is None:
+            self._training = asyncio.get_running_loop().create_task(
+                self._train_index(self._matrix, self._size, self.generation)
+            )
+        return self._training
+
+    async def _train_index(self, matrix: np.ndarray, size: int, generation: int) -> None:
+        """K-means over the first `size` rows in a worker thread, then swap the new index in."""
+        try:
+            built = await asyncio.to_thread(self.index.build, matrix[:size])
+            # Cleared, compacted or quantized meanwhile: the rows it was built over are gone
+            if generation != self.generation or self._matrix is None:
+                return
+            if self._size > size:
+                # Rows stored during training
+                built.add(np.arange(size, self._size), self._matrix[size:self._size])
+            self.index.adopt(built)
+        except Exception as e:
+            logging.error(f"Vector index training failed: {e}")
+        finally:
+            self._training = None
+
+    async def build_index(self) -> None:
+        """Train (or retrain) the ANN index now and wait until it serves searches."""
+        if self.index is not None and self._size:
+            await self._start_training()
+
+    async def retrieve(
+        self,
+        query_embedding: Embedding,
+        k: int = 5,
+        include_embeddings: bool = False,
+        filter: Optional[Filter] = None
+    ) -> List[Dict]:
         """
         Retrieves top k similar items based on cosine similarity.
+        Only entries whose metadata matches `filter` are considered.
+        Stored embeddings are only copied out when `include_embeddings` is set.
         """
-        if not self.vectors:
+        if not self._size or k <= 0:
             return []
-            
-        # Calculate similarities and sort
-        scored_vectors = []
-        for v in self.vectors:
-            similarity = self._cosine_similarity(query_embedding, v["embedding"])
-            scored_vectors.append({**v, "similarity": similarity})
-            
-        # Sort by similarity descending
-        scored_vectors.sort(key=lambda x: x["similarity"], reverse=True)
-        
-        return scored_vectors[:k]
-        
+        if isinstance(query_embedding, str):
+            # Text queries have to be embedded first; nothing to compare against
+            return []
+        query = self._as_vector(query_embedding)
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return []
+
+        query = query / norm
+        mask = self._candidates(filter)
+        if mask is not None:
+            k = min(k, int(np.count_nonzero(mask)))
+            if not k:
+                return []
+        if self._codes is not None:
+            ids, scores = self._search_quantized(query, k, mask)
+        elif self._use_index():
+            ids, scores = self._search_index(query, k, mask)
+        else:
+            ids, scores = self._search_exact(query, k, mask)
+
+        return self._results(ids, scores, include_embeddings)
+
+    async def retrieve_batch(
+        self,
+        query_matrix: Union[Sequence[Embedding], np.ndarray],
+        k: int = 5,
+        include_embeddings: bool = False,
+        filter: Optional[Filter] = None
+    ) -> List[List[Dict]]:
+        """
+        Top k for every row of `query_matrix`, in the same format as `retrieve`.
+        Queries are scored against the store in blocks of matrix-matrix
+        products, so memory stays bounded by `batch_block_bytes` whatever the
+        number of queries or the size of the store.
+        """
+        queries = np.asarray(query_matrix, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if not len(queries) or not self._size or k <= 0:
+            return [[] for _ in range(len(queries))]
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Embeddings have dimension {queries.shape[1]}, store expects {self.dim}")
+        if self._codes is not None or self._use_index():
+            # Compressed and indexed stores are searched one query at a time
+            return [await self.retrieve(query, k, include_embeddings, filter) for query in queries]
+
+        rows = None
+        mask = self._candidates(filter)
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                return [[] for _ in range(len(queries))]
+        norms = np.linalg.norm(queries, axis=1)
+        valid = norms > 0
+        units = np.zeros_like(queries)
+        units[valid] = queries[valid] / norms[valid, None]
+
+        results = []
+        for start in range(0, len(units), self.QUERY_BLOCK):
+            ids, scores = self._batch_top_k(units[start:start + self.QUERY_BLOCK], k, rows)
+            for i in range(len(ids)):
+                if valid[start + i]:
+                    results.append(self._results(ids[i], scores[i], include_embeddings))
+                else:
+                    results.append([])
+        return results
+
+    def _batch_top_k(self, queries: np.ndarray, k: int, rows: Optional[np.ndarray]):
+        """(ids, scores), each (queries, k) best first, scanning the store block by block."""
+        total = self._size if rows is None else len(rows)
+        k = min(k, total)
+        block = max(k, self.batch_block_bytes // (4 * len(queries)))
+        best_ids = best_scores = threshold = None
+        for start in range(0, total, block):
+            stop = min(start + block, total)
+            if rows is None:
+                ids = np.arange(start, stop)
+                scores = queries @ self._matrix[start:stop].T
+            else:
+                ids = rows[start:stop]
+                scores = queries @ self._matrix[ids].T
+            if best_scores is None:
+                # The first block (at least k rows) seeds the running top k
+                top = np.argpartition(scores, scores.shape[1] - k, axis=1)[:, -k:]
+                best_ids, best_scores = ids[top], np.take_along_axis(scores, top, axis=1)
+            else:
+                # Only scores beating a query's current k-th best can enter its top k;
+                # they are few, so collect them into a small padded matrix and merge
+                hits = np.flatnonzero(scores > threshold[:, None])
+                if not len(hits):
+                    continue
+                hit_rows, hit_cols = np.divmod(hits, scores.shape[1])
+                counts = np.bincount(hit_rows, minlength=len(queries))
+                slots = np.arange(len(hit_rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+                candidate_scores = np.full((len(queries), counts.max()), -np.inf, dtype=np.float32)
+                candidate_ids = np.zeros(candidate_scores.shape, dtype=np.int64)
+                candidate_scores[hit_rows, slots] = scores[hit_rows, hit_cols]
+                candidate_ids[hit_rows, slots] = ids[hit_cols]
+                merged_scores = np.concatenate([best_scores, candidate_scores], axis=1)
+                merged_ids = np.concatenate([best_ids, candidate_ids], axis=1)
+                top = np.argpartition(merged_scores, merged_scores.shape[1] - k, axis=1)[:, -k:]
+                best_ids = np.take_along_axis(merged_ids, top, axis=1)
+                best_scores = np.take_along_axis(merged_scores, top, axis=1)
+            threshold = best_scores.min(axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_ids, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def _candidates(self, filter: Optional[Filter]) -> Optional[np.ndarray]:
+        """Mask of the rows a search may return (None: all of them)."""
+        mask = self.metadata_index.match(filter, self._size) if filter else None
+        if self._tombstones:
+            live = ~self._deleted[:self._size]
+            mask = live if mask is None else mask & live
+        return mask
+
+    def _results(self, ids: np.ndarray, scores: np.ndarray, include_embeddings: bool) -> List[Dict]:
+        self._hits[ids] += 1
+        results = []
+        for index, score in zip(ids, scores):
+            result = {
+                "content": self._contents[index],
+                "metadata": self._metadata[index],
+                "similarity": float(score)
+            }
+            if include_embeddings:
+                result["embedding"] = self._embedding(index)
+            results.append(result)
+        return results
+
+    def _prefiltered_rows(self, mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Matching row ids when the filter is selective enough to score them alone.
+        Gathering rows costs more per row than a contiguous scan, so past
+        `prefilter_ratio` it is cheaper to score every row and mask afterwards.
+        """
+        if mask is None:
+            return None
+        rows = np.flatnonzero(mask)
+        return rows if len(rows) <= self.prefilter_ratio * self._size else None
+
+    def _search_exact(self, query: np.ndarray, k: int, mask: Optional[np.ndarray]):
+        rows = self._prefiltered_rows(mask)
+        if rows is not None:
+            scores = self._matrix[rows] @ query
+            top = self._top_k(scores, k)
+            return rows[top], scores[top]
+        scores = self._matrix[:self._size] @ query
+        if mask is not None:
+            scores[~mask] = -np.inf
+        ids = self._top_k(scores, k)
+        return ids, scores[ids]
+
+    def _search_index(self, query: np.ndarray, k: int, mask: Optional[np.ndarray]):
+        if mask is None:
+            return self.index.search(query, k)
+        if self._prefiltered_rows(mask) is not None:
+            # Few enough matches that an exact scan of them beats probing the index
+            return self._search_exact(query, k, mask)
+        # Over-fetch in proportion to selectivity so ~k candidates survive the filter
+        fetch = math.ceil(2 * k * self._size / np.count_nonzero(mask))
+        ids, scores = self.index.search(query, fetch)
+        keep = mask[ids]
+        ids, scores = ids[keep][:k], scores[keep][:k]
+        if len(ids) < k:
+            return self._search_exact(query, k, mask)
+        return ids, scores
+
+    def _search_quantized(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None):
+        """ADC scores over the codes, then optionally an exact re-rank from disk."""
+        rows = self._prefiltered_rows(mask)
+        if rows is not None:
+            scores = self.quantizer.scores(self._codes[rows], query)
+        else:
+            scores = self.quantizer.scores(self._codes[:self._size], query)
+            if mask is not None:
+                scores[~mask] = -np.inf
+        limit = max(k, self.rerank)
+        if mask is not None:
+            limit = min(limit, int(np.count_nonzero(mask)))
+        top = self._top_k(scores, limit)
+        candidates, scores = (rows[top] if rows is not None else top), scores[top]
+        if not self.rerank:
+            return candidates[:k], scores[:k]
+        # Ascending row order keeps the reads from the memory map sequential
+        candidates = np.sort(candidates)
+        exact = self._full_precision.rows(candidates) @ query
+        order = self._top_k(exact, k)
+        return candidates[order], exact[order]
+
+    def get_stats(self) -> Dict[str, Any]:
+        if self._codes is not None:
+            bytes_per_vector = self.quantizer.code_size + 4
+        else:
+            bytes_per_vector = 4 * (self.dim or 0) + 4
+        return {
+            "vectors": len(self),
+            "deleted": self._tombstones,
+            "dim": self.dim,
+            "quantized": self._codes is not None,
+            "bytes_per_vector": bytes_per_vector,
+            "vector_bytes": bytes_per_vector * self._size
+        }
+
+    def delete(self, ids: Sequence[int]) -> int:
+        """Tombstone rows; returns how many were live."""
+        ids = np.asarray(ids, dtype=np.int64)
+        ids = ids[(ids >= 0) & (ids < self._size)]
+        if not len(ids):
+            return 0
+        ids = np.unique(ids[~self._deleted[ids]])
+        self._deleted[ids] = True
+        self._tombstones += len(ids)
+        return len(ids)
+
+    def evict(self, policy: RetentionPolicy, limit: int = 1000) -> int:
+        """Tombstone up to `limit` rows breaking `policy`: expired first, then the least returned (oldest first)."""
+        return self.delete(self.eviction_candidates(policy, limit))
+
+    def eviction_candidates(self, policy: RetentionPolicy, limit: int = 1000) -> np.ndarray:
+        """The rows `evict` would tombstone. Safe to run in a worker thread while the store keeps growing."""
+        size, deleted, stored_at, hits = self._size, self._deleted, self._stored_at, self._hits
+        if not size:
+            return np.empty(0, dtype=np.int64)
+        live = ~deleted[:size]
+        victims = np.empty(0, dtype=np.int64)
+        if policy.ttl is not None:
+            victims = np.flatnonzero(live & (stored_at[:size] < time.time() - policy.ttl))[:limit]
+            live[victims] = False
+        excess = int(np.count_nonzero(live)) - policy.max_rows if policy.max_rows is not None else 0
+        if excess > 0 and len(victims) < limit:
+            rows = np.flatnonzero(live)
+            order = np.lexsort((stored_at[rows], hits[rows]))
+            victims = np.concatenate([victims, rows[order[:min(excess, limit - len(victims))]]])
+        return victims
+
+    def near_duplicates(self, start: int, stop: int, threshold: float = 0.98) -> np.ndarray:
+        """
+        Live rows in [start, stop) whose cosine similarity to an earlier live
+        row is at least `threshold`. Safe to run in a worker thread while the
+        store keeps growing; quantized stores are not scanned.
+        """
+        matrix, size = self._matrix, self._size
+        stop = min(stop, size)
+        if matrix is None or start >= stop:
+            return np.empty(0, dtype=np.int64)
+        live = ~self._deleted[:stop]
+        window = np.arange(start, stop)[live[start:stop]]
+        units = matrix[window]
+        duplicate = np.zeros(len(window), dtype=bool)
+        block = max(1, self.batch_block_bytes // (4 * max(1, len(window))))
+        for first in range(0, stop, block):
+            last = min(first + block, stop)
+            scores = units @ matrix[first:last].T
+            # Only rows stored before a row can make it a duplicate, so the oldest copy survives
+            earlier = (np.arange(first, last)[None, :] < window[:, None]) & live[first:last]
+            duplicate |= ((scores >= threshold) & earlier).any(axis=1)
+        return window[duplicate]
+
+    async def compact(self) -> int:
+        """
+        Drop tombstoned rows for good; surviving rows are renumbered. Returns rows dropped.
+        The compacted arrays are built in a worker thread while the store keeps
+        serving; rows stored, deleted or returned meanwhile carry over when they
+        swap in. Returns 0 if the store was cleared or quantized during the build.
+        """
+        if not self._tombstones or self._compacting:
+            return 0
+        size, generation = self._size, self.generation
+        live = np.flatnonzero(~self._deleted[:size])
+        arrays = {
+            "_matrix": self._matrix, "_codes": self._codes, "_norms": self._norms,
+            "_hits": self._hits, "_stored_at": self._stored_at,
+            "_contents": self._contents, "_metadata": self._metadata
+        }
+        if self._full_precision is not None:
+            self._full_precision.file.flush()
+        self._compacting = True
+        try:
+            compacted = await asyncio.to_thread(self._compacted, arrays, self._full_precision, live, size)
+        finally:
+            self._compacting = False
+        if generation != self.generation or (self._codes is None) != (arrays["_codes"] is None):
+            if compacted["_full_precision"] is not None:
+                compacted["_full_precision"].close()
+                if self.vector_path:
+                    os.remove(f"{self.vector_path}.compact")
+            return 0
+        self._swap_in(compacted, live, size)
+        return size - len(live)
+
+    def _compacted(
+        self,
+        arrays: Dict[str, Any],
+        full_precision: Optional[_VectorFile],
+        live: np.ndarray,
+        size: int
+    ) -> Dict[str, Any]:
+        """Copies of the `live` rows (of the first `size`), renumbered from 0, with a metadata index over them."""
+        capacity = max(self.initial_capacity, len(live))
+        compacted: Dict[str, Any] = {"_deleted": np.zeros(capacity, dtype=bool)}
+        for name, array in arrays.items():
+            if isinstance(array, list):
+                compacted[name] = [array[i] for i in live]
+            elif array is None:
+                compacted[name] = None
+            else:
+                compacted[name] = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+                compacted[name][:len(live)] = array[live]
+        compacted["metadata_index"] = MetadataIndex()
+        for row, entry in enumerate(compacted["_metadata"]):
+            compacted["metadata_index"].add(row, entry)
+        compacted["_full_precision"] = None
+        if full_precision is not None:
+            path = f"{self.vector_path}.compact" if self.vector_path else None
+            compacted["_full_precision"] = full_precision.copy(live, size, path)
+        return compacted
+
+    def _swap_in(self, compacted: Dict[str, Any], live: np.ndarray, size: int) -> None:
+        """Adopt arrays from `_compacted`, catching up on what changed since `size` rows were snapshotted."""
+        count = len(live)
+        # Hits and tombstones of surviving rows may have changed during the build
+        compacted["_hits"][:count] = self._hits[live]
+        compacted["_deleted"][:count] = self._deleted[live]
+        tail = np.arange(size, self._size)
+        metadata_index = compacted["metadata_index"]
+        for offset, row in enumerate(tail):
+            metadata_index.add(count + offset, self._metadata[row])
+        contents = compacted["_contents"] + self._contents[size:]
+        metadata = compacted["_metadata"] + self._metadata[size:]
+        tail_rows = {
+            name: getattr(self, name)[size:self._size]
+            for name in ("_matrix", "_codes", "_norms", "_deleted", "_hits", "_stored_at")
+            if getattr(self, name) is not None
+        }
+        full_precision, previous = compacted["_full_precision"], self._full_precision
+        if full_precision is not None:
+            if len(tail):
+                full_precision.append(previous.rows(tail))
+            if self.vector_path:
+                os.replace(f"{self.vector_path}.compact", self.vector_path)
+            self._full_precision = None
+            previous.close()
+
+        self._reset()
+        for name in tail_rows:
+            setattr(self, name, compacted[name])
+        self._contents, self._metadata = contents, metadata
+        self.metadata_index = metadata_index
+        self._full_precision = full_precision
+        self._size = count
+        self._ensure_capacity(count + len(tail))
+        for name, rows in tail_rows.items():
+            getattr(self, name)[count:count + len(tail)] = rows
+        self._size = count + len(tail)
+        self._tombstones = int(np.count_nonzero(self._deleted[:self._size]))
+
     async def clear(self) -> None:
-        self.vectors = []
+        self._reset()
@@ -28,6 +28,26 @@ class MetricsCollector:
             "cost": cost
         })
         
+    def record_llm_concurrency(self, limit: int, in_flight: int, queue_delay: float):
+        self.metrics.append({
+            "type": "llm_concurrency",
+            "timestamp": datetime.now().isoformat(),
+            "limit": limit,
+            "in_flight": in_flight,
+            "queue_delay": queue_delay
+        })
+        
+    def record_llm_usage(self, call_site: str, model: str, prompt_tokens: int, completion_tokens: int, cost: float):
+        self.metrics.append({
+            "type": "llm_usage",
+            "timestamp": datetime.now().isoformat(),
+            "call_site": call_site,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost": cost
+        })
+        
     def record_task_completion(self, success: bool, total_duration: float, iterations: int, total_cost: float):
         self.metrics.append({
             "type": "task_completion",
@@ -47,8 +67,11 @@ class MetricsCollector:
         total_iterations = len([m for m in self.metrics if m["type"] == "iteration"])
         successful_tasks = len([m for m in self.metrics if m["type"] == "task_completion" and m["success"]])
         
+        total_cost = sum(m["total_cost"] or 0.0 for m in self.metrics if m["type"] == "task_completion")
+        
         return {
             "total_iterations": total_iterations,
             "successful_tasks": successful_tasks,
+            "total_cost": total_cost,
             "total_metrics": len(self.metrics)
         }
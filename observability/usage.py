@@ -0,0 +1,96 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# USD per 1M (prompt, completion) tokens. Dated snapshots match by prefix,
+# e.g. "gpt-4o-mini-2024-07-18" is priced as "gpt-4o-mini".
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "deepseek-chat": (0.27, 1.10),
+    "deepseek-reasoner": (0.55, 2.19)
+}
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost": 0.0}
+
+class UsageLedger:
+    """
+    Token and cost accounting for a single agent run.
+    Every LLM call is recorded under a call site (react_step, plan, replan,
+    critique, ...) and aggregated per call site and per model. Calls to models
+    missing from the price table are counted with zero cost and listed as unpriced.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.prices = prices if prices is not None else DEFAULT_PRICES
+        # Longest prefix first so "gpt-4o-mini" wins over "gpt-4o"
+        self._price_keys = sorted(self.prices, key=len, reverse=True)
+        self.entries: List[Dict[str, Any]] = []
+        self.unpriced_models: List[str] = []
+
+    def price_for(self, model: Optional[str]) -> Optional[Tuple[float, float]]:
+        if not model:
+            return None
+        if model in self.prices:
+            return self.prices[model]
+        for key in self._price_keys:
+            if model.startswith(key):
+                return self.prices[key]
+        return None
+
+    def record(self, call_site: str, response: Any, model: Optional[str] = None) -> Dict[str, Any]:
+        """Record one LLMResponse. `model` is used when the response does not name one."""
+        usage = getattr(response, "usage", None) or {}
+        model = getattr(response, "model", None) or model or "unknown"
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+
+        price = self.price_for(model)
+        if price is None:
+            cost = 0.0
+            if model not in self.unpriced_models:
+                self.unpriced_models.append(model)
+        else:
+            cost = (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+        entry = {
+            "call_site": call_site,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": usage.get("total_tokens") or prompt_tokens + completion_tokens,
+            "cost": cost
+        }
+        self.entries.append(entry)
+        return entry
+
+    def _aggregate(self, key: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        groups: Dict[str, Dict[str, Any]] = {}
+        for entry in self.entries:
+            group = groups.setdefault(entry[key] if key else "total", _empty_totals())
+            group["calls"] += 1
+            for field in ("prompt_tokens", "completion_tokens", "total_tokens", "cost"):
+                group[field] += entry[field]
+        return groups
+
+    @property
+    def total_cost(self) -> float:
+        return sum(entry["cost"] for entry in self.entries)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(entry["total_tokens"] for entry in self.entries)
+
+    def calls(self, call_site: str) -> int:
+        return sum(1 for entry in self.entries if entry["call_site"] == call_site)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            **self._aggregate().get("total", _empty_totals()),
+            "by_call_site": self._aggregate("call_site"),
+            "by_model": self._aggregate("model"),
+            "unpriced_models": list(self.unpriced_models)
+        }
@@ -3,6 +3,7 @@ import sqlite3
 from typing import Dict, Any, Optional
 from datetime import datetime
 from state.manager import AgentState
+from storage.sqlite import get_database
 
 class StatePersistence:
     """
@@ -12,21 +13,22 @@ class StatePersistence:
     def __init__(self, backend: str = "sqlite", db_path: str = "agent_state.db"):
         self.backend = backend
         self.db_path = db_path
+        self.db = None
         if backend == "sqlite":
-            self._init_sqlite()
+            self.db = get_database(db_path)
+            self.db.write_sync(self._init_sqlite)
             
-    def _init_sqlite(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS checkpoints (
-                    checkpoint_id TEXT PRIMARY KEY,
-                    task TEXT,
-                    label TEXT,
-                    state_data TEXT,
-                    status TEXT,
-                    timestamp DATETIME DEFAULT (STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW'))
-                )
-            """)
+    def _init_sqlite(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                checkpoint_id TEXT PRIMARY KEY,
+                task TEXT,
+                label TEXT,
+                state_data TEXT,
+                status TEXT,
+                timestamp DATETIME DEFAULT (STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW'))
+            )
+        """)
             
     async def save(self, state: AgentState, label: Optional[str] = None) -> str:
         """Save state and return checkpoint ID."""
@@ -38,11 +40,10 @@ class StatePersistence:
         state_json = state.model_dump_json()
         
         if self.backend == "sqlite":
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(
-                    "INSERT OR REPLACE INTO checkpoints (checkpoint_id, task, label, state_data, status) VALUES (?, ?, ?, ?, ?)",
-                    (checkpoint_id, state.task, label or "", state_json, state.status.value)
-                )
+            await self.db.execute(
+                "INSERT OR REPLACE INTO checkpoints (checkpoint_id, task, label, state_data, status) VALUES (?, ?, ?, ?, ?)",
+                (checkpoint_id, state.task, label or "", state_json, state.status.value)
+            )
         elif self.backend == "json":
             with open(f"{checkpoint_id}.json", "w") as f:
                 f.write(state_json)
@@ -52,15 +53,13 @@ class StatePersistence:
     async def load(self, checkpoint_id: str) -> Optional[AgentState]:
         """Load state from checkpoint."""
         if self.backend == "sqlite":
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(
-                    "SELECT state_data FROM checkpoints WHERE checkpoint_id = ?",
-                    (checkpoint_id,)
-                )
-                row = cursor.fetchone()
-                if row:
-                    state_dict = json.loads(row[0])
-                    return AgentState(**state_dict)
+            row = await self.db.fetchone(
+                "SELECT state_data FROM checkpoints WHERE checkpoint_id = ?",
+                (checkpoint_id,)
+            )
+            if row:
+                state_dict = json.loads(row[0])
+                return AgentState(**state_dict)
         elif self.backend == "json":
             try:
                 with open(f"{checkpoint_id}.json", "r") as f:
@@ -74,25 +73,25 @@ class StatePersistence:
     async def list_checkpoints(self, task_id: Optional[str] = None, limit: int = 10) -> list:
         """List available checkpoints."""
         if self.backend == "sqlite":
-            with sqlite3.connect(self.db_path) as conn:
-                if task_id:
-                    cursor = conn.execute(
-                        "SELECT checkpoint_id, task, status, timestamp, label FROM checkpoints WHERE task LIKE ? ORDER BY timestamp DESC LIMIT ?",
-                        (f"%{task_id}%", limit)
-                    )
-                else:
-                    cursor = conn.execute(
-                        "SELECT checkpoint_id, task, status, timestamp, label FROM checkpoints ORDER BY timestamp DESC LIMIT ?",
-                        (limit,)
-                    )
-                return [
-                    {
-                        "checkpoint_id": row[0], 
-                        "task": row[1], 
-                        "status": row[2], 
-                        "timestamp": row[3],
-                        "label": row[4]
-                    }
-                    for row in cursor.fetchall()
-                ]
+            # Checkpoints saved within the same millisecond tie on timestamp; rowid keeps insertion order
+            if task_id:
+                rows = await self.db.fetchall(
+                    "SELECT checkpoint_id, task, status, timestamp, label FROM checkpoints WHERE task LIKE ? ORDER BY timestamp DESC, rowid DESC LIMIT ?",
+                    (f"%{task_id}%", limit)
+                )
+            else:
+                rows = await self.db.fetchall(
+                    "SELECT checkpoint_id, task, status, timestamp, label FROM checkpoints ORDER BY timestamp DESC, rowid DESC LIMIT ?",
+                    (limit,)
+                )
+            return [
+                {
+                    "checkpoint_id": row[0], 
+                    "task": row[1], 
+                    "status": row[2], 
+                    "timestamp": row[3],
+                    "label": row[4]
+                }
+                for row in rows
+            ]
         return []
@@ -0,0 +1,218 @@
+import asyncio
+import atexit
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+PRAGMAS = {
+    "journal_mode": "WAL",       # readers never block the writer, nor the writer readers
+    "synchronous": "NORMAL",     # with WAL: fsync at checkpoints only, still crash-safe
+    "busy_timeout": "5000",      # other processes on the same file wait instead of failing
+    "temp_store": "MEMORY",
+    "cache_size": "-16000",      # 16 MB page cache per connection
+    "mmap_size": "268435456"     # reads of the first 256 MB go through the page cache directly
+}
+
+_memory_ids = itertools.count()
+
+class SQLiteDatabase:
+    """
+    Shared, thread-backed access to one SQLite database file.
+    Connections are long-lived and cache prepared statements. Reads run on
+    a small pool of reader threads, each with its own connection; writes
+    are queued to a single writer thread, which commits everything queued
+    while the previous commit was in progress as one transaction (group
+    commit). Each write runs in its own savepoint, so one failing write
+    does not undo the others in its group.
+    Use `get_database` so every store on a file shares one writer.
+    """
+
+    def __init__(self, path: str, readers: int = 4, max_batch: int = 256, cached_statements: int = 256):
+        self.path = path
+        self.max_batch = max_batch
+        self.cached_statements = cached_statements
+        # ":memory:" would give every connection its own database; share one instead
+        self._uri = path == ":memory:"
+        self._target = f"file:nexus-memory-{next(_memory_ids)}?mode=memory&cache=shared" if self._uri else path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="sqlite-read")
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+        self.stats = {"reads": 0, "writes": 0, "commits": 0, "largest_group": 0}
+        # Keeps an in-memory database alive, and applies WAL before anyone reads
+        self._keeper = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._target,
+            uri=self._uri,
+            check_same_thread=False,
+            isolation_level=None,  # transactions are explicit (the writer's group commits)
+            cached_statements=self.cached_statements
+        )
+        for name, value in PRAGMAS.items():
+            if self._uri and name in ("journal_mode", "mmap_size"):
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def _thread_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # Reads
+
+    def _read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        self.stats["reads"] += 1
+        return fn(self._thread_connection())
+
+    async def read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run `fn(connection)` on a reader thread; it sees every write already awaited."""
+        return await asyncio.get_running_loop().run_in_executor(self._readers, self._read, fn)
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        return await self.read(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        return await self.read(lambda conn: conn.execute(sql, params).fetchone())
+
+    # Writes
+
+    def _submit(self, fn: Callable[[sqlite3.Connection], T]) -> Future:
+        if self._closed:
+            raise RuntimeError(f"Database {self.path} is closed")
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="sqlite-write", daemon=True)
+                    self._writer.start()
+        future: Future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    async def write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run `fn(connection)` on the writer thread; returns once it is committed."""
+        return await asyncio.wrap_future(self._submit(fn))
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Run one write statement; returns the cursor's lastrowid."""
+        return await self.write(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def write_nowait(self, fn: Callable[[sqlite3.Connection], T]) -> Future:
+        """Queue a write without waiting for it (bookkeeping that must not slow down reads)."""
+        return self._submit(fn)
+
+    def write_sync(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Blocking `write`, for setup code outside the event loop (schema creation)."""
+        return self._submit(fn).result()
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            group = [item]
+            # Everything that queued up during the last commit shares the next one
+            while len(group) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                group.append(item)
+            self._commit(conn, group)
+
+    def _commit(self, conn: sqlite3.Connection, group: List[tuple]) -> None:
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, _ in group:
+                conn.execute("SAVEPOINT write")
+                try:
+                    outcomes.append((True, fn(conn)))
+                    conn.execute("RELEASE write")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    outcomes.append((False, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            outcomes = [(False, e)] * len(group)
+        self.stats["writes"] += len(group)
+        self.stats["commits"] += 1
+        self.stats["largest_group"] = max(self.stats["largest_group"], len(group))
+        for (_, future), (ok, value) in zip(group, outcomes):
+            if future.set_running_or_notify_cancel():
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def get_stats(self) -> Dict[str, Any]:
+        commits = self.stats["commits"]
+        return {
+            **self.stats,
+            "avg_group": self.stats["writes"] / commits if commits else 0.0,
+            "queued": self._queue.qsize()
+        }
+
+    def close(self) -> None:
+        """Finish queued writes, then close every connection."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+        self._readers.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+def ensure_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]) -> None:
+    """Add the columns (name -> type and constraints) that an older version of `table` lacks."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+_databases: Dict[str, SQLiteDatabase] = {}
+_databases_lock = threading.Lock()
+
+def get_database(path: str) -> SQLiteDatabase:
+    """Return the process-wide SQLiteDatabase for a file, so all its stores share one writer."""
+    key = path if path == ":memory:" else os.path.abspath(path)
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None or database._closed:
+            database = _databases[key] = SQLiteDatabase(path)
+        return database
+
+def close_databases() -> None:
+    with _databases_lock:
+        databases = list(_databases.values())
+        _databases.clear()
+    for database in databases:
+        database.close()
+
+atexit.register(close_databases)
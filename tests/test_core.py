@@ -4,6 +4,13 @@ from typing import List, Dict, Any, Optional
 from llm.provider import LLMProvider, Message, LLMResponse
 from tools.base import Tool, ToolResult
 from core.agent import Agent
+from core.robustness import reset_circuit_breakers
+
+@pytest.fixture(autouse=True)
+def fresh_circuit_breakers():
+    # Endpoint breakers are process-wide; keep one test's failures out of the next
+    yield
+    reset_circuit_breakers()
 
 class MockLLM(LLMProvider):
     async def generate(self, messages, tools=None, **kwargs):
@@ -59,3 +66,291 @@ async def test_agent_basic_run():
     assert "output" in result, f"Agent failed: {result.get('error', 'unknown error')}"
     assert "4" in result["output"]
     assert result["state"]["status"] == "completed"
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_and_probes():
+    from core.robustness import CircuitBreaker, CircuitState, CircuitOpenError, ErrorHandler
+
+    transitions = []
+    breaker = CircuitBreaker("test-endpoint", minimum_calls=2, open_seconds=0.05)
+    breaker.add_listener(lambda name, old, new: transitions.append(new))
+    calls = 0
+
+    async def flaky():
+        nonlocal calls
+        calls += 1
+        raise Exception("connection refused")
+
+    success, error = await ErrorHandler.retry_with_backoff(flaky, 5, 0.01, circuit_breaker=breaker)
+    assert not success
+    assert isinstance(error, CircuitOpenError)
+    assert calls == 2  # Opened after two failures instead of five attempts
+    assert breaker.state == CircuitState.OPEN
+
+    await asyncio.sleep(0.06)
+
+    # A probe cancelled mid-call gives its half-open slot back
+    probe = asyncio.create_task(ErrorHandler.retry_with_backoff(asyncio.sleep, 1, 0.01, 10, circuit_breaker=breaker))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    async def healthy():
+        return "ok"
+
+    success, result = await ErrorHandler.retry_with_backoff(healthy, circuit_breaker=breaker)
+    assert success and result == "ok"
+    assert transitions == [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED]
+
+@pytest.mark.asyncio
+async def test_llm_breakers_are_keyed_by_endpoint_and_model():
+    from core.executor import AgentExecutor
+    from core.robustness import CircuitOpenError
+    from llm.cascade import CascadeProvider
+
+    class HostedLLM(MockLLM):
+        def __init__(self, model, base_url=None, fail=False):
+            self.model, self.base_url, self.fail = model, base_url, fail
+
+        async def generate(self, messages, tools=None, **kwargs):
+            if self.fail:
+                raise ConnectionError(f"{self.model} is down")
+            return LLMResponse(content="Final Answer: ok", role="assistant")
+
+    down, up = HostedLLM("small-model", fail=True), HostedLLM("large-model")
+    first, second = AgentExecutor(down, []), AgentExecutor(up, [])
+    # Same provider class and endpoint, different models: separate breakers
+    assert first.circuit_breaker is not second.circuit_breaker
+    assert AgentExecutor(HostedLLM("small-model"), []).circuit_breaker is first.circuit_breaker
+    # Providers naming no endpoint or model never share one
+    assert AgentExecutor(MockLLM(), []).circuit_breaker is not AgentExecutor(MockLLM(), []).circuit_breaker
+
+    # A cascade is not wrapped in one breaker; its members keep their own
+    cascade = CascadeProvider(down, up, validator=lambda response: True)
+    assert AgentExecutor(cascade, []).circuit_breaker is None
+    assert cascade.small_breaker is first.circuit_breaker
+    for _ in range(10):
+        assert (await cascade.generate([Message(role="user", content="hi")])).content == "Final Answer: ok"
+    assert cascade.small_breaker.state == "open" and cascade.large_breaker.state == "closed"
+    # With the small model's circuit open, calls go straight to the large model
+    errors = cascade.stats["small_errors"]
+    await cascade.generate([Message(role="user", content="hi")])
+    assert cascade.stats["small_errors"] == errors
+
+    failing = CascadeProvider(HostedLLM("a", fail=True), HostedLLM("b", fail=True), validator=lambda response: True)
+    for _ in range(10):
+        with pytest.raises((ConnectionError, CircuitOpenError)):
+            await failing.generate([Message(role="user", content="hi")])
+    with pytest.raises(CircuitOpenError):
+        await failing.generate([Message(role="user", content="hi")])
+
+@pytest.mark.asyncio
+async def test_tool_breaker_counts_only_errors_reaching_the_tool():
+    from tools.executor import ToolExecutor
+
+    class SearchTool(Tool):
+        name: str = "search"
+        description: str = "Search"
+        parameters: dict = {}
+
+        async def _run(self, query):
+            if query == "down":
+                raise ConnectionError("connection refused")
+            raise ValueError(f"no hits for {query}")
+
+    tool, executor = SearchTool(), ToolExecutor(breaker_config={"minimum_calls": 2, "open_seconds": 60})
+    for i in range(5):
+        result = await executor.execute(tool, {"query": f"missing {i}"})
+        assert not result.success and "no hits" in result.error
+    assert executor.get_circuit_breaker(tool).state == "closed"
+
+    for _ in range(5):
+        await executor.execute(tool, {"query": "down"})
+    assert executor.get_circuit_breaker(tool).state == "open"
+    assert "circuit open" in (await executor.execute(tool, {"query": "anything"})).error
+    # Breakers belong to their executor, so other agents still reach the tool
+    assert "no hits" in (await ToolExecutor().execute(tool, {"query": "x"})).error
+
+@pytest.mark.asyncio
+async def test_usage_ledger_prices_each_call_site():
+    from observability.metrics import MetricsCollector
+
+    class MeteredLLM(MockLLM):
+        async def generate(self, messages, tools=None, **kwargs):
+            response = await super().generate(messages, tools, **kwargs)
+            response.usage = {"prompt_tokens": 1000, "completion_tokens": 100, "total_tokens": 1100}
+            response.model = "gpt-4o-mini-2024-07-18"
+            return response
+
+    metrics = MetricsCollector()
+    agent = Agent(llm=MeteredLLM(), tools=[CalculatorTool()], metrics=metrics, enable_tracing=False)
+    result = await agent.run("What is 2+2?")
+
+    usage = result["usage"]
+    assert usage["by_call_site"]["react_step"]["calls"] == 2
+    assert usage["prompt_tokens"] == 2000
+    # Dated snapshot priced by prefix as gpt-4o-mini: 0.15/M prompt, 0.60/M completion
+    assert usage["by_model"]["gpt-4o-mini-2024-07-18"]["cost"] == pytest.approx(2 * (1000 * 0.15 + 100 * 0.60) / 1e6)
+    completion = metrics.get_metrics("task_completion")[0]
+    assert completion["iterations"] == 2
+    assert completion["total_cost"] == pytest.approx(usage["cost"])
+
+@pytest.mark.asyncio
+async def test_scratchpad_is_summarized_only_when_it_overflows():
+    from core.executor import AgentExecutor
+    from state.manager import StateManager
+
+    class LookupTool(Tool):
+        name: str = "lookup"
+        description: str = "Look up"
+        parameters: dict = {}
+
+        async def _run(self, i):
+            return f"record {i} value " * 5
+
+    class StepLLM(MockLLM):
+        def __init__(self):
+            self.prompts = []
+
+        async def generate(self, messages, tools=None, **kwargs):
+            self.prompts.append(messages[-1].content)
+            return LLMResponse(content=f'Thought: next\nAction: lookup\nAction Input: {{"i": {len(self.prompts)}}}')
+
+    class Summarizer(MockLLM):
+        calls = 0
+
+        async def generate(self, messages, tools=None, **kwargs):
+            self.calls += 1
+            return LLMResponse(content="looked up the earlier records")
+
+    llm, summarizer = StepLLM(), Summarizer()
+    executor = AgentExecutor(llm, [LookupTool()], role_llms={"summarization": summarizer})
+    base = executor.prompt_builder.count_tokens(executor.prompt_builder.build_react_prompt("Collect records", [LookupTool()]))
+    await executor.execute_react_loop("Collect records", StateManager(task="Collect records"), max_iterations=30, max_prompt_tokens=base + 400)
+
+    assert all(executor.prompt_builder.count_tokens(prompt) <= base + 400 for prompt in llm.prompts)
+    # Each summary frees room for several more steps instead of being redone every iteration
+    assert 1 <= summarizer.calls <= 6
+
+@pytest.mark.asyncio
+async def test_fault_injection_is_seeded_and_composable():
+    from core.fault_injection import FaultInjector, FaultInjectingProvider, FaultInjectingTool, InjectedRateLimitError
+    from core.robustness import ErrorHandler
+    from llm.rate_limiter import retry_after_seconds
+
+    async def outcomes(seed):
+        llm = FaultInjectingProvider(MockLLM(), FaultInjector(error_rate=0.3, malformed_rate=0.3, seed=seed))
+        results = []
+        for _ in range(20):
+            try:
+                results.append((await llm.generate([Message(role="user", content="What is 2+2?")])).content)
+            except Exception as e:
+                results.append(type(e).__name__)
+        return results
+
+    assert await outcomes(7) == await outcomes(7)
+    assert "InjectedFault" in await outcomes(7)
+
+    injector = FaultInjector(rate_limit_rate=1.0, retry_after=0.01, seed=1)
+    tool = FaultInjectingTool(CalculatorTool(), injector)
+    assert tool.name == "calculator"
+    success, error = await ErrorHandler.retry_with_backoff(tool.execute, 2, 0.01, operation="add", a=1, b=2)
+    assert not success and isinstance(error, InjectedRateLimitError)
+    assert retry_after_seconds(error) == 0.01
+    assert injector.get_stats()["rate_limits"] == 2
+
+    injector.rate_limit_rate = 0.0
+    assert (await tool.execute(operation="add", a=1, b=2)).output == 3
+
+@pytest.mark.asyncio
+async def test_replay_cache_skips_llm_steps_until_divergence(tmp_path):
+    import re
+    from core.replay import TrajectoryReplayCache
+    from llm.embeddings import HashEmbeddingProvider
+    from memory.manager import MemoryManager
+
+    class CountingLLM(MockLLM):
+        calls = 0
+
+        async def generate(self, messages, tools=None, **kwargs):
+            self.calls += 1
+            observations = re.findall(r"Observation: (\d+)", messages[-1].content)
+            if observations:
+                return LLMResponse(content=f"Thought: done.\nFinal Answer: Done: {observations[-1]}", role="assistant")
+            return LLMResponse(
+                content='Thought: add them.\nAction: calculator\nAction Input: {"operation": "add", "a": 2, "b": 2}',
+                role="assistant"
+            )
+
+    class DriftingCalculator(CalculatorTool):
+        offset: int = 0
+
+        async def _run(self, operation, a, b):
+            return a + b + self.offset
+
+    llm, tool = CountingLLM(), DriftingCalculator()
+    memory = MemoryManager(str(tmp_path / "memory.db"))
+    cache = TrajectoryReplayCache(memory.episodic, embedder=HashEmbeddingProvider(dim=256), similarity_threshold=0.8)
+    agent = Agent(llm=llm, tools=[tool], memory=memory, enable_tracing=False, replay_cache=cache)
+
+    assert (await agent.run("What is 2+2?"))["output"] == "Done: 4" and llm.calls == 2
+
+    # Same task (up to case and whitespace): replayed, no LLM call
+    result = await agent.run("what is  2+2?")
+    assert result["output"] == "Done: 4" and result["replay"]["completed"] and llm.calls == 2
+
+    # The tool now answers differently: the replay stops there and the LLM finishes
+    tool.offset = 1
+    result = await agent.run("What is 2+2?")
+    assert result["output"] == "Done: 5" and not result["replay"]["completed"] and llm.calls == 3
+
+    # A similar task replays the actions, but the LLM writes its answer
+    result = await agent.run("What is 2+2 ?!")
+    assert result["replay"]["match"] == "similar" and result["replay"]["replayed_steps"] == 1 and llm.calls == 4
+
+    stats = cache.get_stats()
+    assert stats["hit_rate"] == 0.75 and stats["completed"] == 1 and stats["fell_back"] == 2
+    assert stats["llm_calls_avoided"] == 4
+
+@pytest.mark.asyncio
+async def test_replay_counts_against_max_iterations():
+    from core.executor import AgentExecutor
+    from core.replay import ReplayStep, Trajectory, TrajectoryReplayCache
+    from state.manager import StateManager
+
+    class EchoLLM(MockLLM):
+        prompts: List[str] = []
+
+        async def generate(self, messages, tools=None, **kwargs):
+            self.prompts.append(messages[-1].content)
+            return LLMResponse(
+                content='Thought: again.\nAction: calculator\nAction Input: {"operation": "add", "a": 1, "b": 1}',
+                role="assistant"
+            )
+
+    step = ReplayStep(tool="calculator", input={"operation": "add", "a": 1, "b": 1}, observation="2")
+    # The last recorded step no longer matches what the tool returns
+    drifted = ReplayStep(thought="check", tool="calculator", input={"operation": "add", "a": 1, "b": 1}, observation="3")
+    trajectory = Trajectory(episode_id=1, task="Add", steps=[step, step, drifted], final_answer="3", match="exact")
+    cache = TrajectoryReplayCache(episodic=None)
+
+    async def lookup(task):
+        return trajectory
+
+    cache.lookup = lookup
+    llm = EchoLLM()
+    executor = AgentExecutor(llm, [CalculatorTool()], replay_cache=cache)
+
+    # The recording alone exhausts the budget
+    result = await executor.execute_react_loop("Add", StateManager(task="Add"), max_iterations=2)
+    assert result["error"] == "Max iterations reached" and not llm.prompts
+    assert cache.get_stats()["replayed_steps"] == 2
+
+    # Diverging at its third step leaves two iterations for the LLM
+    result = await executor.execute_react_loop("Add", StateManager(task="Add"), max_iterations=5)
+    assert result["error"] == "Max iterations reached" and len(llm.prompts) == 2
+    # Recorded steps without a thought get no Thought line
+    assert "Thought: None" not in llm.prompts[0] and "Thought: check" in llm.prompts[0]
+    assert llm.prompts[0].count("Observation: 2") == 3
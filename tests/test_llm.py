@@ -0,0 +1,278 @@
+import pytest
+import asyncio
+import time
+from llm.rate_limiter import RateLimiter, retry_after_seconds
+from llm.concurrency import AdaptiveConcurrencyLimiter
+from llm.provider import LLMProvider, LLMResponse, Message
+from llm.router import Backend, RoutingProvider
+from llm.http_pool import ClientPool, PoolConfig
+from llm.tokenizer import ApproximateTokenCounter, BPETokenCounter
+from llm.prompt_builder import PromptBuilder
+from llm.parser import ResponseParser
+from llm.streaming_parser import StreamingReactParser
+from llm.cascade import CascadeProvider, react_validator
+
+class DelayLLM(LLMProvider):
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+
+    async def generate(self, messages, tools=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise Exception(f"{self.name} is down")
+        return LLMResponse(content=self.name)
+
+    async def stream_generate(self, messages, **kwargs):
+        yield self.name
+
+    def supports_tool_calling(self):
+        return False
+
+@pytest.mark.asyncio
+async def test_rate_limiter_queues_until_budget_refills():
+    # 6000 tokens/min refills at 100 tokens/s
+    limiter = RateLimiter(tokens_per_minute=6000)
+
+    reserved = await limiter.acquire(6000)
+    assert reserved == 6000
+
+    start = time.monotonic()
+    await limiter.acquire(10)
+    assert time.monotonic() - start >= 0.08
+    assert limiter.get_stats()["throttled_requests"] == 1
+
+    # Reconciling a smaller actual usage returns the unused reservation
+    before = limiter.token_bucket.tokens
+    limiter.reconcile(10, 4)
+    assert limiter.token_bucket.tokens == pytest.approx(before + 6, abs=1)
+
+@pytest.mark.asyncio
+async def test_rate_limiter_honors_retry_after():
+    class FakeResponse:
+        headers = {"retry-after": "0.1"}
+
+    class FakeRateLimitError(Exception):
+        status_code = 429
+        response = FakeResponse()
+
+    limiter = RateLimiter(requests_per_minute=1000)
+    limiter.pause(retry_after_seconds(FakeRateLimitError("429")))
+
+    start = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+@pytest.mark.asyncio
+async def test_openai_stream_reconciles_rate_limit_reservation():
+    from types import SimpleNamespace
+    from llm.openai_provider import OpenAIProvider
+    from llm.tokenizer import get_token_counter
+
+    def chunk(content=None, usage=None):
+        choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content else []
+        return SimpleNamespace(choices=choices, usage=usage)
+
+    class FakeClient:
+        def __init__(self, chunks):
+            self.requests = []
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+            self.chunks = chunks
+
+        async def create(self, **params):
+            self.requests.append(params)
+
+            async def stream():
+                for c in self.chunks:
+                    yield c
+            return stream()
+
+    def provider(chunks):
+        client = FakeClient(chunks)
+        pool = SimpleNamespace(get_client=lambda **kwargs: client)
+        limiter = RateLimiter(tokens_per_minute=60000)
+        return OpenAIProvider(api_key="test", rate_limiter=limiter, client_pool=pool), client, limiter
+
+    messages = [Message(role="user", content="hi")]
+
+    # The final usage chunk replaces the max_tokens estimate
+    llm, client, limiter = provider([chunk("Hel"), chunk("lo"), chunk(usage=SimpleNamespace(total_tokens=12))])
+    assert [t async for t in llm.stream_generate(messages, max_tokens=5000)] == ["Hel", "lo"]
+    assert client.requests[0]["stream_options"] == {"include_usage": True}
+    assert limiter.get_stats()["actual_tokens"] == 12
+    assert limiter.token_bucket.tokens == pytest.approx(60000 - 12, abs=5)
+
+    # Without one (or when the consumer stops early) the streamed output is counted instead
+    llm, client, limiter = provider([chunk("Hello"), chunk(" world")])
+    stream = llm.stream_generate(messages, max_tokens=5000)
+    assert await stream.__anext__() == "Hello"
+    await stream.aclose()
+    charged = limiter.get_stats()["actual_tokens"]
+    assert 0 < charged <= get_token_counter().count_messages([{"role": "user", "content": "hi"}]) + 5
+    assert limiter.token_bucket.tokens == pytest.approx(60000 - charged, abs=5)
+
+@pytest.mark.asyncio
+async def test_adaptive_concurrency_grows_and_halves():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=16)
+
+    async def call(delay=0.01, fail=False):
+        async with limiter.slot():
+            await asyncio.sleep(delay)
+            if fail:
+                raise Exception("HTTP 429 Too Many Requests")
+
+    for _ in range(5):
+        await asyncio.gather(*[call() for _ in range(limiter.current_limit)])
+    grown = limiter.limit
+    assert grown > 2
+
+    with pytest.raises(Exception):
+        await call(fail=True)
+    assert limiter.limit == pytest.approx(grown / 2)
+    assert limiter.get_stats()["decreases"] == 1
+
+@pytest.mark.asyncio
+async def test_routing_provider_falls_back_and_hedges():
+    messages = [Message(role="user", content="hi")]
+
+    router = RoutingProvider([
+        Backend("down", DelayLLM("down", fail=True), weight=1000),
+        Backend("backup", DelayLLM("backup"))
+    ], seed=0)
+    response = await router.generate(messages)
+    assert response.content == "backup"
+    assert router.get_stats()["down"]["failures"] == 1
+
+    slow = DelayLLM("slow", delay=0.001)
+    router = RoutingProvider([
+        Backend("slow", slow, weight=1000),
+        Backend("fast", DelayLLM("fast", delay=0.01), weight=0.001)
+    ], hedge=True, min_samples=5, min_hedge_delay=0.01, seed=0)
+    for _ in range(5):
+        await router.generate(messages)
+
+    # The primary now blows way past its p95, so the hedge wins
+    slow.delay = 1.0
+    response = await router.generate(messages)
+    await asyncio.sleep(0)
+    stats = router.get_stats()
+    assert response.content == "fast"
+    assert stats["fast"]["wins"] == 1
+    assert stats["slow"]["cancelled"] == 1
+
+@pytest.mark.asyncio
+async def test_client_pool_shares_connections_per_endpoint():
+    pool = ClientPool(PoolConfig(max_connections=10))
+    a = pool.get_client(api_key="key-a", base_url="https://example.test/v1")
+    b = pool.get_client(api_key="key-a", base_url="https://example.test/v1/")
+    c = pool.get_client(api_key="key-b", base_url="https://example.test/v1")
+
+    assert a is b
+    assert a is not c
+    # Different keys still reuse the same keep-alive pool
+    assert pool.get_http_client("https://example.test/v1") is pool.get_http_client("https://example.test/v1/")
+    stats = pool.get_stats()
+    assert stats["clients"] == 2
+    assert stats["pools"]["https://example.test/v1"]["connections"] == 0
+    await pool.aclose()
+
+def test_client_pool_is_per_event_loop():
+    pool = ClientPool(PoolConfig(prewarm_connections=2))
+    warmed = []
+
+    async def prewarm(base_url=None, connections=2):
+        warmed.append((base_url, connections))
+        return connections
+    pool.prewarm = prewarm
+
+    async def client():
+        client = pool.get_client(api_key="key", base_url="https://example.test/v1")
+        await asyncio.sleep(0)
+        return client
+
+    # A pool opened under one asyncio.run() must not be reused by the next
+    first, second = asyncio.run(client()), asyncio.run(client())
+    assert first is not second
+    assert first._client is not second._client
+    assert len(pool._http_clients) == 1  # the closed loop's pool was dropped
+    # Each new pool was pre-warmed as soon as it was created
+    assert warmed == [("https://example.test/v1", 2)] * 2
+
+def test_bpe_token_counter_memoizes_segments(tmp_path):
+    corpus = ["the agent calls the tool and the tool returns an observation"] * 20
+    counter = BPETokenCounter.train(corpus, num_merges=50)
+
+    text = "the agent calls the tool"
+    # Learned merges compress common words well below one token per byte
+    assert 0 < counter.count(text) < len(text.encode())
+    counter.count(text)
+    assert counter.get_stats()["hits"] == 1
+
+    path = str(tmp_path / "ranks.tiktoken")
+    counter.save(path)
+    assert BPETokenCounter.from_tiktoken_file(path).count(text) == counter.count(text)
+
+def test_prompt_builder_fits_scratchpad_to_budget():
+    builder = PromptBuilder(token_counter=ApproximateTokenCounter())
+    scratchpad = "\n".join(f"Observation: step {i} " + "x" * 40 for i in range(50))
+
+    full = builder.build_react_prompt("task", [], scratchpad)
+    trimmed = builder.build_react_prompt("task", [], scratchpad, max_prompt_tokens=300)
+
+    assert builder.count_tokens(full) > 300
+    assert builder.count_tokens(trimmed) <= 300
+    assert "step 49" in trimmed and "step 0 " not in trimmed
+
+    # The truncation marker counts against the budget too, whatever the budget
+    base = builder.count_tokens(builder.build_react_prompt("task", []))
+    for scratchpad in (scratchpad, "\n".join(f"ok {i}" for i in range(200))):
+        for budget in range(base + 10, base + 400, 7):
+            prompt = builder.build_react_prompt("task", [], scratchpad, max_prompt_tokens=budget)
+            assert builder.count_tokens(prompt) <= budget
+
+def test_streaming_react_parser_emits_fields_as_they_complete():
+    text = 'Thought: look it up\nAction: search\nAction Input: {"q": "a } b", "n": {"x": 1}}\nObservation: fake'
+    parser = StreamingReactParser()
+    events = []
+    for i in range(0, len(text), 5):
+        events += parser.feed(text[i:i + 5])
+    events += parser.close()
+
+    assert [e.field for e in events] == ["thought", "action", "action_input"]
+    assert parser.result().action_input == {"q": "a } b", "n": {"x": 1}}
+    assert parser.result().model_dump() == ResponseParser().parse_react_response(text).model_dump()
+    # Stray braces in prose are skipped without backtracking
+    assert ResponseParser().extract_json('if { x } then {"plan": [1]} {') == {"plan": [1]}
+
+    # The first Thought may follow other text on its line; later markers must start a line
+    text = 'I think. Thought: inline\nAction: search\nAction Input: {"q": "x"}'
+    for size in (1, 4, len(text)):
+        parser = StreamingReactParser()
+        for i in range(0, len(text), size):
+            parser.feed(text[i:i + size])
+        parser.close()
+        assert parser.result().model_dump() == ResponseParser().parse_react_response(text).model_dump()
+        assert parser.result().thought == "inline"
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_only_rejected_responses():
+    small = DelayLLM('Thought: ok\nAction: search\nAction Input: {"q": "x"}', delay=0.01)
+    large = DelayLLM("Final Answer: from the large model", delay=0.05)
+    cascade = CascadeProvider(small, large, validator=react_validator)
+
+    response = await cascade.generate([Message(role="user", content="hi")])
+    assert response.content == small.name
+
+    small.name = "Thought: I am unsure"  # no action and no final answer
+    response = await cascade.generate([Message(role="user", content="hi")])
+    assert response.content == large.name
+
+    small.fail = True
+    assert (await cascade.generate([Message(role="user", content="hi")])).content == large.name
+
+    stats = cascade.get_stats()
+    assert stats["escalations"] == 2 and stats["small_errors"] == 1
+    assert stats["escalation_rate"] == pytest.approx(2 / 3)
+    # One accepted call saved ~50ms; two escalations wasted ~10ms each
+    assert 0 < stats["latency_saved"] < 0.05
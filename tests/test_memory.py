@@ -20,6 +20,27 @@ async def test_short_term_memory():
     messages = await memory.get_messages()
     assert len(messages) == 0
 
+@pytest.mark.asyncio
+async def test_short_term_memory_token_window():
+    from llm.tokenizer import ApproximateTokenCounter
+    counter = ApproximateTokenCounter(chars_per_token=1)  # a token per character, plus 3 per message
+    memory = ShortTermMemory(max_tokens=50, token_counter=counter)
+    await memory.add_message("sys", role="system")
+    for i in range(4):
+        await memory.add_message(f"turn {i} ...", role="user")
+
+    # 6 (system) + 3 * 13 (turns) + 3 (reply) = 48; a fourth turn would overflow, so turn 0 went
+    messages = await memory.get_messages()
+    assert [m.content for m in messages] == ["sys", "turn 1 ...", "turn 2 ...", "turn 3 ..."]
+    assert memory.token_count() == counter.count_messages(messages) == 48
+    assert await memory.get_all() is await memory.get_all()  # serialized once, until the window changes
+
+    # A message larger than the budget evicts every other turn but stays; the system prompt is pinned
+    await memory.add_message("x" * 100, role="assistant")
+    assert [m.role for m in await memory.get_messages()] == ["system", "assistant"]
+    assert (await memory.retrieve("", k=1))[0]["content"] == "x" * 100
+    assert memory.get_stats()["evicted"] == 4
+
 @pytest.mark.asyncio
 async def test_vector_store_memory():
     store = VectorStoreMemory()
@@ -57,3 +78,628 @@ async def test_memory_manager_integration():
     results = await manager.recall("Test")
     assert isinstance(results, dict)
     assert "episodic" in results
+
+@pytest.mark.asyncio
+async def test_vector_store_grows_and_ranks_top_k():
+    import numpy as np
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(300, 16)).astype(np.float32)
+
+    store = VectorStoreMemory(initial_capacity=8)
+    for i, vector in enumerate(vectors):
+        await store.store(f"item {i}", vector.tolist(), {"i": i})
+    assert len(store) == 300
+
+    query = vectors[42] + 0.01
+    results = await store.retrieve(query, k=5)
+    expected = np.argsort(-(vectors @ query) / np.linalg.norm(vectors, axis=1))[:5]
+    assert [r["metadata"]["i"] for r in results] == expected.tolist()
+    assert "embedding" not in results[0]
+
+    with_embeddings = await store.retrieve(query, k=1, include_embeddings=True)
+    assert np.allclose(with_embeddings[0]["embedding"], vectors[42], atol=1e-5)
+
+@pytest.mark.asyncio
+async def test_vector_store_ann_index_matches_exact_search():
+    import numpy as np
+    from memory.ann import IVFFlatIndex
+    rng = np.random.default_rng(1)
+    topics = rng.normal(size=(20, 32))
+    vectors = (topics[rng.integers(0, 20, 2000)] + 0.3 * rng.normal(size=(2000, 32))).astype(np.float32)
+
+    exact = VectorStoreMemory()
+    approximate = VectorStoreMemory(index=IVFFlatIndex(nlist=20, nprobe=20), exact_threshold=1000)
+    for i, vector in enumerate(vectors[:1500]):
+        await exact.store(str(i), vector, {"i": i})
+        await approximate.store(str(i), vector, {"i": i})
+
+    query = vectors[7]
+    expected = [r["metadata"]["i"] for r in await exact.retrieve(query, k=10)]
+    # The first large query starts training in a worker thread and is answered exactly meanwhile
+    assert [r["metadata"]["i"] for r in await approximate.retrieve(query, k=10)] == expected
+    assert not approximate.index.is_trained
+    await approximate.store("during training", vectors[1998], {"i": 1998})
+    await approximate.build_index()
+    assert approximate.index.trained_size == 1500 and approximate.index.size == 1501
+    # nprobe == nlist scans every list, so the index is exact
+    assert [r["metadata"]["i"] for r in await approximate.retrieve(query, k=10)] == expected
+
+    # Inserts after training go straight into the inverted lists
+    await approximate.store("new", vectors[1999] * 3, {"i": 1999})
+    assert approximate.index.size == 1502
+    assert (await approximate.retrieve(vectors[1999], k=1))[0]["metadata"]["i"] == 1999
+
+@pytest.mark.asyncio
+async def test_segment_store_persists_and_merges(tmp_path):
+    import numpy as np
+    from memory.segment_store import SegmentVectorStore
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+
+    store = SegmentVectorStore(str(tmp_path), segment_size=10, max_segments=2, merge_factor=2, background_merge=False)
+    for i, vector in enumerate(vectors):
+        await store.store(f"item {i}", vector, {"i": i})
+    assert store.get_stats()["merges"] > 0
+    store.close()
+
+    reader = SegmentVectorStore(str(tmp_path), read_only=True)
+    assert len(reader) == 50
+    results = await reader.retrieve(vectors[33], k=2, include_embeddings=True)
+    assert results[0]["content"] == "item 33"
+    assert np.allclose(results[0]["embedding"], vectors[33], atol=1e-5)
+    with pytest.raises(PermissionError):
+        await reader.store("nope", vectors[0])
+    batch = await reader.retrieve_batch(vectors[:3], k=1)
+    assert [results[0]["content"] for results in batch] == ["item 0", "item 1", "item 2"]
+    # Metadata is not indexed on disk: filters are refused rather than ignored
+    with pytest.raises(NotImplementedError):
+        await reader.retrieve(vectors[0], k=1, filter={"i": 0})
+
+@pytest.mark.asyncio
+async def test_segment_backed_manager_rejects_vector_retention(tmp_path, caplog):
+    from memory.retention import RetentionPolicy
+    with pytest.raises(ValueError):
+        MemoryManager(str(tmp_path / "memory.db"), vector_store_path=str(tmp_path / "vectors"), retention={
+            "vectors": RetentionPolicy(max_rows=10)
+        })
+    manager = MemoryManager(str(tmp_path / "memory.db"), vector_store_path=str(tmp_path / "vectors"))
+    await manager.consolidate()
+    await manager.consolidate()
+    # Vector maintenance it cannot do is reported (once), not skipped silently
+    assert sum("SegmentVectorStore does not support" in record.message for record in caplog.records) == 1
+    manager.vector_store.close()
+
+@pytest.mark.asyncio
+async def test_segment_store_searches_survive_concurrent_merges(tmp_path):
+    import os
+    import numpy as np
+    from memory.segment_store import SegmentVectorStore
+    rng = np.random.default_rng(6)
+    vectors = rng.normal(size=(600, 8)).astype(np.float32)
+
+    store = SegmentVectorStore(str(tmp_path), segment_size=5, max_segments=2, merge_factor=2)
+    reader = None
+    for i, vector in enumerate(vectors):
+        await store.store(f"item {i}", vector, {"i": i})
+        # The background merge unlinks segments while these searches read them
+        assert len(await store.retrieve(rng.normal(size=8), k=20, include_embeddings=True)) == min(i + 1, 20)
+        if i == 300:
+            reader = SegmentVectorStore(str(tmp_path), read_only=True)
+    # The reader never refreshed: every segment it mapped has been merged away and unlinked
+    assert (await reader.retrieve(vectors[42], k=1))[0]["content"] == "item 42"
+    store.close()
+    assert store.get_stats()["merges"] > 0
+    # Retired segments were removed once no search held them
+    names = {name.split(".")[0] for name in os.listdir(tmp_path) if name.startswith("seg-")}
+    assert len(names) == store.get_stats()["segments"]
+
+@pytest.mark.asyncio
+async def test_segment_store_seals_and_clears_off_the_event_loop(tmp_path):
+    import time
+    import numpy as np
+    from memory.segment_store import SegmentVectorStore
+
+    class SlowMergeStore(SegmentVectorStore):
+        def merge(self):
+            time.sleep(0.3)
+            return super().merge()
+
+    vectors = np.random.default_rng(7).normal(size=(20, 8)).astype(np.float32)
+    store = SlowMergeStore(str(tmp_path), segment_size=5, max_segments=2, merge_factor=2, background_merge=False)
+
+    async def stalls(operation):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        await operation
+        ticker.cancel()
+        return ticks
+
+    for i, vector in enumerate(vectors[:14]):
+        await store.store(f"item {i}", vector)
+    # The 15th row seals a third segment, and the inline merge runs in a worker thread
+    assert await stalls(store.store("item 14", vectors[14])) >= 10
+    assert store.get_stats()["merges"] == 1 and len(store) == 15
+
+    # Clearing waits for a merge in progress without holding up the loop
+    store._merge_lock.acquire()
+    asyncio.get_running_loop().call_later(0.3, store._merge_lock.release)
+    assert await stalls(store.clear()) >= 10
+    assert len(store) == 0
+    store.close()
+
+@pytest.mark.asyncio
+async def test_vector_store_quantizers_rerank_from_disk():
+    import numpy as np
+    from memory.quantization import ScalarQuantizer, ProductQuantizer
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(600, 32)).astype(np.float32)
+    query = vectors[123] + 0.05
+
+    for quantizer in (ScalarQuantizer(train_size=300), ProductQuantizer(m=8, train_size=300)):
+        store = VectorStoreMemory(quantizer=quantizer, rerank=40)
+        for i, vector in enumerate(vectors):
+            await store.store(str(i), vector, {"i": i})
+        await store.quantize()
+        stats = store.get_stats()
+        assert stats["quantized"] and stats["bytes_per_vector"] < 4 * 32
+
+        results = await store.retrieve(query, k=3, include_embeddings=True)
+        assert results[0]["metadata"]["i"] == 123
+        # Re-ranked scores and embeddings come from the full-precision copy
+        assert np.allclose(results[0]["embedding"], vectors[123], atol=1e-5)
+        expected = float(vectors[123] @ query / np.linalg.norm(vectors[123]) / np.linalg.norm(query))
+        assert results[0]["similarity"] == pytest.approx(expected, abs=1e-5)
+
+@pytest.mark.asyncio
+async def test_vector_store_trains_quantizer_off_the_event_loop():
+    import time
+    import numpy as np
+    from memory.quantization import ScalarQuantizer
+
+    class SlowQuantizer(ScalarQuantizer):
+        def train(self, vectors):
+            time.sleep(0.3)
+            super().train(vectors)
+
+    rng = np.random.default_rng(5)
+    vectors = rng.normal(size=(120, 16)).astype(np.float32)
+    store = VectorStoreMemory(quantizer=SlowQuantizer(train_size=100), rerank=10)
+    for i, vector in enumerate(vectors[:100]):
+        await store.store(str(i), vector)
+
+    # Training has started; the loop keeps running and searches use full precision
+    start = time.perf_counter()
+    await asyncio.sleep(0.01)
+    assert time.perf_counter() - start < 0.1
+    for i, vector in enumerate(vectors[100:], 100):
+        await store.store(str(i), vector)
+    assert (await store.retrieve(vectors[110], k=1))[0]["content"] == "110"
+    assert not store.get_stats()["quantized"]
+
+    # Rows stored during training are encoded when the codes swap in
+    await store.quantize()
+    assert store.get_stats()["quantized"]
+    for i in (5, 110, 119):
+        assert (await store.retrieve(vectors[i], k=1))[0]["content"] == str(i)
+
+@pytest.mark.asyncio
+async def test_vector_store_compacts_while_serving(tmp_path):
+    import os
+    import numpy as np
+    from memory.quantization import ScalarQuantizer
+    rng = np.random.default_rng(4)
+    vectors = rng.normal(size=(400, 16)).astype(np.float32)
+    path = str(tmp_path / "vectors.f32")
+    store = VectorStoreMemory(quantizer=ScalarQuantizer(train_size=100), rerank=10, vector_path=path)
+    for i, vector in enumerate(vectors[:300]):
+        await store.store(str(i), vector, {"i": i})
+    await store.quantize()
+    store.delete(range(0, 300, 2))
+    generation = store.generation
+
+    # The build runs in a worker thread; rows stored and deleted meanwhile carry over
+    compaction = asyncio.create_task(store.compact())
+    await asyncio.sleep(0)
+    for i, vector in enumerate(vectors[300:], 300):
+        await store.store(str(i), vector, {"i": i})
+    store.delete([1, 300])
+    assert await compaction == 150
+    assert store.generation > generation
+    assert store.row_count == 250 and len(store) == 248
+
+    for i in (3, 299, 301, 399):
+        results = await store.retrieve(vectors[i], k=1, filter={"i": i}, include_embeddings=True)
+        assert results[0]["content"] == str(i)
+        assert np.allclose(results[0]["embedding"], vectors[i], atol=1e-5)
+    assert not await store.retrieve(vectors[1], k=1, filter={"i": 1})
+    assert os.path.getsize(path) == 250 * 16 * 4
+
+    # Cleared during the build: nothing is swapped in
+    store.delete([3])
+    compaction = asyncio.create_task(store.compact())
+    await asyncio.sleep(0)
+    await store.clear()
+    assert await compaction == 0 and store.row_count == 0
+    assert not os.path.exists(path + ".compact")
+
+@pytest.mark.asyncio
+async def test_vector_store_metadata_filters():
+    import numpy as np
+    from memory.ann import IVFFlatIndex
+    rng = np.random.default_rng(4)
+    vectors = rng.normal(size=(400, 16)).astype(np.float32)
+    query = rng.normal(size=16).astype(np.float32)
+
+    def metadata(i):
+        return {"tenant": f"t{i % 4}", "ts": i, "tags": ["even"] if i % 2 == 0 else ["odd"], "flag": i % 3 == 0}
+
+    filters = [
+        {"tenant": "t1"},
+        {"tenant": {"$in": ["t0", "t2"]}, "ts": {"$gte": 100, "$lt": 150}},
+        {"tags": "odd", "tenant": {"$ne": "t1"}},
+        {"$or": [{"ts": {"$lt": 5}}, {"flag": True, "ts": {"$gt": 390}}]},
+        {"missing": {"$exists": False}, "ts": {"$lte": 3}},
+        {"tenant": "nobody"},
+    ]
+    for index in (None, IVFFlatIndex(nlist=8, nprobe=8)):
+        store = VectorStoreMemory(index=index, exact_threshold=100)
+        for i, vector in enumerate(vectors):
+            await store.store(str(i), vector, metadata(i))
+        for filter in filters:
+            allowed = [i for i in range(400) if store.metadata_index.match(filter)[i]]
+            scores = vectors[allowed] @ query / np.linalg.norm(vectors[allowed], axis=1)
+            expected = [allowed[j] for j in np.argsort(-scores)[:5]]
+            # Both the pre-filter and the post-filter paths return the exact filtered top k
+            for ratio in (1.0, 0.0):
+                store.prefilter_ratio = ratio
+                results = await store.retrieve(query, k=5, filter=filter)
+                assert [r["metadata"]["ts"] for r in results] == expected
+
+    assert sum(store.metadata_index.match(filters[1])) == 25
+    assert sum(store.metadata_index.match({"flag": True})) == 134
+    assert not store.metadata_index.match({"flag": 1}).any()
+    with pytest.raises(ValueError):
+        store.metadata_index.match({"ts": {"$near": 3}})
+
+@pytest.mark.asyncio
+async def test_vector_store_retrieve_batch_matches_retrieve():
+    import numpy as np
+    rng = np.random.default_rng(5)
+    vectors = rng.normal(size=(500, 24)).astype(np.float32)
+    queries = rng.normal(size=(40, 24)).astype(np.float32)
+    queries[7] = 0
+
+    # A tiny block budget forces many corpus blocks and running top-k merges
+    store = VectorStoreMemory(batch_block_bytes=4 * 40 * 16)
+    for i, vector in enumerate(vectors):
+        await store.store(str(i), vector, {"i": i, "group": i % 5})
+
+    for k, filter in ((7, None), (3, {"group": 2}), (600, None)):
+        batched = await store.retrieve_batch(queries, k=k, filter=filter)
+        assert len(batched) == len(queries) and batched[7] == []
+        for query, results in zip(queries, batched):
+            expected = await store.retrieve(query, k=k, filter=filter)
+            assert [r["metadata"]["i"] for r in results] == [r["metadata"]["i"] for r in expected]
+            assert [r["similarity"] for r in results] == pytest.approx([r["similarity"] for r in expected], abs=1e-5)
+    assert len((await store.retrieve_batch(queries[:2], k=600))[0]) == 500
+    assert await store.retrieve_batch(queries[:2], k=3, filter={"group": 9}) == [[], []]
+
+@pytest.mark.asyncio
+async def test_memory_manager_embeds_in_background_with_cache(tmp_path):
+    from llm.embeddings import HashEmbeddingProvider
+
+    class SlowEmbedder(HashEmbeddingProvider):
+        def __init__(self):
+            super().__init__(dim=64)
+            self.batches = []
+
+        async def embed(self, texts):
+            self.batches.append(len(texts))
+            await asyncio.sleep(0.05)
+            return await super().embed(texts)
+
+    db_path = str(tmp_path / "memory.db")
+    embedder = SlowEmbedder()
+    manager = MemoryManager(db_path, embedder=embedder, embedding_batch_size=8)
+    texts = [f"note {i} about topic {i % 3}" for i in range(20)] + ["note 0 about topic 0"]
+
+    start = asyncio.get_running_loop().time()
+    for text in texts:
+        await manager.remember(text, memory_type="vector", metadata={"text": text})
+    assert asyncio.get_running_loop().time() - start < 0.05  # remember() never waits on the embedder
+    await manager.flush()
+
+    # 20 distinct texts: two full batches of 8 plus a timed flush of the rest; the duplicate rides along.
+    # Batches run concurrently and reach the embedder in any order
+    assert sorted(embedder.batches) == [4, 8, 8]
+    assert manager.embeddings.get_stats()["deduplicated"] == 1
+    results = await manager.recall("note 5 about topic 2", memory_types=["vector"], k=1)
+    assert results["vector"][0]["content"] == "note 5 about topic 2"
+
+    # A fresh manager over the same database reuses the cached vectors
+    again = SlowEmbedder()
+    manager = MemoryManager(db_path, embedder=again)
+    for text in texts[:5]:
+        await manager.remember(text, memory_type="vector")
+    await manager.flush()
+    assert again.batches == [] and len(manager.vector_store) == 5
+
+@pytest.mark.asyncio
+async def test_full_text_search_ranks_and_migrates(tmp_path):
+    import sqlite3
+    from memory.episodic import Episode
+    from memory.fts import FTS5_AVAILABLE, search
+    if not FTS5_AVAILABLE:
+        pytest.skip("SQLite built without FTS5")
+    db_path = str(tmp_path / "memory.db")
+
+    # A database written before the FTS index existed
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE facts (key TEXT PRIMARY KEY, value TEXT, metadata TEXT, timestamp DATETIME)")
+        conn.execute("""INSERT INTO facts (key, value, metadata) VALUES ('scratch', '"temporary"', '{}')""")
+        conn.execute("""INSERT INTO facts (key, value, metadata) VALUES ('deploy_target', '"kubernetes cluster"', '{}')""")
+        conn.execute("DELETE FROM facts WHERE key = 'scratch'")
+
+    facts = LongTermMemory(db_path)
+    assert (await facts.retrieve("kubernetes"))[0]["key"] == "deploy_target"
+    # Facts keep their rowids as explicit ids, so VACUUM cannot shift them out from under the index
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT id FROM facts WHERE key = 'deploy_target'").fetchone() == (2,)
+        conn.execute("VACUUM")
+    assert (await facts.retrieve("kubernetes"))[0]["key"] == "deploy_target"
+
+    await facts.store("favorite_color", "blue")
+    await facts.store("database", "postgres replica, postgres primary")
+    await facts.store("cache", "redis in front of postgres")
+    results = await facts.retrieve("postgres")
+    assert [r["key"] for r in results] == ["database", "cache"]
+    assert results[0]["score"] > results[1]["score"]
+    assert (await facts.retrieve("postg"))[0]["key"] == "database"  # prefix match
+    assert (await facts.retrieve("redis postgres"))[0]["key"] == "cache"  # all words beat some words
+
+    # Upserts keep the index in sync: the old value is no longer searchable
+    await facts.store("favorite_color", "green")
+    assert await facts.retrieve("blue") == []
+    assert (await facts.retrieve("green"))[0]["value"] == "green"
+    assert await facts.retrieve("!!!") == []
+
+    episodes = Episode(db_path)
+    for i in range(40):
+        await episodes.store_episode(f"routine task {i}", [], True, "ok", 1.0)
+    await episodes.store_episode("migrate the billing service", [{"step": 1}], True, "moved billing to v2", 3.0)
+    found = await episodes.retrieve("billing migration")
+    assert found[0]["task"] == "migrate the billing service" and found[0]["step_count"] == 1
+    # Small tables rank every word by BM25. From `min_rows` on, a word in over 5% of
+    # the rows ("routine" is in almost every episode) is a stopword: newest matches first
+    with sqlite3.connect(db_path) as conn:
+        ranked = search(conn, "episodes", "routine", k=2)
+        assert len(ranked) == 2 and all(score > 0 for _, score in ranked)
+        assert search(conn, "episodes", "routine", k=2, min_rows=0) == [(40, 0.0), (39, 0.0)]
+        # Document frequency is measured against the rows still indexed, not the highest id
+        conn.execute("DELETE FROM episodes WHERE id <= 35")
+        assert search(conn, "episodes", "routine", k=2, max_df=0.5, min_rows=0) == [(40, 0.0), (39, 0.0)]
+
+    await episodes.clear()
+    assert await episodes.retrieve("billing") == []
+
+@pytest.mark.asyncio
+async def test_episode_steps_compressed_and_lazy(tmp_path):
+    import json
+    import sqlite3
+    from memory.episodic import Episode
+    db_path = str(tmp_path / "memory.db")
+
+    # A database written when steps were stored inline as JSON
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE episodes (id INTEGER PRIMARY KEY AUTOINCREMENT, task TEXT, steps TEXT, "
+                     "success BOOLEAN, final_answer TEXT, duration REAL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO episodes (task, steps, success, final_answer, duration) VALUES (?, ?, 0, 'gave up', 2.0)",
+                     ("old task", json.dumps([{"action": "search"}, {"action": "read"}])))
+
+    episodes = Episode(db_path)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT steps, step_count FROM episodes").fetchone() == (None, 2)
+    old = (await episodes.list_episodes())[0]
+    assert old["success"] is False and "steps" not in old
+    assert await episodes.get_steps(old["id"]) == [{"action": "search"}, {"action": "read"}]
+
+    steps = [{"thought": "look it up " * 20, "observation": "result " * 50} for _ in range(50)]
+    new_id = await episodes.store_episode("new task", steps, True, "done", 1.0)
+    assert await episodes.get_steps(new_id) == steps
+    assert await episodes.get_steps(12345) == []
+    with sqlite3.connect(db_path) as conn:
+        blob = conn.execute("SELECT data FROM episode_steps WHERE episode_id = ?", (new_id,)).fetchone()[0]
+    assert len(blob) < len(json.dumps(steps)) / 10
+
+    assert [e["task"] for e in await episodes.list_episodes(success=False)] == ["old task"]
+    found = await episodes.retrieve("new task", k=1, include_steps=True)
+    assert found[0]["step_count"] == 50 and found[0]["steps"] == steps
+    found = {e["task"]: e["steps"] for e in await episodes.retrieve("task", k=5, include_steps=True)}
+    assert found == {"new task": steps, "old task": [{"action": "search"}, {"action": "read"}]}
+
+@pytest.mark.asyncio
+async def test_memory_consolidation_and_retention(tmp_path):
+    import sqlite3
+    from memory.retention import RetentionPolicy
+    db_path = str(tmp_path / "memory.db")
+    manager = MemoryManager(db_path, retention={
+        "episodes": RetentionPolicy(ttl=3600),
+        "vectors": RetentionPolicy(max_rows=1)
+    })
+    # Nothing to do yet, including on a vector store that never held a row
+    assert not any((await manager.consolidate()).values())
+
+    await manager.remember("You are a helpful agent.", role="system")
+    for i in range(24):
+        await manager.remember(f"turn {i}", role="user")
+    await manager.remember({"key": "user_name", "value": "Alice"}, memory_type="long_term")
+    await manager.remember({"key": "User Name", "value": " alice"}, memory_type="long_term")
+    for _ in range(2):
+        await manager.add_episode("Fix the bug", [{"step": 1}], True, "patched", 1.0)
+    stale = await manager.add_episode("Old task", [], False, "gave up", 1.0)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE episodes SET timestamp = datetime('now', '-2 days') WHERE id = ?", (stale,))
+    store = manager.vector_store
+    await store.store("v", [1.0, 0.0, 0.0])
+    await store.store("v again", [1.0, 0.01, 0.0])
+    await store.store("w", [0.0, 1.0, 0.0])
+    await store.retrieve([0.0, 1.0, 0.0], k=1)
+
+    done = await manager.consolidate()
+    messages = await manager.short_term.get_all()
+    assert len(messages) == 20 and messages[0]["role"] == "system" and messages[1]["content"] == "turn 5"
+    summary = await manager.long_term.retrieve("turn")
+    assert summary[0]["key"].startswith("conversation_summary:") and "user: turn 0" in summary[0]["value"]
+    assert done["summarized_turns"] == 5 and done["facts_merged"] == 1 and done["episodes_merged"] == 1
+    assert [f["key"] for f in await manager.long_term.retrieve("alice")] == ["User Name"]
+    assert [e["task"] for e in await manager.episodic.list_episodes()] == ["Fix the bug"]
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM episode_steps").fetchone()[0] == 1
+    # "v again" nearly repeats "v"; then "v" is evicted as the least used, and tombstones are compacted
+    assert done["vectors_merged"] == 1 and done["vectors_evicted"] == 1 and done["vectors_compacted"] == 2
+    assert len(store) == store.row_count == 1 and store.vectors[0]["content"] == "w"
+
+    # Facts over max_rows go least accessed first
+    await manager.long_term.store("color", "blue")
+    await manager.long_term.retrieve("alice")
+    assert await manager.long_term.evict(RetentionPolicy(max_rows=1)) == 2
+    assert [f["key"] for f in await manager.long_term.retrieve("alice")] == ["User Name"]
+
+    manager.start_consolidation()
+    assert manager.consolidator.get_stats()["running"]
+    await manager.stop_consolidation()
+
+@pytest.mark.asyncio
+async def test_memory_manager_recall_fans_out_and_fuses(tmp_path):
+    from llm.embeddings import HashEmbeddingProvider
+
+    class CountingEmbedder(HashEmbeddingProvider):
+        texts = []
+
+        async def embed(self, texts):
+            self.texts.extend(texts)
+            return await super().embed(texts)
+
+    embedder = CountingEmbedder(dim=128)
+    manager = MemoryManager(
+        str(tmp_path / "memory.db"),
+        embedder=embedder,
+        recall_timeouts={"episodic": 0.05},
+        recall_weights={"vector": 2.0}
+    )
+    await manager.remember({"key": "deploy_region", "value": "eu-west"})
+    await manager.remember({"key": "deploy_owner", "value": "platform team"})
+    await manager.remember("unrelated chatter about lunch", role="user")
+    await manager.flush()
+
+    async def slow_episodes(query, k=5):
+        await asyncio.sleep(1)
+        return [{"task": "never"}]
+    manager.episodic.retrieve = slow_episodes
+
+    embedder.texts.clear()
+    start = asyncio.get_running_loop().time()
+    results = await manager.recall("deploy region", k=3)
+    assert asyncio.get_running_loop().time() - start < 0.5  # the slow tier is cut off, not awaited
+
+    assert results["episodic"] == [] and results["errors"] == {"episodic": "timeout"}
+    assert set(results["latency"]) == {"short_term", "long_term", "episodic", "vector"}
+    assert embedder.texts == ["deploy region"]  # embedded once, for the vector tier only
+
+    # The fact found by both keyword and vector search outranks everything else
+    top = results["fused"][0]
+    assert top["content"] == "deploy_region: eu-west"
+    assert set(top["sources"]) == {"long_term", "vector"}
+    assert top["score"] == pytest.approx(1 / 61 + 2.0 / 61)
+    assert len(results["fused"]) == 3
+
+@pytest.mark.asyncio
+async def test_memory_server_shares_memory_across_clients(tmp_path):
+    import os
+    import socket
+    import stat
+    import numpy as np
+    from memory.client import RemoteMemoryManager
+    from memory.protocol import CALL, HEADER, ProtocolError, decode, encode
+    from memory.server import MemoryServer
+
+    server = MemoryServer(str(tmp_path / "memory.sock"), db_path=str(tmp_path / "memory.db"))
+    await server.start()
+    first, second = RemoteMemoryManager(server.path), RemoteMemoryManager(server.path)
+    try:
+        await first.remember("How do I reset my password?", role="user")
+        await first.remember({"key": "plan", "value": "enterprise"}, memory_type="long_term")
+        episode_id = await first.add_episode("reset a password", [{"step": 1}], True, "sent a reset link", 1.0)
+
+        # Pipelined: all 100 stores are in flight on one connection at once
+        vectors = np.eye(100, dtype=np.float32)
+        await asyncio.gather(*(first.vector_store.store(f"doc {i}", vectors[i], {"i": i}) for i in range(100)))
+        await first.vector_store.store_many([(f"extra {i}", vectors[i] * 2) for i in range(3)])
+        assert first.client.stats["writes"] < 10
+
+        # Another process's view of the same server
+        assert (await second.short_term.get_all())[0]["content"] == "How do I reset my password?"
+        assert (await second.long_term.retrieve("enterprise"))[0]["key"] == "plan"
+        assert await second.episodic.get_steps(episode_id) == [{"step": 1}]
+        hits = await second.vector_store.retrieve(vectors[7], k=1, filter={"i": 7})
+        assert hits[0]["content"] == "doc 7" and hits[0]["similarity"] == pytest.approx(1.0)
+        batch = await second.vector_store.retrieve_batch(vectors[:3], k=2)
+        assert [[r["content"] for r in results] for results in batch] == [["doc 0", "extra 0"], ["doc 1", "extra 1"], ["doc 2", "extra 2"]]
+        assert len(await second.vector_store.retrieve_many(vectors[:5], k=1)) == 5
+        recalled = await second.recall("password", k=3, query_embedding=vectors[0])
+        assert recalled["episodic"][0]["task"] == "reset a password" and not recalled["errors"]
+
+        # Server-side errors come back with their builtin type
+        with pytest.raises(ValueError):
+            await second.vector_store.retrieve(np.ones(3, dtype=np.float32))
+        with pytest.raises(AttributeError):
+            await second.vector_store.compact()
+
+        await first.clear_all()
+        assert await second.short_term.get_all() == []
+
+        # Owner-only socket, which a second server cannot take over
+        assert stat.S_IMODE(os.stat(server.path).st_mode) == 0o600
+        rival = MemoryServer(server.path, manager=server.manager)
+        with pytest.raises(RuntimeError):
+            await rival.start()
+        await rival.close()
+        assert os.path.exists(server.path)
+
+        # Malformed frames close their connection with a ProtocolError; the server keeps serving
+        body = encode([np.ones(4, dtype=np.float32)])
+        for bad in (body[:10], body[:2] + b"\x09" + body[3:], body + b"}", b"\x00"):
+            with pytest.raises(ProtocolError):
+                decode(bad)
+        reader, writer = await asyncio.open_unix_connection(server.path)
+        writer.write(HEADER.pack(3, 1, CALL) + b"\x00\x00{")
+        assert await reader.read() == b""
+        writer.close()
+        assert await second.short_term.get_all() == []
+
+        # Consolidation runs in the server while it serves, whatever clients do
+        serving = asyncio.create_task(server.serve_forever())
+        await asyncio.sleep(0)
+        first.start_consolidation()
+        await first.stop_consolidation()
+        assert server.manager.consolidator.get_stats()["running"]
+    finally:
+        await first.close()
+        await second.close()
+        await server.close()
+    await asyncio.gather(serving, return_exceptions=True)
+    assert not server.manager.consolidator.get_stats()["running"] and not os.path.exists(server.path)
+
+    # A socket file left behind by a server that is gone is replaced
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(server.path)
+    stale.close()
+    await server.start()
+    await server.close()
@@ -51,3 +51,32 @@ async def test_list_checkpoints(tmp_path):
     assert len(checkpoints) == 2
     # The label is now stored and returned correctly
     assert checkpoints[0]["label"] == "second" # Latest first
+
+@pytest.mark.asyncio
+async def test_sqlite_group_commit_and_wal(tmp_path):
+    import asyncio
+    import sqlite3
+    from storage.sqlite import get_database
+
+    db = get_database(str(tmp_path / "shared.db"))
+    assert get_database(str(tmp_path / "shared.db")) is db  # one writer per file
+    db.write_sync(lambda conn: conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)"))
+    assert (await db.fetchone("PRAGMA journal_mode"))[0] == "wal"
+
+    # Concurrent writes share commits; a failing write is rolled back on its own
+    writes = [db.execute("INSERT INTO items (name) VALUES (?)", (f"item{i}",)) for i in range(200)]
+    writes.append(db.execute("INSERT INTO items (name) VALUES (?)", ("item0",)))
+    outcomes = await asyncio.gather(*writes, return_exceptions=True)
+    assert isinstance(outcomes[-1], sqlite3.IntegrityError)
+    assert all(isinstance(rowid, int) for rowid in outcomes[:-1])
+    assert (await db.fetchone("SELECT count(*) FROM items"))[0] == 200
+    stats = db.get_stats()
+    assert stats["writes"] >= 201 and stats["commits"] < stats["writes"]
+
+    # Many checkpoints within one millisecond still list newest first
+    persistence = StatePersistence(backend="sqlite", db_path=str(tmp_path / "shared.db"))
+    manager = StateManager(task="Burst")
+    for i in range(5):
+        await persistence.save(manager.get_state(), label=f"c{i}")
+    assert [c["label"] for c in await persistence.list_checkpoints()] == ["c4", "c3", "c2", "c1", "c0"]
+    db.close()
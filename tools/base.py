@@ -34,7 +34,10 @@ class Tool(BaseModel):
         except Exception as e:
             return ToolResult(
                 success=False,
+                output=None,
                 error=str(e),
+                # Network and timeout errors say the tool is unreachable, not that the input was wrong
+                metadata={"infrastructure_error": True} if isinstance(e, OSError) else {},
                 duration=time.time() - start_time
             )
 
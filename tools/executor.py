@@ -1,11 +1,24 @@
 from typing import Dict, Any, Optional
 from .base import Tool, ToolResult
-from core.robustness import ErrorHandler
+from core.robustness import CircuitBreaker, ErrorHandler
 
 class ToolExecutor:
     """
     Execute tools with monitoring and error handling.
+    Each executor keeps its own circuit breaker per tool (configured with
+    `breaker_config`), so one agent's failing tool does not trip another's.
     """
+
+    def __init__(self, breaker_config: Optional[Dict[str, Any]] = None):
+        self.breaker_config = breaker_config or {}
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+    def get_circuit_breaker(self, tool: Tool) -> CircuitBreaker:
+        breaker = self.circuit_breakers.get(tool.name)
+        if breaker is None:
+            breaker = CircuitBreaker(f"tool:{tool.name}", **self.breaker_config)
+            self.circuit_breakers[tool.name] = breaker
+        return breaker
     
     async def execute(
         self,
@@ -15,14 +28,34 @@ class ToolExecutor:
     ) -> ToolResult:
         """
         Execute tool with monitoring and retry logic.
+        Fails fast while the tool's circuit breaker is open.
         """
+        breaker = self.get_circuit_breaker(tool)
+        if not breaker.allow_request():
+            return ToolResult(
+                success=False,
+                output=None,
+                error=f"Tool '{tool.name}' is temporarily unavailable (circuit open, retry in {breaker.retry_in():.1f}s)."
+            )
+        
         # Wrap tool.execute in robustness handler
-        success, result = await ErrorHandler.retry_with_backoff(
-            tool.execute,
-            max_retries=max_retries,
-            base_delay=0.5,
-            **params
-        )
+        try:
+            success, result = await ErrorHandler.retry_with_backoff(
+                tool.execute,
+                max_retries=max_retries,
+                base_delay=0.5,
+                **params
+            )
+        except BaseException:
+            breaker.release()
+            raise
+        
+        # Only errors from reaching the tool count against it. A result the tool
+        # reports as unsuccessful (no hits, invalid input) is a normal answer
+        if not success or result.metadata.get("infrastructure_error"):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
         
         if success:
             return result